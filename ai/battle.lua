@@ -75,7 +75,7 @@ local function _get_damage(wall)
 			target_group = target_group ~ 0x80
 			target_mask = memory.read("battle", "wall_targets")
 		else
-			return ""
+			return "", {}
 		end
 	end
 
@@ -138,7 +138,7 @@ local function _get_damage(wall)
 		result = string.format("it reflects and %s", result)
 	end
 
-	return result
+	return result, damage_data
 end
 
 -- add command queueing
@@ -171,6 +171,8 @@ local function _log_action()
 	log.log(string.format("Action: (debug) Command: %02X  Subcommand: %02X  Target Party: %02X  Target Monster: %02X", command, subcommand, target_party, target_monster))
 
 	local action
+	local verb
+	local name
 	local critical = ""
 
 	if (action_flags & game.battle.ACTION.CRITICAL) > 0 then
@@ -178,36 +180,47 @@ local function _log_action()
 	end
 
 	if (action_flags & game.battle.ACTION.ATTACK) > 0 then
-		action = "attacks"
+		verb = "attacks"
 	elseif (action_flags & game.battle.ACTION.MAGIC) > 0 then
+		verb = "casts"
+
 		if action_index == 0 then
-			action = string.format("casts %s", game.magic.get_spell_description(memory.read_stat(actor_slot, "subcommand", true)))
+			name = game.magic.get_spell_description(memory.read_stat(actor_slot, "subcommand", true))
 		else
-			action = string.format("casts %s", game.magic.get_spell_description(action_index))
+			name = game.magic.get_spell_description(action_index)
 		end
 	elseif (action_flags & game.battle.ACTION.ITEM) > 0 then
-		action = string.format("uses %s", game.item.get_description(action_index))
+		verb = "uses"
+		name = game.item.get_description(action_index)
 	elseif (action_flags & game.battle.ACTION.COMMAND) > 0 then
-		action = string.format("uses %s", game.battle.get_command_description(action_index))
+		verb = "uses"
+		name = game.battle.get_command_description(action_index)
 	elseif action_flags == game.battle.ACTION.MISS then
-		action = "attacks"
-	else
+		verb = "attacks"
+	end
+
+	if not verb then
 		action = string.format("does an unknown action (%02X)", action_flags)
+	elseif name then
+		action = string.format("%s %s", verb, name)
+	else
+		action = verb
 	end
 
-	local damage = _get_damage(false)
+	local damage, targets = _get_damage(false)
 
 	if damage ~= "" then
 		damage = string.format(" and %s", damage)
 	end
 
-	local wall_damage = _get_damage(true)
+	local wall_damage, wall_targets = _get_damage(true)
 
 	if wall_damage ~= "" then
 		wall_damage = string.format(" and %s", wall_damage)
 	end
 
 	log.log(string.format("Action: %s %s%s%s%s", actor, critical, action, damage, wall_damage))
+	log.event("battle_action", actor, verb, name, critical ~= "", targets, wall_targets)
 end
 
 local function _reset_state()
@@ -3419,13 +3432,22 @@ function _M.cycle()
 
 			log.log(string.format("Battle Start: %s (%s)", formation.title, stats))
 
+			if party_level > 0 then
+				log.event("battle_start", index, types[attack_type], memory.read("battle", "party_level"), memory.read("battle", "enemy_level"))
+			else
+				log.event("battle_start", index, types[attack_type], nil, nil)
+			end
+
 			if _state.strat then
 				log.log(string.format("Battle Strat: %s", _state.strat))
+				log.event("battle_strat", _state.strat)
 			end
 
 			local party_text = ""
 			local party_exp_text = ""
 			local party_agi_text = ""
+			local party = {}
+			local party_agility = {}
 
 			for i = 0, 4 do
 				local character = game.character.get_character(game.character.get_slot_from_index(i))
@@ -3452,28 +3474,37 @@ function _M.cycle()
 					party_text = string.format("%s%s%s%s:%d", party_text, delimiter, front, game.character.get_name(character), game.character.get_stat(character, "level"))
 					party_exp_text = string.format("%s%s%s:%d", party_exp_text, delimiter, game.character.get_name(character), game.character.get_stat(character, "exp"))
 					party_agi_text = string.format("%s%s%s:%d", party_agi_text, delimiter, game.character.get_name(character), game.character.get_stat(character, "agility"))
+					party[i + 1] = {game.character.get_name(character), game.character.get_stat(character, "level"), front ~= ""}
+					party_agility[i + 1] = {game.character.get_name(character), game.character.get_stat(character, "agility")}
 				else
 					party_text = string.format("%s%s%sempty", party_text, delimiter, front)
 					party_exp_text = string.format("%s%sempty", party_exp_text, delimiter)
 					party_agi_text = string.format("%s%sempty", party_agi_text, delimiter)
+					party[i + 1] = table.pack(nil, nil, front ~= "")
+					party_agility[i + 1] = table.pack(nil, nil)
 				end
 			end
 
 			log.log(string.format("Party Formation: %s", party_text))
+			log.event("battle_party_formation", party)
 			log.log(string.format("Party Experience: %s", party_exp_text))
 			log.log(string.format("Party Agility: %s", party_agi_text))
+			log.event("battle_party_agility", party_agility)
 
 			local agility_text = string.format("%d", game.enemy.get_stat(0, "agility"))
+			local enemy_agility = {game.enemy.get_stat(0, "agility")}
 
 			for i = 1, 7 do
 				local agility = game.enemy.get_stat(i, "agility")
 
 				if agility > 0 then
 					agility_text = string.format("%s %d", agility_text, agility)
+					table.insert(enemy_agility, agility)
 				end
 			end
 
 			log.log(string.format("Enemy Agility: %s", agility_text))
+			log.event("battle_enemy_agility", enemy_agility)
 
 			if FULL_RUN and CONFIG.SAVESTATE and formation.f then
 				savestate.save(string.format("states/%s - %03d - %010d - %03d - %s.state", ROUTE, ENCOUNTER_SEED, SEED, _battle_count, formation.title:gsub('/', '-')))
@@ -3661,6 +3692,7 @@ function _M.cycle()
 			local stats = string.format("%d/%d frames/%d GP dropped/%s", _state.index, emu.framecount() - _state.frame, gp, ending_text)
 
 			log.log(string.format("Battle Complete: %s (%s)", _state.formation.title, stats))
+			log.event("battle_stop", _state.index, emu.framecount() - _state.frame, gp, ending_text)
 
 			menu.wait_clear()
 
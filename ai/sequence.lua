@@ -904,6 +904,7 @@ local function _validate_fireclaw()
 
 	if count ~= 255 then
 		log.log("Resetting due to failed FireClaw dupe...")
+		log.event("reset", "fireclaw")
 		_M.end_run()
 	end
 
@@ -921,6 +922,7 @@ local function _validate_shield()
 
 	if count ~= 255 then
 		log.log("Resetting due to failed shield dupe...")
+		log.event("reset", "shield")
 		_M.end_run()
 	end
 
@@ -6688,6 +6690,7 @@ function _M.split(split)
 
 		if CONFIG.RESET_FOR_TIME and delta > (60 + 90 * factor) * 60 then
 			log.log("Resetting for time...")
+			log.event("reset", "time")
 			_M.end_run()
 		end
 	end
@@ -21,25 +21,70 @@
 # THE SOFTWARE.
 #
 
+import argparse
+import array
+import bz2
+import contextlib
+import cProfile
 import copy
+import datetime
+import functools
+import gzip
+import hashlib
+import io
+import itertools
+import json
+import lzma
+import math
+import mmap
+import multiprocessing
 import os
+import pickle
 import re
+import shutil
+import sqlite3
 import statistics
 import sys
+import tarfile
+import time
+import zipfile
 
 from collections import OrderedDict
-from typing import Any, Optional, TextIO, Union
+from typing import IO, Any, Callable, Iterable, Iterator, Optional, TextIO, Union
 
 import numpy
 
-from scipy import stats
+# Increment whenever a change to the parsing methods of Log would alter the
+# parsed state of a log, or the layout of the log cache changes. This
+# invalidates all previously cached logs.
+PARSER_VERSION = 5
 
-import matplotlib
-matplotlib.use('Agg')
+# Increment whenever the tables of the log database change. A database written
+# by another version is emptied and filled again from the logs given to it.
+DATABASE_VERSION = 2
 
-import matplotlib.pyplot as plt  # noqa: E402
+# Increment whenever the contents of partial-aggregate files change. Files of
+# another version cannot be merged.
+AGGREGATE_VERSION = 1
 
-from matplotlib.font_manager import FontProperties  # noqa: E402
+# Separates an archive's filename from the name of a log within it.
+ARCHIVE_SEPARATOR = '::'
+
+# The name util/log.lua gives each log, possibly with a compression extension.
+LOG_FILENAME_REGEX = re.compile(r'edge-(?P<route>.+)-(?P<step_seed>[0-9]{3,})-(?P<rng_seed>[0-9]{10,})-(?P<timestamp>[0-9]{8}-[0-9]{6})\.log(?:\.[a-z0-9]+)?')
+
+# Increment whenever the layout of the generated report changes. Incremental
+# report updates rewrite every page if the previous report used another version.
+REPORT_VERSION = 3
+
+# Compressed logs and archive members are read in buffers of about this size.
+READ_BUFFER_SIZE = 1 << 20
+
+# The stages of a report, as recorded by --profile.
+PROFILE_STAGES = ['parse', 'aggregate', 'summary', 'runs', 'images']
+
+# Density plots with at least this many samples use the binned estimator.
+KDE_EXACT_LIMIT = 1000
 
 COLORS = [
     '#e6194B',
@@ -65,6 +110,143 @@ COLORS = [
 ]
 
 
+#
+# Line Parsing
+#
+# Each log line is four fixed header fields followed by a message. Most
+# messages begin with a "Keyword: " prefix, which selects the line type with a
+# single lookup. Line types whose only field is the remainder of the message
+# need no regex at all; the rest match their regex against the remainder only.
+#
+
+LINE_PARSERS: dict[str, tuple[str, Union[str, re.Pattern[str], None]]] = {
+    'Action': ('battle_action', re.compile(r'(?P<actor>.*?) (?P<critical>critically )?(?P<action>(?:uses|casts) .*?|attacks)(?: and (?P<result>(?:hits|misses|heals|it reflects) .*))?$')),
+    'Battle Start': ('battle_start', re.compile(r'(?P<description>.*) \((?P<formation>.*)/(?P<type>.*)/(?P<party_level>.*)/(?P<enemy_level>.*)\)')),
+    'Battle Strat': ('battle_strat', 'strat'),
+    'Enemy Agility': ('battle_enemy_agility', 'agility'),
+    'Party Formation': ('battle_party_formation', 'formation'),
+    'Party Agility': ('battle_party_agility', 'agility'),
+    'Battle Complete': ('battle_stop', re.compile(r'(?P<description>.*) \((?P<formation>.*)/(?P<frames>.*) frames/(?P<dropped_gp>.*) GP dropped/(?P<result>.*)\)')),
+    'Inventory': ('inventory', None),
+    'Route': ('route', 'route'),
+    'RNG Seed': ('rng_seed', 'seed'),
+    'Encounter Seed': ('step_seed', 'seed'),
+    'Sequence': ('sequence', 'sequence'),
+    'Split': ('split', 'split'),
+    'Version': ('version', 'version'),
+}
+
+# The beginnings of messages that are parsed only to be ignored.
+IGNORED_MESSAGES = [
+    'Edge Final Fantasy IV', '--------------------', 'Note:', 'Action: (debug)', 'Deciding', 'Kain action', 'New Map', 'Beginning Full Run', 'WARNING', 'Setting Initial Seed', 'Yellow Chocobo Coordinates',
+    'Current Glitch Floor', 'Rebooting', 'Load game screen', 'New Seed', 'Setting encounter seed', 'Detected', 'Zeromus has', 'Cecil', 'Do not have', 'Battle Menu', 'Party Experience',
+]
+
+FALLBACK_LINE_REGEXES: list[tuple[str, re.Pattern[str]]] = [
+    ('reset_for_time', re.compile(r'Resetting for time...')),
+    ('reset_for_chocobo', re.compile(r'Resetting due to bad yellow chocobo...')),
+    ('reset_for_fireclaw', re.compile(r'Resetting due to failed FireClaw dupe...')),
+    ('reset_for_shield', re.compile(r'Resetting due to failed shield dupe...')),
+    ('_ignore', re.compile('({})'.format('|'.join(map(re.escape, IGNORED_MESSAGES))))),
+]
+
+# Finds each target in the result of an action, along with what happened to it.
+ACTION_TARGET_REGEX = re.compile(r'(?P<outcome>hits|misses|heals) (?P<target>.+?)(?= for | \(|, | and |$)')
+
+# Line types that change nothing but the last frame of a log.
+PROGRESS_LINE_TYPES = {'inventory', 'sequence', '_ignore'}
+
+# The beginnings of the messages that feed_buffer need not parse to know that
+# they are recognized: ignored and progress lines, actions and the bot's debug
+# output.
+NOISE_MESSAGES = [x for x in IGNORED_MESSAGES if not x.startswith('Action: ')] + \
+    ['{}: '.format(keyword) for keyword, (line_type, _) in LINE_PARSERS.items() if line_type in PROGRESS_LINE_TYPES or line_type == 'battle_action'] + ['DEBUG: ']
+
+# Finds the lines of every other type in a buffer of raw log data, naming the
+# group after the line type. A match only marks a candidate line, which is then
+# parsed as usual, so this may match more lines than it needs to but never
+# fewer. Debug actions are by far the most common lines, and never match the
+# battle_action regex. Any other message that does not begin with noise
+# matches as _unknown, so that it can be reported if it does not parse. The
+# lookahead on the first character of each message skips the separators
+# between the header fields, which are followed by digits or spaces.
+RECORD_PATTERNS = \
+    [(line_type, '{}: {}'.format(re.escape(keyword), r'(?!\(debug\))' if line_type == 'battle_action' else '')) for keyword, (line_type, _) in LINE_PARSERS.items() if line_type not in PROGRESS_LINE_TYPES] + \
+    [(line_type, regex.pattern) for line_type, regex in FALLBACK_LINE_REGEXES if line_type not in PROGRESS_LINE_TYPES] + \
+    [('_unknown', '(?!{})'.format('|'.join(map(re.escape, NOISE_MESSAGES))))]
+
+RECORD_REGEX = re.compile(' :: (?=[^ 0-9])(?:{})'.format(
+    '|'.join('(?P<{}>{})'.format(line_type, pattern) for line_type, pattern in RECORD_PATTERNS)
+).encode('utf-8'))
+
+# Finds the lines without a message for RECORD_REGEX to find, which feed_buffer
+# only looks for when a buffer has fewer header separators than lines need.
+HEADERLESS_LINE_REGEX = re.compile(rb'^(?![^\n]*? :: [^ 0-9\n])[^\n]+', re.MULTILINE)
+
+# The version of the event file layout that the analyzer understands. Event
+# files of another version are ignored in favour of the text log.
+EVENT_SCHEMA_VERSION = 1
+
+# The battles whose success is decided by an action, by formation and strat,
+# with the action that succeeds when it hits the first enemy.
+SUCCESS_ACTIONS = {
+    (226, 'carrot'): 'Carrot',
+    (227, 'trashcan'): 'TrashCan',
+}
+
+# The names of the formations shown in reports, by formation number.
+FORMATION_NAMES = {
+    42: 'Gargoyle x1, Cocktric x2',
+    109: 'Centaur x1, IceBeast x2',
+    111: 'Centaur x3',
+    117: 'Carapace x2, Ice Liz x2',
+    199: 'D.Machin x1',
+    200: 'Grind Fight',
+    220: 'Elements',
+    221: 'CPU',
+    222: 'D.Mist',
+    223: 'Octomamm',
+    224: 'Antlion',
+    225: 'MomBomb',
+    226: 'Milon',
+    227: 'Milon Z',
+    228: 'Baigan',
+    229: 'Kainazzo',
+    231: 'Dark Elf',
+    232: 'Magus Sisters',
+    234: 'Valvalis',
+    235: 'FloatEye (intro)',
+    237: 'Officer x1, Soldier x3',
+    239: 'WaterHag',
+    240: 'Imp Cap. x3',
+    242: 'Karate',
+    243: 'Golbez (Tellah)',
+    245: 'Raven (intro)',
+    246: 'D.Knight',
+    247: 'General x1, Fighter x2',
+    248: 'Weeper x1, WaterHag x1, Imp Cap. x1',
+    249: 'Gargoyle x1',
+    250: 'Guard x2',
+    254: 'Q.Eblan/K.Eblan',
+    255: 'Rubicant',
+    256: 'Dark Imp x3',
+    344: 'Arachne x1',
+    345: 'Arachne x2',
+    409: 'Red D. x1',
+    423: 'Calbrena',
+    425: 'Dr. Lugae/Balnab',
+    435: 'Zemus',
+    437: 'Dr. Lugae',
+    438: 'Golbez',
+    439: 'Zeromus',
+    451: 'FlameDog',
+}
+
+# The party slots whose agility anchors relative speeds when Cecil is not in
+# the party, in order of preference.
+ANCHOR_SLOTS = [2, 0, 4, 1, 3]
+
+
 #
 # Functions
 #
@@ -78,55 +260,68 @@ def is_scripted(formation: int):
         return False
 
 
+def intern_value(value: Any) -> Any:
+    """Returns the value with its strings interned, turning lists into tuples."""
+
+    if isinstance(value, str):
+        return sys.intern(value)
+    elif isinstance(value, (list, tuple)):
+        return tuple(intern_value(x) for x in value)
+    else:
+        return value
+
+
+def share_values(logs: Iterable['Log'], values: dict[tuple[int, ...], tuple[int, ...]]):
+    """Makes the equal enemy agilities of the battles of the logs one tuple, taken from (or added to) values.
+
+    Strings are interned for the life of the process, but the tuples are only
+    shared through values, which is kept for one load of logs and freed with
+    them.
+    """
+
+    for log in logs:
+        for battle in log.battles:
+            if 'enemy_agility' in battle:
+                battle.enemy_agility = values.setdefault(battle.enemy_agility, battle.enemy_agility)
+
+
 def describe_formation(formation: int):
-    formations = {
-        42: 'Gargoyle x1, Cocktric x2',
-        109: 'Centaur x1, IceBeast x2',
-        111: 'Centaur x3',
-        117: 'Carapace x2, Ice Liz x2',
-        199: 'D.Machin x1',
-        200: 'Grind Fight',
-        220: 'Elements',
-        221: 'CPU',
-        222: 'D.Mist',
-        223: 'Octomamm',
-        224: 'Antlion',
-        225: 'MomBomb',
-        226: 'Milon',
-        227: 'Milon Z',
-        228: 'Baigan',
-        229: 'Kainazzo',
-        231: 'Dark Elf',
-        232: 'Magus Sisters',
-        234: 'Valvalis',
-        235: 'FloatEye (intro)',
-        237: 'Officer x1, Soldier x3',
-        239: 'WaterHag',
-        240: 'Imp Cap. x3',
-        242: 'Karate',
-        243: 'Golbez (Tellah)',
-        245: 'Raven (intro)',
-        246: 'D.Knight',
-        247: 'General x1, Fighter x2',
-        248: 'Weeper x1, WaterHag x1, Imp Cap. x1',
-        249: 'Gargoyle x1',
-        250: 'Guard x2',
-        254: 'Q.Eblan/K.Eblan',
-        255: 'Rubicant',
-        256: 'Dark Imp x3',
-        344: 'Arachne x1',
-        345: 'Arachne x2',
-        409: 'Red D. x1',
-        423: 'Calbrena',
-        425: 'Dr. Lugae/Balnab',
-        435: 'Zemus',
-        437: 'Dr. Lugae',
-        438: 'Golbez',
-        439: 'Zeromus',
-        451: 'FlameDog',
+    return FORMATION_NAMES[formation] if formation in FORMATION_NAMES else 'Formation #{}'.format(formation)
+
+
+def parse_log_filename(filename: str) -> Optional[dict[str, Any]]:
+    """Returns the route, seeds and start time (in UTC) in the name of a log, if it was named by the bot."""
+
+    matches = LOG_FILENAME_REGEX.fullmatch(os.path.basename(filename.rpartition(ARCHIVE_SEPARATOR)[2]))
+
+    if matches is None:
+        return None
+
+    try:
+        timestamp = datetime.datetime.strptime(matches.group('timestamp'), '%Y%m%d-%H%M%S')
+    except ValueError:
+        return None
+
+    return {
+        'route': matches.group('route'),
+        'step_seed': int(matches.group('step_seed')),
+        'rng_seed': int(matches.group('rng_seed')),
+        'timestamp': timestamp,
     }
 
-    return formations[formation] if formation in formations else 'Formation #{}'.format(formation)
+
+def count_lines(data: Union[bytes, mmap.mmap]) -> int:
+    """Returns the number of lines in a buffer, including a last line without a newline."""
+
+    count = count_bytes(data, b'\n')
+    return count + 1 if len(data) > 0 and data[-1:] != b'\n' else count
+
+
+def count_bytes(data: Union[bytes, mmap.mmap], value: bytes) -> int:
+    """Returns how many times a value occurs in a buffer, not counting any that spans a multiple of 1 MiB."""
+
+    # Slices of a mapped file are copied, so it is counted a piece at a time.
+    return sum(data[x:x + (1 << 20)].count(value) for x in range(0, len(data), 1 << 20))
 
 
 def format_time(frames: float):
@@ -134,132 +329,171 @@ def format_time(frames: float):
     return '{:.0f}:{:02.0f}:{:05.2f}'.format(seconds // 3600, (seconds // 60) % 60, seconds % 60)
 
 
-def get_battle_data(logs: list['Log'], classified: bool = False, strat: bool = True, agility: bool = False):
-    battles: OrderedDict[str, Any] = OrderedDict()
+def get_peak_memory() -> tuple[Optional[float], Optional[float]]:
+    """Returns the peak memory of this process and of its largest finished child in MiB, where it is known."""
 
-    for log in logs:
-        for battle in log.battles:
-            if battle['result'].startswith('Victory') or battle['result'].startswith('Perished') or battle['result'].startswith('Stalemate'):
-                key = '{:03}'.format(battle['formation'])
+    try:
+        import resource
+    except ImportError:
+        return (None, None)
 
-                if strat and battle['strat']:
-                    key = '{}-{}'.format(key, battle['strat'])
+    # ru_maxrss is in kilobytes, except on macOS where it is in bytes.
+    scale = 1 << 20 if sys.platform == 'darwin' else 1 << 10
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale)
+
+
+def get_digest(data: Any) -> str:
+    def normalize(value: Any) -> Any:
+        if isinstance(value, dict):
+            return sorted((repr(k), normalize(v)) for k, v in value.items())
+        elif isinstance(value, (set, frozenset)):
+            return sorted(value)
+        elif isinstance(value, (list, tuple)):
+            return [normalize(x) for x in value]
+        elif isinstance(value, Record):
+            return normalize(dict(value.items()))
+        elif isinstance(value, QuantileSketch):
+            return [len(value), value.minimum, value.maximum, value.representative()]
+        else:
+            return value
 
-                if key not in battles:
-                    if classified:
-                        battles[key] = {}
-                    else:
-                        battles[key] = {'formation': battle['formation'], 'strat': battle['strat'] if strat else set([battle['strat']]) if battle['strat'] else set(), 'count': 0, 'data': [] if strat or not battle['strat'] else {}}
-
-                if classified:
-                    if agility:
-                        subkey = (battle['type'], ' '.join(map(str, battle['enemy_agility'])), battle['party_agility'])
-                    else:
-                        subkey = (battle['type'], ' '.join(map(str, battle['enemy_agility'])), battle['party_formation'])
-
-                    if subkey not in battles[key]:
-                        battles[key][subkey] = {'formation': battle['formation'], 'strat': battle['strat'] if strat else set([battle['strat']]), 'count': 0, 'data': [] if strat or not battle['strat'] else {}}
-
-                    battles[key][subkey]['count'] += 1
-
-                    if not strat and battle['strat'] and battle['strat'] not in battles[key][subkey]['strat']:
-                        battles[key][subkey]['strat'].add(battle['strat'])
-
-                    if not strat and battle['strat'] and battle['strat'] not in battles[key][subkey]['data']:
-                        battles[key][subkey]['data'][battle['strat']] = []
-
-                    if 'success' in battle:
-                        if 'success' not in battles[key][subkey]:
-                            battles[key][subkey]['success'] = 0
-                        battles[key][subkey]['success'] += 1
-
-                    if battle['result'].startswith('Victory') or battle['result'].startswith('Stalemate'):
-                        if strat or (not strat and not battle['strat']):
-                            battles[key][subkey]['data'].append(battle['frames'])
-                        else:
-                            battles[key][subkey]['data'][battle['strat']].append(battle['frames'])
-                else:
-                    battles[key]['count'] += 1
+    return hashlib.sha1(repr(normalize(data)).encode('utf-8')).hexdigest()
 
-                    if not strat and battle['strat'] and battle['strat'] not in battles[key]['strat']:
-                        battles[key]['strat'].add(battle['strat'])
 
-                    if not strat and battle['strat'] and battle['strat'] not in battles[key]['data']:
-                        battles[key]['data'][battle['strat']] = []
+def get_minimum(values: Union[list[int], 'QuantileSketch']):
+    return values.minimum if isinstance(values, QuantileSketch) else min(values)
 
-                    if 'success' in battle:
-                        if 'success' not in battles[key]:
-                            battles[key]['success'] = 0
-                        battles[key]['success'] += 1
 
-                    if battle['result'].startswith('Victory') or battle['result'].startswith('Stalemate'):
-                        if strat or (not strat and not battle['strat']):
-                            battles[key]['data'].append(battle['frames'])
-                        else:
-                            battles[key]['data'][battle['strat']].append(battle['frames'])
+def get_maximum(values: Union[list[int], 'QuantileSketch']):
+    return values.maximum if isinstance(values, QuantileSketch) else max(values)
 
-    return battles
 
+def get_median(values: Union[list[int], 'QuantileSketch']):
+    return values.median() if isinstance(values, QuantileSketch) else statistics.median(values)
 
-def get_split_data(logs: list['Log'], cumulative: bool = True):
-    splits: dict[str, list[int]] = {}
 
-    for log in logs:
-        for split, data in log.splits.items():
-            if split not in splits:
-                splits[split] = []
+def get_values(values: Union[list[int], 'QuantileSketch']) -> list[int]:
+    return values.representative() if isinstance(values, QuantileSketch) else values
 
-            if cumulative:
-                splits[split].append(data['total'])
-            else:
-                splits[split].append(data['current'])
 
-    return splits
+def get_battle_data(logs: list['Log'], classified: bool = False, strat: bool = True, agility: bool = False, relative_speed: bool = False):
+    return LogStatistics(logs).get_battle_data(classified, strat, agility, relative_speed)
 
 
-def get_seed_data(logs: list['Log']):
-    seeds: dict[str, dict[int, dict[str, Any]]] = {}
+def get_relative_speeds(signatures: Iterable[tuple[Optional[str], Optional[str]]], speeds: Optional[dict[tuple[str, str], tuple[str, str, str]]] = None) -> dict[tuple[Optional[str], Optional[str]], tuple[Optional[str], Optional[str], Optional[str]]]:
+    """Returns the relative enemy and party speeds for each pair of enemy and party agilities (see AgilityTable.get_relative_speeds).
 
-    for log in logs:
-        if log.route not in seeds:
-            seeds[log.route] = {}
+    Pairs not already in speeds are parsed together into an AgilityTable, and
+    their results are added to speeds, which the caller can keep between
+    calls. A pair missing either agility has no relative speeds.
+    """
 
-        if log.step_seed not in seeds[log.route]:
-            seeds[log.route][log.step_seed] = {'data': [], 'best_splits': {}, 'battles': 0, 'back_attack_count': 0}
+    if speeds is None:
+        speeds = {}
 
-        if log.success:
-            seeds[log.route][log.step_seed]['data'].append(log.frames)
-            seeds[log.route][log.step_seed]['battles'] += log.random_battle_count
-            seeds[log.route][log.step_seed]['back_attack_count'] += log.back_attack_count
+    signatures = set(signatures)
+    new = [x for x in signatures if x not in speeds and x[0] is not None and x[1] is not None]
 
-            for split in log.splits:
-                if split not in seeds[log.route][log.step_seed]['best_splits'] or log.splits[split]['current'] < seeds[log.route][log.step_seed]['best_splits'][split]:
-                    seeds[log.route][log.step_seed]['best_splits'][split] = log.splits[split]['current']
+    if new:
+        speeds.update(zip(new, AgilityTable(new).get_relative_speeds()))  # type: ignore
 
-    return seeds
+    return {x: speeds.get(x, (None, None, None)) for x in signatures}  # type: ignore
 
 
-def get_sum_of_best(logs: list['Log']):
-    seeds = get_seed_data(logs)
-    splits: dict[str, int] = {}
+def get_split_data(logs: list['Log'], cumulative: bool = True):
+    return LogStatistics(logs).get_split_data(cumulative)
+
+
+def get_seed_data(logs: list['Log']):
+    return LogStatistics(logs).seeds
 
-    for route in seeds.values():
-        for data in route.values():
-            for split, value in data['best_splits'].items():
-                if split not in splits or value < splits[split]:
-                    splits[split] = value
 
-    return sum(splits.values())
+def get_sum_of_best(logs: list['Log']):
+    return LogStatistics(logs).sum_of_best
 
 
 #
 # Classes
 #
 
+class Record(object):
+    """A set of named fields, read as the keys of a dict would be.
+
+    The fields are kept in slots rather than a dict, and their values are
+    interned, so that the many battles and splits of a large set of logs take
+    far less memory. A field that was never set is missing, as a key would be.
+    """
+
+    __slots__: tuple[str, ...] = ()
+
+    def __init__(self, **fields: Any):
+        for name, value in fields.items():
+            setattr(self, name, intern_value(value))
+
+    def __getstate__(self):
+        return dict(self.items())
+
+    def __setstate__(self, state: dict[str, Any]):
+        self.__init__(**state)  # type: ignore
+
+    def __getitem__(self, name: str):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def __contains__(self, name: str):
+        return hasattr(self, name)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __eq__(self, other: Any):
+        if not isinstance(other, Record):
+            return NotImplemented
+
+        return type(self) is type(other) and self.items() == other.items()
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, ', '.join('{}={!r}'.format(name, value) for name, value in self.items()))
+
+    def get(self, name: str, default: Any = None):
+        return getattr(self, name, default)
+
+    def keys(self) -> list[str]:
+        return [name for name in self.__slots__ if hasattr(self, name)]
+
+    def items(self) -> list[tuple[str, Any]]:
+        return [(name, getattr(self, name)) for name in self.__slots__ if hasattr(self, name)]
+
+
+class Battle(Record):
+    """A finished battle. The agilities, party formation and success are missing when the log does not give them."""
+
+    __slots__ = ('formation', 'type', 'strat', 'scripted', 'party_level', 'enemy_level', 'enemy_agility', 'party_formation', 'party_agility', 'success', 'frames', 'dropped_gp', 'result')
+
+
+class Split(Record):
+    """The frames a split took, and the frames from the start of the run to its end."""
+
+    __slots__ = ('current', 'total')
+
+
 class Log(object):
-    def __init__(self, filename: str):
-        self._battles: list[dict[str, Any]] = []
-        self._splits: dict[str, dict[str, int]] = {}
+    __slots__ = (
+        '_battles', '_splits', '_success', '_frames', '_route', '_rng_seed', '_step_seed', '_last_frame', '_reset_for_time', '_reset_for_chocobo', '_reset_for_fireclaw', '_reset_for_shield',
+        '_version', '_actions', '_filename', '_current_battle', '_battle_frame', '_battle_actions', '_base_frame', '_last_split', '_line_count', '_unrecognized_count',
+    )
+
+    # Counted while parsing, for profiling, but not part of the parsed state.
+    PARSE_COUNTS = ('_line_count', '_unrecognized_count')
+
+    def __init__(self, filename: str, parse: bool = True, actions: bool = False):
+        self._battles: list[Battle] = []
+        self._splits: dict[str, Split] = {}
         self._success: bool = False
         self._frames: Optional[int] = None
         self._route: Optional[str] = None
@@ -271,17 +505,57 @@ class Log(object):
         self._reset_for_fireclaw = False
         self._reset_for_shield = False
         self._version: Optional[str] = None
+        self._actions: Optional['ActionTable'] = ActionTable() if actions else None
+
+        self._filename = filename
+        self._current_battle: dict[str, Any] = {}
+        self._battle_frame: Optional[int] = None
+        self._battle_actions = 0
+        self._base_frame: Optional[int] = None
+        self._last_split: Optional[int] = None
+        self._line_count = 0
+        self._unrecognized_count = 0
+
+        if parse:
+            self._parse_file(filename)
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> 'Log':
+        log = cls.__new__(cls)
+        log.__setstate__(state)
+        return log
 
-        self._parse_file(filename)
+    @property
+    def state(self) -> dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__ if name not in self.PARSE_COUNTS}
 
-        if self._route == 'paladin':  # type: ignore
-            final_split = 'Paladin'
-        else:
-            final_split = 'Zeromus Death'
+    def __getstate__(self):
+        return self.state
 
-        if final_split in self._splits:
-            self._success = True
-            self._frames = self._splits[final_split]['total']
+    def __setstate__(self, state: dict[str, Any]):
+        self._line_count = 0
+        self._unrecognized_count = 0
+
+        for name, value in state.items():
+            setattr(self, name, value)
+
+        # Logs are parsed in other processes, or loaded from a cache, so the
+        # strings they share are interned again here.
+        self._splits = {intern_value(name): split for name, split in self._splits.items()}
+        self._route = intern_value(self._route)
+        self._version = intern_value(self._version)
+
+    @property
+    def line_count(self):
+        """The lines (or event records) fed to this log since it was created, which is not kept in its state."""
+
+        return self._line_count
+
+    @property
+    def unrecognized_count(self):
+        """The lines fed to this log that were not recognized, except those feed_buffer skips as noise (see NOISE_MESSAGES)."""
+
+        return self._unrecognized_count
 
     @property
     def back_attack_count(self):
@@ -295,6 +569,12 @@ class Log(object):
     def battles(self):
         return self._battles
 
+    @property
+    def actions(self) -> Optional['ActionTable']:
+        """The actions of the finished battles, if the log was parsed with actions."""
+
+        return self._actions
+
     @property
     def frames(self):
         if self._frames is not None:
@@ -374,546 +654,2451 @@ class Log(object):
     def version(self):
         return self._version
 
-    def _parse_file(self, filename: str):
-        with open(filename) as f:
-            current_battle: dict[str, Any] = {}
-            base_frame = None
-            last_split = None
+    @property
+    def filename(self):
+        return self._filename
 
-            for line in f:
-                line_type, fields = self._parse_line(line.strip())
+    def _parse_file(self, filename: str):
+        if self.parse_events(filename):
+            return
 
-                if not fields:
-                    continue
+        for _, buffers in read_logs(filename):
+            for data in buffers:
+                self.feed_buffer(data)
 
-                if base_frame is not None:
-                    self._last_frame = int(fields['frame']) - base_frame
-
-                if line_type == 'split':
-                    if fields['split'] == 'Start':
-                        base_frame = int(fields['frame'])
-                        last_split = base_frame
-                    else:
-                        assert(base_frame is not None and last_split is not None)
-                        self._splits[fields['split']] = {'current': int(fields['frame']) - last_split, 'total': int(fields['frame']) - base_frame}
-                        last_split = int(fields['frame'])
-                elif line_type == 'route':
-                    self._route = fields['route']
-                elif line_type == 'rng_seed':
-                    self._rng_seed = int(fields['seed'])
-                elif line_type == 'step_seed':
-                    self._step_seed = int(fields['seed'])
-                elif line_type == 'version':
-                    self._version = fields['version']
-                elif line_type == 'reset_for_time':
-                    self._reset_for_time = True
-                elif line_type == 'reset_for_chocobo':
-                    self._reset_for_chocobo = True
-                elif line_type == 'reset_for_fireclaw':
-                    self._reset_for_fireclaw = True
-                elif line_type == 'reset_for_shield':
-                    self._reset_for_shield = True
-                elif line_type == 'battle_start':
-                    if current_battle:
-                        print('WARNING: A new battle has started without finishing the previous one while parsing {}'.format(filename))
-
-                    current_battle = {
-                        'formation': int(fields['formation']),
-                        'type': fields['type'],
-                        'strat': 'default',
-                        'scripted': is_scripted(int(fields['formation'])),
-                        'party_level': None if fields['party_level'] == '-' else int(fields['party_level']),
-                        'enemy_level': None if fields['enemy_level'] == '-' else int(fields['enemy_level']),
-                    }
-                elif line_type == 'battle_action':
-                    if current_battle['formation'] == 226 and current_battle['strat'] == 'carrot':
-                        if fields['action'].endswith('Carrot') and 'Enemy #0' in fields['result']:
-                            current_battle['success'] = True
-                    elif current_battle['formation'] == 227 and current_battle['strat'] == 'trashcan':
-                        if fields['action'].endswith('TrashCan') and 'Enemy #0' in fields['result']:
-                            current_battle['success'] = True
-                elif line_type == 'battle_strat':
-                    current_battle['strat'] = fields['strat']
-                elif line_type == 'battle_enemy_agility':
-                    current_battle['enemy_agility'] = list(map(int, fields['agility'].split()))
-                elif line_type == 'battle_party_formation':
-                    current_battle['party_formation'] = fields['formation']
-                elif line_type == 'battle_party_agility':
-                    current_battle['party_agility'] = fields['agility']
-                elif line_type == 'battle_stop':
-                    current_battle['frames'] = int(fields['frames'])
-                    current_battle['dropped_gp'] = int(fields['dropped_gp'])
-                    current_battle['result'] = fields['result']
-                    self._battles.append(current_battle)
-                    current_battle = {}
+    def _update_success(self):
+        if self._route == 'paladin':  # type: ignore
+            final_split = 'Paladin'
+        else:
+            final_split = 'Zeromus Death'
 
-    def _parse_line(self, line: str) -> tuple[Optional[str], Optional[dict[str, Union[str, Any]]]]:
-        base_regex = '(?P<timestamp>.*) :: (?P<frame>.*) :: (?P<time>.*) :: (?P<game_time>.*) :: '
-
-        regexes = {
-            'battle_action': r'Action: (?P<actor>.*) (?P<action>(uses|casts|attacks) [^ ]*)( and (?P<result>(hits|misses|heals).*))?',
-            'battle_start': r'Battle Start: (?P<description>.*) \((?P<formation>.*)/(?P<type>.*)/(?P<party_level>.*)/(?P<enemy_level>.*)\)',
-            'battle_strat': r'Battle Strat: (?P<strat>.*)',
-            'battle_enemy_agility': r'Enemy Agility: (?P<agility>.*)',
-            'battle_party_formation': r'Party Formation: (?P<formation>.*)',
-            'battle_party_agility': r'Party Agility: (?P<agility>.*)',
-            'battle_stop': r'Battle Complete: (?P<description>.*) \((?P<formation>.*)/(?P<frames>.*) frames/(?P<dropped_gp>.*) GP dropped/(?P<result>.*)\)',
-            'inventory': r'Inventory: .*',
-            'route': r'Route: (?P<route>.*)',
-            'rng_seed': r'RNG Seed: (?P<seed>.*)',
-            'reset_for_time': r'Resetting for time...',
-            'reset_for_chocobo': r'Resetting due to bad yellow chocobo...',
-            'reset_for_fireclaw': r'Resetting due to failed FireClaw dupe...',
-            'reset_for_shield': r'Resetting due to failed shield dupe...',
-            'step_seed': r'Encounter Seed: (?P<seed>.*)',
-            'sequence': r'Sequence: (?P<sequence>.*)',
-            'split': r'Split: (?P<split>.*)',
-            'version': r'Version: (?P<version>.*)',
-            '_ignore': r'(Edge Final Fantasy IV|--------------------|Note:|Action: \(debug\)|Deciding|Kain action|New Map|Beginning Full Run|WARNING|Setting Initial Seed|Yellow Chocobo Coordinates|Current Glitch Floor|Rebooting|Load game screen|New Seed|Setting encounter seed|Detected|Zeromus has|Cecil|Do not have|Battle Menu|Party Experience)',
-        }
+        if final_split in self._splits:
+            self._success = True
+            self._frames = self._splits[final_split]['total']
 
-        for line_type, regex in regexes.items():
-            matches = re.match(base_regex + regex, line)
+    def feed(self, line: str):
+        line_type, fields = self._parse_line(line.strip())
+        self._line_count += 1
 
-            if matches:
-                return (line_type, matches.groupdict())
+        if fields is None:
+            self._unrecognized_count += 1
+        elif fields:
+            self._update(line_type, fields)
 
-        print('UNRECOGNIZED LINE: {}'.format(line))
-        return (None, None)
+    def feed_buffer(self, data: Union[bytes, mmap.mmap]):
+        """Feeds the complete lines in a buffer, leaving the same state as feed.
 
+        Only the lines found by RECORD_REGEX, and the last other line that
+        parses, are decoded and parsed. The lines in between can only change
+        the last frame, which the line after them sets again. The same goes
+        for actions during a battle that SUCCESS_ACTIONS does not list, unless
+        the log records its actions.
 
-#
-# Image Functions
-#
+        So that unrecognized lines are still reported, the lines that begin
+        with neither a known line type nor noise are parsed too, as are the
+        lines without a header, if the buffer has any.
+        """
 
-def img_output_battle(f: str, key: str, data: dict[str, Any]):
-    figure = plt.figure(figsize=(12.0, 4.8))
-    figure.suptitle('{} Battle Time'.format(describe_formation(data['formation'])))
+        parsed_end = 0
+        line_end = 0
+        line_count = count_lines(data)
+        self._line_count += line_count
 
-    axis_min = None
-    axis_max = None
+        if count_bytes(data, b' :: ') < 4 * line_count:
+            for match in HEADERLESS_LINE_REGEX.finditer(data):
+                self._check_line(match.group())
 
-    if len(data['strat']) > 0:
-        values = {}
+        for match in RECORD_REGEX.finditer(data):
+            if match.start() < line_end:
+                continue
 
-        for strat, strat_data in data['data'].items():
-            values[strat] = [x / 60.0988 for x in strat_data]
-    else:
-        values = {'Default Strat': [x / 60.0988 for x in data['data']]}
+            if match.lastgroup == '_unknown':
+                line_start = data.rfind(b'\n', 0, match.start()) + 1
+                line_end = data.find(b'\n', match.end()) + 1 or len(data)
+                self._check_line(data[line_start:line_end])
+                continue
 
-    mintmp = [min(x) for x in values.values() if len(x) > 0]
-    maxtmp = [max(x) for x in values.values() if len(x) > 0]
+            if match.lastgroup == 'battle_action' and self._actions is None and 'formation' in self._current_battle and (self._current_battle['formation'], self._current_battle['strat']) not in SUCCESS_ACTIONS:
+                continue
 
-    axis_min = min(mintmp) - 10 if len(mintmp) > 0 else 0
-    axis_max = max(maxtmp) + 10 if len(maxtmp) > 0 else 300
+            line_start = data.rfind(b'\n', 0, match.start()) + 1
+            line_end = data.find(b'\n', match.end()) + 1 or len(data)
+            line_type, fields = self._parse_line(data[line_start:line_end].decode('utf-8').strip())
 
-    subplot = figure.add_subplot(111)
-    axis = numpy.linspace(axis_min, axis_max)  # type: ignore
+            if fields is None:
+                self._unrecognized_count += 1
+            elif fields:
+                self._update(line_type, fields)
+                parsed_end = line_end
 
-    for i, (strat, strat_data) in enumerate(values.items()):
-        x = numpy.array(strat_data, dtype=float)  # type: ignore
+        line_type, fields = self._match_last_line(data, parsed_end)
 
-        try:
-            kde = stats.gaussian_kde(x)
-        except Exception:
-            kde = None
+        if fields:
+            self._update(line_type, fields)
 
-        subplot.plot(x, numpy.zeros(x.shape), '+', ms=20, color=COLORS[i % len(COLORS)])  # type: ignore
+    def _check_line(self, line: bytes):
+        """Parses a line that changes nothing but the last frame, only to report it if it is not recognized."""
 
-        if kde:
-            subplot.plot(axis, kde(axis), '-', color=COLORS[i % len(COLORS)], label=strat)
+        if self._parse_line(line.decode('utf-8').strip())[1] is None:
+            self._unrecognized_count += 1
 
-    fontprop = FontProperties()
-    fontprop.set_size('small')
+    def feed_events(self, records: list[list[Any]]):
+        """Feeds the records of an event file, leaving the same state as the text log except for its last frame.
 
-    if len(data['strat']) > 0:
-        box = subplot.get_position()
-        subplot.set_position([box.x0, box.y0, box.width * 0.8, box.height])
-        plt.legend(loc="center left", bbox_to_anchor=(1, 0.5), prop=fontprop)
+        Like feed_buffer, actions during a battle that SUCCESS_ACTIONS does not
+        list are skipped unless the log records its actions.
+        """
 
-    plt.xlabel("Battle Time (seconds)")  # type: ignore
-    plt.ylabel("Probability")  # type: ignore
-    plt.savefig(f)
-    plt.close(figure)
+        self._line_count += len(records)
 
+        for record in records:
+            if record[1] == 'battle_action' and self._actions is None and 'formation' in self._current_battle and (self._current_battle['formation'], self._current_battle['strat']) not in SUCCESS_ACTIONS:
+                continue
 
-def img_output_runs(f: str, logs: list['Log'], seed: Optional[int] = False):
-    figure = plt.figure(figsize=(12.0, 4.8))
-    figure.suptitle('Run Completion Times')
+            line_type, fields = self._match_event(record)
 
-    axis_min = None
-    axis_max = None
+            if fields:
+                self._update(line_type, fields)
 
-    values: dict[str, list[float]] = {}
+    def parse_events(self, filename: str) -> bool:
+        """Parses the event file written alongside a log, if there is one the analyzer understands.
 
-    for log in logs:
-        if seed:
-            key = '{}-{}'.format(log.route, log.step_seed)
-        else:
-            key = log.route
+        The last frame is taken from the last line of the text log that parses,
+        as the event file only covers the lines that change anything else.
+        """
 
-        if log.success:
-            if key not in values:
-                values[key] = []
+        records = read_events(filename)
 
-            values[key].append(log.frames * 655171 / 39375000)
+        if records is None:
+            return False
 
-    mintmp = [min(x) for x in values.values() if len(x) > 0]
-    maxtmp = [max(x) for x in values.values() if len(x) > 0]
+        _, fields = self._match_last_line(read_tail(filename))
 
-    axis_min = min(mintmp) - 10 if len(mintmp) > 0 else 0
-    axis_max = max(maxtmp) + 10 if len(maxtmp) > 0 else 300
+        if not fields:
+            return False
 
-    subplot = figure.add_subplot(111)
-    axis = numpy.linspace(axis_min, axis_max)  # type: ignore
+        self.feed_events(records)
+        self._update(None, fields)
 
-    for i, (category, data) in enumerate(values.items()):
-        x = numpy.array(data, dtype=float)  # type: ignore
+        return True
 
-        try:
-            kde = stats.gaussian_kde(x)
-        except Exception:
-            kde = None
+    def _update(self, line_type: Optional[str], fields: dict[str, Any]):
+        current_battle = self._current_battle
 
-        subplot.plot(x, numpy.zeros(x.shape), '+', ms=20, color=COLORS[i % len(COLORS)])  # type: ignore
+        if self._base_frame is not None:
+            self._last_frame = int(fields['frame']) - self._base_frame
 
-        if kde:
-            subplot.plot(axis, kde(axis), '-', color=COLORS[i % len(COLORS)], label=category)
+        if line_type == 'split':
+            if fields['split'] == 'Start':
+                self._base_frame = int(fields['frame'])
+                self._last_split = self._base_frame
+            else:
+                assert(self._base_frame is not None and self._last_split is not None)
+                self._splits[intern_value(fields['split'])] = Split(current=int(fields['frame']) - self._last_split, total=int(fields['frame']) - self._base_frame)
+                self._last_split = int(fields['frame'])
+                self._update_success()
+        elif line_type == 'route':
+            self._route = fields['route']
+            self._update_success()
+        elif line_type == 'rng_seed':
+            self._rng_seed = int(fields['seed'])
+        elif line_type == 'step_seed':
+            self._step_seed = int(fields['seed'])
+        elif line_type == 'version':
+            self._version = fields['version']
+        elif line_type == 'reset_for_time':
+            self._reset_for_time = True
+        elif line_type == 'reset_for_chocobo':
+            self._reset_for_chocobo = True
+        elif line_type == 'reset_for_fireclaw':
+            self._reset_for_fireclaw = True
+        elif line_type == 'reset_for_shield':
+            self._reset_for_shield = True
+        elif line_type == 'battle_start':
+            if current_battle:
+                print('WARNING: A new battle has started without finishing the previous one while parsing {}'.format(self._filename))
+
+                if self._actions is not None:
+                    self._actions.truncate(len(self._actions) - self._battle_actions)
+
+            self._battle_frame = int(fields['frame'])
+            self._battle_actions = 0
+            self._current_battle = {
+                'formation': int(fields['formation']),
+                'type': fields['type'],
+                'strat': 'default',
+                'scripted': is_scripted(int(fields['formation'])),
+                'party_level': None if fields['party_level'] == '-' else int(fields['party_level']),
+                'enemy_level': None if fields['enemy_level'] == '-' else int(fields['enemy_level']),
+            }
+        elif line_type == 'battle_action':
+            action = SUCCESS_ACTIONS.get((current_battle['formation'], current_battle['strat']))
+
+            if action and fields['action'].endswith(action) and 'Enemy #0' in fields['result']:
+                current_battle['success'] = True
+
+            if self._actions is not None:
+                assert(self._battle_frame is not None)
+                targets = ACTION_TARGET_REGEX.findall(fields['result'] or '')
+                outcomes = list(OrderedDict.fromkeys(outcome for outcome, _ in targets))
+                self._actions.append(len(self._battles), int(fields['frame']) - self._battle_frame, bool(fields.get('critical')), fields['actor'], fields['action'], ', '.join(target for _, target in targets) or None, ', '.join(outcomes) or None)
+                self._battle_actions += 1
+        elif line_type == 'battle_strat':
+            current_battle['strat'] = fields['strat']
+        elif line_type == 'battle_enemy_agility':
+            current_battle['enemy_agility'] = list(map(int, fields['agility'].split()))
+        elif line_type == 'battle_party_formation':
+            current_battle['party_formation'] = fields['formation']
+        elif line_type == 'battle_party_agility':
+            current_battle['party_agility'] = fields['agility']
+        elif line_type == 'battle_stop':
+            current_battle['frames'] = int(fields['frames'])
+            current_battle['dropped_gp'] = int(fields['dropped_gp'])
+            current_battle['result'] = fields['result']
+            self._battles.append(Battle(**current_battle))
+            self._current_battle = {}
+
+    def _match_last_line(self, data: Union[bytes, mmap.mmap], start: int = 0) -> tuple[Optional[str], Optional[dict[str, Union[str, Any]]]]:
+        line_end = len(data)
+
+        while line_end > start:
+            line_start = max(start, data.rfind(b'\n', start, line_end - 1) + 1)
+            line_type, fields = self._match_line(data[line_start:line_end].decode('utf-8').strip())
+
+            if fields:
+                return (line_type, fields)
+
+            line_end = line_start
 
-    fontprop = FontProperties()
-    fontprop.set_size('small')
+        return (None, None)
 
-    box = subplot.get_position()
-    subplot.set_position([box.x0, box.y0, box.width * 0.8, box.height])
-    plt.legend(loc="center left", bbox_to_anchor=(1, 0.5), prop=fontprop)
+    def _match_event(self, record: list[Any]) -> tuple[Optional[str], Optional[dict[str, Any]]]:
+        """Converts an event to the line type and fields of the corresponding line of the text log."""
+
+        frame, line_type, *values = record
+        fields: Optional[dict[str, Any]] = None
+
+        if line_type in ['version', 'route', 'split']:
+            fields = {line_type: values[0]}
+        elif line_type in ['rng_seed', 'step_seed']:
+            fields = {'seed': values[0]}
+        elif line_type == 'battle_start':
+            formation, battle_type, party_level, enemy_level = values
+            fields = {'formation': formation, 'type': battle_type, 'party_level': '-' if party_level is None else party_level, 'enemy_level': '-' if enemy_level is None else enemy_level}
+        elif line_type == 'battle_strat':
+            fields = {'strat': values[0]}
+        elif line_type == 'battle_enemy_agility':
+            fields = {'agility': ' '.join(map(str, values[0]))}
+        elif line_type == 'battle_party_formation':
+            fields = {'formation': ' / '.join('{}{}'.format('*' if front else '', 'empty' if name is None else '{}:{}'.format(name, level)) for name, level, front in values[0])}
+        elif line_type == 'battle_party_agility':
+            fields = {'agility': ' / '.join('empty' if name is None else '{}:{}'.format(name, agility) for name, agility in values[0])}
+        elif line_type == 'battle_action':
+            actor, verb, name, critical, targets, wall_targets = values
+
+            # Unknown actions have no verb, and do not parse in the text log.
+            if verb is not None:
+                # The result keeps the outcome and name of each target from the
+                # text log, which is all that is used of it.
+                result, wall_result = [', '.join('{} {}'.format('misses' if damage == 16384 else 'heals' if damage < 0 else 'hits', target) for target, damage, _ in x) for x in [targets, wall_targets]]
+
+                if wall_result:
+                    result = '{}{}it reflects and {}'.format(result, ' and ' if result else '', wall_result)
+
+                fields = {'actor': actor, 'critical': 'critically ' if critical else None, 'action': verb if name is None else '{} {}'.format(verb, name), 'result': result or None}
+        elif line_type == 'battle_stop':
+            formation, frames, dropped_gp, result = values
+            fields = {'formation': formation, 'frames': frames, 'dropped_gp': dropped_gp, 'result': result}
+        elif line_type == 'reset':
+            line_type = 'reset_for_{}'.format(values[0])
+            fields = {}
+
+        if fields is None:
+            return (None, None)
+
+        fields['frame'] = frame
+        return (line_type, fields)
 
-    plt.xlabel("Run Time (seconds)")  # type: ignore
-    plt.ylabel("Probability")  # type: ignore
-    plt.savefig(f)
-    plt.close(figure)
+    def _parse_line(self, line: str) -> tuple[Optional[str], Optional[dict[str, Union[str, Any]]]]:
+        line_type, fields = self._match_line(line)
 
+        if fields is None:
+            print('UNRECOGNIZED LINE: {}'.format(line))
 
-#
-# HTML Functions
-#
+        return (line_type, fields)
 
-def html_output_header(f: TextIO):
-    f.write('<!DOCTYPE html>\n')
-    f.write('<html lang="en">\n')
-    f.write('\t<head>\n')
-    f.write('\t\t<meta charset="utf-8">\n')
-    f.write('\t\t<title>Edge Log Analysis</title>\n')
-    f.write('\t\t<link href="https://maxcdn.bootstrapcdn.com/bootstrap/3.3.7/css/bootstrap.min.css" rel="stylesheet" integrity="sha384-BVYiiSIFeK1dGmJRAkycuHAHRg32OmUcww7on3RYdg4Va+PmSTsz/K68vbdEjh4u" crossorigin="anonymous">\n')
-    f.write('\t\t<link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/jquery.tablesorter/2.28.9/css/theme.bootstrap_3.min.css" integrity="sha256-kHFAS2GpR7DKNTb9SMX1aaoBxjLsZyeAX2Dh7h4UB1g=" crossorigin="anonymous" />\n')
-    f.write('\t\t<script src="https://cdnjs.cloudflare.com/ajax/libs/jquery/3.2.1/jquery.min.js" integrity="sha256-hwg4gsxgFZhOsEEamdOYGBf13FyQuiTwlAQgxVSNgt4=" crossorigin="anonymous"></script>\n')
-    f.write('\t\t<script src="https://cdnjs.cloudflare.com/ajax/libs/jquery.tablesorter/2.28.9/js/jquery.tablesorter.min.js" integrity="sha256-kgWKzrQM9EptuijrOz9DZw4YTl/iEtgLzcfCB2WfV2I=" crossorigin="anonymous"></script>\n')
-    f.write('\t\t<script src="https://cdnjs.cloudflare.com/ajax/libs/jquery.tablesorter/2.28.9/js/jquery.tablesorter.widgets.min.js" integrity="sha256-68t49lPEpa0S/ohrRPVYgcHaMn4HyOKfVomAVMAXNoM=" crossorigin="anonymous"></script>\n')
-    f.write('\t\t<meta name="viewport" content="width=device-width, initial-scale=1">\n')
-    f.write('\t\t<style type="text/css">\n')
-    f.write('\t\t\t.bold { font-weight: bold; }\n')
-    f.write('\t\t</style>\n')
-    f.write('\t</head>\n')
-    f.write('\t<body>\n')
-    f.write('\t\t<div class="container">\n')
-    f.write('\t\t\t<h1>Edge Log Analysis</h1>\n')
-    f.write('\t\t\t<h2>Introduction</h2>\n')
-    f.write('\t\t\t<p>This page is a statistical analysis of the log files generated by Edge, the Final Fantasy IV speed running bot.</p>\n')
-
-
-def html_output_footer(f: TextIO):
-    f.write('\t\t</div>\n')
-    f.write('\t\t<script>\n')
-    f.write('''$.extend($.tablesorter.themes.bootstrap, {table: 'table table-bordered table-striped'});''')
-    f.write('\t\t\t$(document).ready(function()\n')
-    f.write('\t\t\t\t{\n')
-    f.write('''var options = {
-        theme: "bootstrap",
-        headerTemplate: "{content} {icon}",
-        widgets: ["uitheme", "zebra"]
-    };\n''')
-    f.write('\t\t\t\t\t$("#seeds").tablesorter(options);\n')
-    f.write('\t\t\t\t\t$("#runs").tablesorter(options);\n')
-    f.write('\t\t\t\t}\n')
-    f.write('\t\t\t);\n')
-    f.write('\t\t</script>\n')
-    f.write('\t</body>\n')
-    f.write('</html>\n')
-
-
-def html_output_basic_statistics(f: TextIO, logs: list[Log]):
-    f.write('\t\t\t<h2>Basic Statistics</h2>\n')
-    f.write('\t\t\t<dl class="dl-horizontal">\n')
-    f.write('\t\t\t\t<dt>Number of Logs</dt><dd>{}</dd>\n'.format(len(logs)))
-    if len([x for x in logs if x.success]) > 0:
-        f.write('\t\t\t\t<dt>Best Time</dt><dd>{}</dd>\n'.format(format_time(min([x.frames for x in logs if x.success]))))
-        f.write('\t\t\t\t<dt>Sum of Best</dt><dd>{}</dd>\n'.format(format_time(get_sum_of_best(logs))))
-    f.write('\t\t\t</dl>\n')
+    def _match_line(self, line: str) -> tuple[Optional[str], Optional[dict[str, Union[str, Any]]]]:
+        header = line.split(' :: ', 4)
 
+        if len(header) == 5:
+            message = header[4]
+            keyword, separator, remainder = message.partition(': ')
+            parser = LINE_PARSERS.get(keyword) if separator else None
+            fields = None
 
-def html_output_splits(f: TextIO, logs: list[Log]):
-    splits = {}
+            if parser:
+                line_type, pattern = parser
 
-    f.write('\t\t\t<h2>Splits</h2>\n')
-    f.write('\t\t\t<table class="table table-striped">\n')
-    f.write('\t\t\t\t<thead>\n')
-    f.write('\t\t\t\t\t<tr>\n')
-    f.write('\t\t\t\t\t\t<th>Split</th>\n')
-    f.write('\t\t\t\t\t\t<th>Count</th>\n')
-    f.write('\t\t\t\t\t\t<th>Minimum</th>\n')
-    f.write('\t\t\t\t\t\t<th>Maximum</th>\n')
-    f.write('\t\t\t\t\t\t<th>Median</th>\n')
-    f.write('\t\t\t\t\t</tr>\n')
-    f.write('\t\t\t\t</thead>\n')
-    f.write('\t\t\t\t<tbody>\n')
-
-    splits = get_split_data(logs, True)
-
-    for split, data in sorted(splits.items(), key=lambda x: min(x[1])):
-        f.write('\t\t\t\t\t<tr>\n')
-        f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(split))
-        f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(len(data)))
-        f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(format_time(min(data))))
-        f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(format_time(max(data))))
-        f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(format_time(statistics.median(data))))
-        f.write('\t\t\t\t\t</tr>\n')
-
-    f.write('\t\t\t\t</tbody>\n')
-    f.write('\t\t\t</table>\n')
-
-
-def html_output_battles(f: TextIO, logs: list[Log]):
-    f.write('\t\t\t<h2>Battles</h2>\n')
-    f.write('\t\t\t<table class="table table-striped">\n')
-    f.write('\t\t\t\t<thead>\n')
-    f.write('\t\t\t\t\t<tr>\n')
-    f.write('\t\t\t\t\t\t<th>Description</th>\n')
-    f.write('\t\t\t\t\t\t<th>Strat</th>\n')
-    f.write('\t\t\t\t\t\t<th>Count</th>\n')
-    f.write('\t\t\t\t\t\t<th>Victory Rate</th>\n')
-    f.write('\t\t\t\t\t\t<th>Success Rate</th>\n')
-    f.write('\t\t\t\t\t\t<th>Minimum</th>\n')
-    f.write('\t\t\t\t\t\t<th>Maximum</th>\n')
-    f.write('\t\t\t\t\t\t<th>Median</th>\n')
-    f.write('\t\t\t\t\t</tr>\n')
-    f.write('\t\t\t\t</thead>\n')
-    f.write('\t\t\t\t<tbody>\n')
-
-    battles: OrderedDict[str, Any] = OrderedDict()
-    ordering = {}
-    index = 0
+                if pattern is None:
+                    fields = {}
+                elif isinstance(pattern, str):
+                    fields = {pattern: remainder}
+                else:
+                    matches = pattern.match(remainder)
 
-    for log in logs:
-        for battle in log.battles:
-            if battle['result'].startswith('Victory') or battle['result'].startswith('Perished') or battle['result'].startswith('Stalemate'):
-                if battle['formation'] not in ordering:
-                    ordering[battle['formation']] = index
-                    index += 1
+                    if matches:
+                        fields = matches.groupdict()
 
-                key = '{:03}'.format(battle['formation'])
+            if fields is None:
+                for line_type, regex in FALLBACK_LINE_REGEXES:
+                    matches = regex.match(message)
 
-                if battle['strat']:
-                    key = '{}-{}'.format(key, battle['strat'])
+                    if matches:
+                        fields = matches.groupdict()
+                        break
 
-                if key not in battles:
-                    battles[key] = {'formation': battle['formation'], 'strat': battle['strat'], 'data': [], 'count': 0, 'index': ordering[battle['formation']]}
+            if fields is not None:
+                fields['timestamp'], fields['frame'], fields['time'], fields['game_time'] = header[:4]
+                return (line_type, fields)
 
-                if 'success' in battle:
-                    if 'success' not in battles[key]:
-                        battles[key]['success'] = 0
-                    battles[key]['success'] += battle['success']
+        return (None, None)
 
-                if battle['result'].startswith('Victory') or battle['result'].startswith('Stalemate'):
-                    battles[key]['data'].append(battle['frames'])
 
-                battles[key]['count'] += 1
+class LogFilter(object):
+    """Selects logs by route, encounter seed range, start time and version, reading as little of them as it can.
 
-    for key, data in sorted(battles.items(), key=lambda x: (x[1]['index'], x[1]['strat'])):
-        f.write('\t\t\t\t\t<tr>\n')
-        f.write('\t\t\t\t\t\t<td><a href="battles/{}.html">{}</a></td>\n'.format(key, describe_formation(data['formation'])))
-        f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(data['strat'] if data['strat'] else '-'))
-        f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(data['count']))
-        f.write('\t\t\t\t\t\t<td>{:.3f}%</td>\n'.format(len(data['data']) * 100 / data['count']))
+    The route, encounter seed and start time of a log named by the bot come
+    from its name, so a log that fails them is never opened. Otherwise, and for
+    the version, the lines at the start of the log are read until the fields
+    needed have been seen, or up to the first split. Start times are in UTC.
+    """
 
-        if 'success' in data:
-            f.write('\t\t\t\t\t\t<td>{:.3f}%</td>\n'.format(data['success'] * 100 / data['count']))
-        else:
-            f.write('\t\t\t\t\t\t<td>-</td>\n')
+    def __init__(self, routes: Optional[list[str]] = None, seeds: Optional[tuple[int, int]] = None, since: Optional[datetime.datetime] = None, until: Optional[datetime.datetime] = None, versions: Optional[list[str]] = None):
+        self._routes = set(routes) if routes else None
+        self._seeds = seeds
+        self._since = since
+        self._until = until
+        self._versions = set(versions) if versions else None
 
-        f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(format_time(min(data['data'])) if len(data['data']) > 0 else 'N/A'))
-        f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(format_time(max(data['data'])) if len(data['data']) > 0 else 'N/A'))
-        f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(format_time(statistics.median(data['data'])) if len(data['data']) > 0 else 'N/A'))
-        f.write('\t\t\t\t\t</tr>\n')
+    def _needs(self, fields: Optional[dict[str, Any]]) -> set[str]:
+        needs = set()
 
-    f.write('\t\t\t\t</tbody>\n')
-    f.write('\t\t\t</table>\n')
+        if self._versions is not None:
+            needs.add('version')
 
+        if fields is None:
+            if self._routes is not None:
+                needs.add('route')
 
-def html_output_table(headers: list[str], rows: list[list[Any]]):
-    f.write('\t\t\t<table class="table table-striped">\n')
-    f.write('\t\t\t\t<thead>\n')
-    f.write('\t\t\t\t\t<tr>\n')
+            if self._seeds is not None:
+                needs.add('step_seed')
 
-    for header in headers:
-        f.write('\t\t\t\t\t\t<th>{}</th>\n'.format(header))
+            if self._since is not None or self._until is not None:
+                needs.add('timestamp')
 
-    f.write('\t\t\t\t\t</tr>\n')
-    f.write('\t\t\t\t</thead>\n')
-    f.write('\t\t\t\t<tbody>\n')
+        return needs
 
-    for row in rows:
-        f.write('\t\t\t\t\t<tr>\n')
+    def _match(self, fields: dict[str, Any], names: Iterable[str] = ('route', 'step_seed', 'timestamp', 'version')) -> bool:
+        """Returns whether the fields pass the filters on the given field names, failing any filter whose field is missing."""
 
-        for index, header in enumerate(headers):
-            f.write('\t\t\t\t\t\t<td>{}</td>'.format(row[index]))
+        for name in names:
+            value = fields.get(name)
 
-        f.write('\t\t\t\t\t</tr>\n')
+            if name == 'route' and self._routes is not None and value not in self._routes:
+                return False
+            elif name == 'step_seed' and self._seeds is not None and (value is None or not self._seeds[0] <= value <= self._seeds[1]):
+                return False
+            elif name == 'timestamp' and (self._since is not None or self._until is not None):
+                if value is None or (self._since is not None and value < self._since) or (self._until is not None and value >= self._until):
+                    return False
+            elif name == 'version' and self._versions is not None and value not in self._versions:
+                return False
 
-    f.write('\t\t\t\t</tbody>\n')
-    f.write('\t\t\t</table>\n')
+        return True
 
+    def match_name(self, filename: str) -> Optional[bool]:
+        """Returns whether to keep a log from its name alone, or None if that takes reading the log."""
 
-def html_output_battle(f: TextIO, key: str, battle_data: dict[tuple[str, str, str], Any], agility_battle_data: dict[tuple[str, str, str], Any]):
-    first_data = list(battle_data.values())[0]
+        fields = parse_log_filename(filename)
 
-    if 'strat' in first_data and first_data['strat']:
-        f.write('\t\t\t<h2>Battle Data for {} using &quot;{}&quot; Strat</h2>\n'.format(describe_formation(first_data['formation']), first_data['strat']))
-    else:
-        f.write('\t\t\t<h2>Battle Data for {}</h2>\n'.format(describe_formation(first_data['formation'])))
+        if fields is not None and not self._match(fields, ['route', 'step_seed', 'timestamp']):
+            return False
+        elif self._needs(fields):
+            return None
+        else:
+            return True
 
-    f.write('\t\t\t<h3>Time Graph</h3>\n')
-    f.write('\t\t\t<p><img src="img/{}.png"></p>'.format(key))
+    def select(self, filenames: list[str]) -> list[str]:
+        """Returns the files that may hold logs to keep, without opening any of them."""
 
-    #
-    # Battle Type Statistics
-    #
+        return [x for x in filenames if self.match_name(x) is not False]
 
-    f.write('\t\t\t<h3>Battle Type Statistics</h3>\n')
-    battle_type_data: dict[str, dict[str, Any]] = {}
+    def filter_buffers(self, name: str, buffers: Iterable[Union[bytes, mmap.mmap]]) -> Optional[Iterable[Union[bytes, mmap.mmap]]]:
+        """Returns the contents of a log to parse if it is kept, or None if not, having read only its header."""
 
-    for (battle_type, _, _), data in sorted(battle_data.items()):
-        if battle_type not in battle_type_data:
-            battle_type_data[battle_type] = copy.deepcopy(data)
-        else:
-            battle_type_data[battle_type]['count'] += data['count']
-            battle_type_data[battle_type]['data'].extend(data['data'])
+        keep = self.match_name(name)
 
-            if 'success' in data:
-                if 'success' not in battle_type_data[battle_type]:
-                    battle_type_data[battle_type]['success'] = 0
-                battle_type_data[battle_type]['success'] += data['success']
+        if keep is not None:
+            return buffers if keep else None
 
-    headers = ['Battle Type', 'Battles', 'Successes', 'Deaths', 'Best Time', 'Worst Time', 'Median Time']
-    rows: list[list[Any]] = []
+        fields = parse_log_filename(name) or {}
+        needs = self._needs(fields or None)
+        iterator = iter(buffers)
+        head = next(iterator, b'')
+        header = self.read_header(head, needs)
+        names = ['route', 'step_seed', 'timestamp', 'version']
 
-    for battle_type, data in battle_type_data.items():
-        if len(data['data']) > 0:
-            minimum = format_time(min(data['data']))
-            maximum = format_time(max(data['data']))
-            median = format_time(statistics.median(data['data']))
-        else:
-            minimum = 'N/A'
-            maximum = 'N/A'
-            median = 'N/A'
+        # A start time that could not be read is unknown rather than wrong, so
+        # the one in the name is used instead, or the log is kept regardless
+        # of the dates given.
+        if 'timestamp' in header and header['timestamp'] is None:
+            del header['timestamp']
 
-        rows.append([
-            battle_type,
-            data['count'],
-            data['success'] if 'success' in data else 'N/A',
-            data['count'] - len(data['data']),
-            minimum,
-            maximum,
-            median,
-        ])
+            if 'timestamp' not in fields:
+                names.remove('timestamp')
 
-    html_output_table(headers, rows)
+        fields.update(header)
 
-    #
-    # Relative Speed Statistics
-    #
+        return itertools.chain([head], iterator) if self._match(fields, names) else None
 
-    f.write('\t\t\t<h3>Relative Speed Statistics</h3>\n')
-    battle_type_data = {}
+    @staticmethod
+    def read_header(data: Union[bytes, mmap.mmap], needs: set[str]) -> dict[str, Any]:
+        """Returns the needed fields from the lines at the start of a log, stopping at the first split.
 
-    for (battle_type, enemy_agility_raw, party_agility_raw), data in sorted(agility_battle_data.items()):
-        enemy_agility = [int(x) for x in enemy_agility_raw.split()]
-        party_names: list[str] = []
-        party_agility: list[Optional[int]] = []
-        anchor_agility = None
+        The timestamp is None if the first line's could not be read.
+        """
 
-        for slot in party_agility_raw.split('/'):
-            slot = slot.strip()
+        parser = Log('', parse=False)
+        header: dict[str, Any] = {}
+        start = 0
 
-            if slot.endswith('empty'):
-                party_names.append(slot)
-                party_agility.append(None)
-            else:
-                tokens = slot.split(':')
+        while start < len(data) and not needs <= header.keys():
+            end = data.find(b'\n', start) + 1 or len(data)
+            line_type, fields = parser._match_line(data[start:end].decode('utf-8', 'replace').strip())
+            start = end
 
-                if tokens[0].endswith('Cecil'):
-                    anchor_agility = int(tokens[1])
+            if fields is None:
+                continue
+            elif line_type == 'split':
+                break
 
-                party_names.append(tokens[0])
-                party_agility.append(int(tokens[1]))
+            if 'timestamp' not in header:
+                try:
+                    header['timestamp'] = datetime.datetime.strptime(fields['timestamp'], '%Y-%m-%d %H:%M:%S%z').astimezone(datetime.timezone.utc).replace(tzinfo=None)
+                except ValueError:
+                    header['timestamp'] = None
 
-        if anchor_agility is None:
-            for slot in [2, 0, 4, 1, 3]:
-                if not party_names[slot].endswith('empty'):
-                    anchor_agility = party_agility[slot]
-                    break
+            if line_type == 'version' or line_type == 'route':
+                header[line_type] = fields[line_type]
+            elif line_type == 'step_seed':
+                header['step_seed'] = int(fields['seed'])
 
-        assert(anchor_agility is not None)
+        return header
 
-        for index in range(len(enemy_agility)):
-            enemy_agility[index] = max(1, anchor_agility * 5 // enemy_agility[index])
 
-        for index in range(len(party_agility)):
-            agility = party_agility[index]
+class LogUnpickler(pickle.Unpickler):
+    """Loads cached logs whether the analyzer that cached them was run as a script or imported as a module."""
 
-            if agility is not None:
-                party_agility[index] = max(1, anchor_agility * 5 // agility)
+    def find_class(self, module: str, name: str):
+        if module in ('__main__', 'analyzer') and isinstance(globals().get(name), type):
+            return globals()[name]
 
-        key = '{}-{}-{}'.format(battle_type, '-'.join([str(x) for x in enemy_agility]), '-'.join([str(x) for x in party_agility]))
+        return super().find_class(module, name)
 
-        if key not in battle_type_data:
-            battle_type_data[key] = data
-            battle_type_data[key]['battle_type'] = battle_type
-            battle_type_data[key]['enemy_rs'] = ' '.join([str(x) for x in enemy_agility])
 
-            party_agility_tokens: list[str] = []
+class LogCache(object):
+    def __init__(self, directory: str):
+        self._filename = os.path.join(directory, 'logs-v{}.pickle'.format(PARSER_VERSION))
+        self._directory = directory
+        self._entries: dict[str, tuple[int, int, list[tuple[str, dict[str, Any], str]]]] = {}
+        self._dirty = False
 
-            for index, name in enumerate(party_names):
-                if name.endswith('empty'):
-                    party_agility_tokens.append(name)
-                else:
-                    party_agility_tokens.append(':'.join([name, str(party_agility[index])]))
+        if os.path.exists(self._filename):
+            try:
+                with open(self._filename, 'rb') as f:
+                    self._entries = LogUnpickler(f).load()
+            except (OSError, EOFError, AttributeError, pickle.UnpicklingError):
+                print('WARNING: Ignoring unreadable log cache {}'.format(self._filename))
 
-            battle_type_data[key]['party_rs'] = ' / '.join(party_agility_tokens)
-        else:
-            battle_type_data[key]['count'] += data['count']
-            battle_type_data[key]['data'].extend(data['data'])
+    def get(self, filename: str, actions: bool = False) -> Optional[list[tuple[str, Optional[Log], Optional[str], str]]]:
+        """Returns the cached results for a file, if they are current and, when actions are wanted, include them."""
 
-            if 'success' in data:
-                if 'success' not in battle_type_data[battle_type]:
-                    battle_type_data[battle_type]['success'] = 0
-                battle_type_data[battle_type]['success'] += data['success']
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            return None
 
-    headers = ['Battle Type', 'Enemy Speed', 'Party Speed', 'Battles', 'Successes', 'Deaths', 'Best Time', 'Worst Time', 'Median Time']
-    rows = []
+        entry = self._entries.get(os.path.abspath(filename))
 
-    for key, data in sorted(battle_type_data.items()):
-        if len(data['data']) > 0:
-            minimum = format_time(min(data['data']))
-            maximum = format_time(max(data['data']))
-            median = format_time(statistics.median(data['data']))
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns and not (actions and any(state['_actions'] is None for _, state, _ in entry[2])):
+            return [(name, Log.from_state(state), None, output) for name, state, output in entry[2]]
         else:
-            minimum = 'N/A'
-            maximum = 'N/A'
-            median = 'N/A'
+            return None
+
+    def put(self, filename: str, results: list[tuple[str, Optional[Log], Optional[str], str]]):
+        stat = os.stat(filename)
+        self._entries[os.path.abspath(filename)] = (stat.st_size, stat.st_mtime_ns, [(name, log.state, output) for name, log, _, output in results if log is not None])
+        self._dirty = True
+
+    def save(self):
+        """Writes the cache, without the entries of files that no longer exist.
+
+        The cache is written to a temporary file that then replaces it, so an
+        interrupted run leaves the previous cache as it was.
+        """
+
+        for filename in [filename for filename in self._entries if not os.path.exists(filename)]:
+            del self._entries[filename]
+            self._dirty = True
+
+        if not self._dirty:
+            return
+
+        os.makedirs(self._directory, exist_ok=True)
+
+        for name in os.listdir(self._directory):
+            if re.fullmatch(r'logs-v[0-9]+\.pickle', name) and name != os.path.basename(self._filename):
+                os.remove(os.path.join(self._directory, name))
+
+        with open(self._filename + '.tmp', 'wb') as f:
+            pickle.dump(self._entries, f, pickle.HIGHEST_PROTOCOL)
+
+        os.replace(self._filename + '.tmp', self._filename)
+        self._dirty = False
+
+
+class LogDatabase(object):
+    """Stores parsed logs in SQLite, with a table each for runs, splits, battles and battle actions.
+
+    As with LogCache, a file is only parsed again when its size or
+    modification time changes, or when the parser has changed since it was
+    stored. Files are parsed with their actions, which are stored in the
+    actions table but not rebuilt by get_logs.
+    """
+
+    TABLES = ['sources', 'runs', 'splits', 'battles', 'actions']
+    SCHEMA = [
+        'CREATE TABLE sources (id INTEGER PRIMARY KEY, filename TEXT NOT NULL UNIQUE, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, parser_version INTEGER NOT NULL)',
+        'CREATE TABLE runs (id INTEGER PRIMARY KEY, source_id INTEGER NOT NULL REFERENCES sources (id) ON DELETE CASCADE, filename TEXT NOT NULL, version TEXT, route TEXT, step_seed INTEGER, rng_seed INTEGER, success INTEGER NOT NULL, frames INTEGER, last_frame INTEGER NOT NULL, '
+        'reset_for_time INTEGER NOT NULL, reset_for_chocobo INTEGER NOT NULL, reset_for_fireclaw INTEGER NOT NULL, reset_for_shield INTEGER NOT NULL)',
+        'CREATE TABLE splits (run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE, position INTEGER NOT NULL, name TEXT NOT NULL, current INTEGER NOT NULL, total INTEGER NOT NULL)',
+        'CREATE TABLE battles (id INTEGER PRIMARY KEY, run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE, position INTEGER NOT NULL, formation INTEGER NOT NULL, type TEXT NOT NULL, strat TEXT NOT NULL, scripted INTEGER NOT NULL, '
+        'party_level INTEGER, enemy_level INTEGER, enemy_agility TEXT, party_formation TEXT, party_agility TEXT, frames INTEGER NOT NULL, dropped_gp INTEGER NOT NULL, result TEXT NOT NULL, success INTEGER)',
+        'CREATE TABLE actions (battle_id INTEGER NOT NULL REFERENCES battles (id) ON DELETE CASCADE, position INTEGER NOT NULL, frame INTEGER NOT NULL, critical INTEGER NOT NULL, actor TEXT NOT NULL, action TEXT NOT NULL, target TEXT, result TEXT)',
+        'CREATE INDEX runs_source_id ON runs (source_id)',
+        'CREATE INDEX runs_route ON runs (route)',
+        'CREATE INDEX runs_step_seed ON runs (step_seed)',
+        'CREATE INDEX runs_version ON runs (version)',
+        'CREATE INDEX splits_run_id ON splits (run_id, position)',
+        'CREATE INDEX splits_name ON splits (name)',
+        'CREATE INDEX battles_run_id ON battles (run_id, position)',
+        'CREATE INDEX battles_formation ON battles (formation, strat)',
+        'CREATE INDEX battles_strat ON battles (strat)',
+        'CREATE INDEX actions_battle_id ON actions (battle_id, position)',
+    ]
+
+    def __init__(self, filename: str):
+        self._filename = filename
+        self._connection = sqlite3.connect(filename)
+        self._connection.execute('PRAGMA foreign_keys = ON')
+
+        version = self._connection.execute('PRAGMA user_version').fetchone()[0]
+
+        if version != DATABASE_VERSION:
+            tables = [row[0] for row in self._connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+
+            if tables:
+                print('WARNING: Rebuilding log database {} from another version'.format(filename))
+
+            with self._connection:
+                for table in reversed(self.TABLES):
+                    self._connection.execute('DROP TABLE IF EXISTS {}'.format(table))
+
+                for statement in self.SCHEMA:
+                    self._connection.execute(statement)
+
+                self._connection.execute('PRAGMA user_version = {}'.format(DATABASE_VERSION))
+
+    def close(self):
+        self._connection.close()
+
+    def update(self, filenames: list[str], jobs: int = 1, profiler: Optional['Profiler'] = None) -> int:
+        """Parses and stores the files that are new or have changed, returning how many there were.
+
+        Everything is stored in a single transaction, so an interrupted update
+        leaves the database as it was.
+        """
+
+        stored = {row[0]: tuple(row[1:]) for row in self._connection.execute('SELECT filename, size, mtime_ns, parser_version FROM sources')}
+        stale: list[tuple[str, Optional[os.stat_result]]] = []
+
+        for filename in filenames:
+            try:
+                stat: Optional[os.stat_result] = os.stat(filename)
+            except OSError:
+                stat = None
+
+            if stat is None or stored.get(os.path.abspath(filename)) != (stat.st_size, stat.st_mtime_ns, PARSER_VERSION):
+                stale.append((filename, stat))
+
+        with self._connection:
+            for (filename, stat), results in zip(stale, parse_logs([filename for filename, _ in stale], jobs, profiler, actions=True)):
+                logs = list(collect_logs(results))
+                self._connection.execute('DELETE FROM sources WHERE filename = ?', (os.path.abspath(filename),))
+
+                if stat is not None and all(log is not None for _, log, _, _ in results):
+                    self._put(os.path.abspath(filename), stat, logs)
+
+        return len(stale)
+
+    def _put(self, filename: str, stat: os.stat_result, logs: list[Log]):
+        cursor = self._connection.cursor()
+        source_id = cursor.execute('INSERT INTO sources (filename, size, mtime_ns, parser_version) VALUES (?, ?, ?, ?)', (filename, stat.st_size, stat.st_mtime_ns, PARSER_VERSION)).lastrowid
+        splits: list[tuple[Any, ...]] = []
+        battles: list[tuple[Any, ...]] = []
+        run_ids: list[int] = []
+
+        for log in logs:
+            state = log.state
+            run_id = cursor.execute('INSERT INTO runs (source_id, filename, version, route, step_seed, rng_seed, success, frames, last_frame, reset_for_time, reset_for_chocobo, reset_for_fireclaw, reset_for_shield) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', (
+                source_id, state['_filename'], state['_version'], state['_route'], state['_step_seed'], state['_rng_seed'], state['_success'], state['_frames'], state['_last_frame'],
+                state['_reset_for_time'], state['_reset_for_chocobo'], state['_reset_for_fireclaw'], state['_reset_for_shield'],
+            )).lastrowid
+            run_ids.append(run_id)
+
+            for position, (name, split) in enumerate(log.splits.items()):
+                splits.append((run_id, position, name, split['current'], split['total']))
+
+            for position, battle in enumerate(log.battles):
+                battles.append((
+                    run_id, position, battle['formation'], battle['type'], battle['strat'], battle['scripted'], battle['party_level'], battle['enemy_level'],
+                    ' '.join(map(str, battle['enemy_agility'])) if 'enemy_agility' in battle else None, battle.get('party_formation'), battle.get('party_agility'),
+                    battle['frames'], battle['dropped_gp'], battle['result'], battle.get('success'),
+                ))
+
+        cursor.executemany('INSERT INTO splits (run_id, position, name, current, total) VALUES (?, ?, ?, ?, ?)', splits)
+        cursor.executemany('INSERT INTO battles (run_id, position, formation, type, strat, scripted, party_level, enemy_level, enemy_agility, party_formation, party_agility, frames, dropped_gp, result, success) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', battles)
+
+        actions: list[tuple[Any, ...]] = []
+
+        for log, run_id in zip(logs, run_ids):
+            if log.actions is None:
+                continue
+
+            battle_ids = [row[0] for row in cursor.execute('SELECT id FROM battles WHERE run_id = ? ORDER BY position', (run_id,))]
+            positions = [0] * len(battle_ids)
+
+            for battle, frame, critical, actor, action, target, result in log.actions.get_rows():
+                if battle < len(battle_ids):
+                    actions.append((battle_ids[battle], positions[battle], frame, critical, actor, action, target, result))
+                    positions[battle] += 1
+
+        cursor.executemany('INSERT INTO actions (battle_id, position, frame, critical, actor, action, target, result) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', actions)
+
+    def get_logs(self, where: str = '', parameters: Iterable[Any] = ()) -> list[Log]:
+        """Rebuilds the stored logs, ordered by filename, optionally only those whose row in runs matches the condition."""
+
+        condition = ' WHERE {}'.format(where) if where else ''
+        parameters = tuple(parameters)
+        logs: dict[int, Log] = {}
+
+        runs = self._connection.execute('SELECT id, filename, version, route, step_seed, rng_seed, success, frames, last_frame, reset_for_time, reset_for_chocobo, reset_for_fireclaw, reset_for_shield FROM runs{} ORDER BY (SELECT filename FROM sources WHERE id = source_id), id'.format(condition), parameters)
+
+        for run_id, filename, version, route, step_seed, rng_seed, success, frames, last_frame, *resets in runs:
+            state = Log(filename, parse=False).state
+            state.update({
+                '_version': version,
+                '_route': route,
+                '_step_seed': step_seed,
+                '_rng_seed': rng_seed,
+                '_success': bool(success),
+                '_frames': frames,
+                '_last_frame': last_frame,
+                '_reset_for_time': bool(resets[0]),
+                '_reset_for_chocobo': bool(resets[1]),
+                '_reset_for_fireclaw': bool(resets[2]),
+                '_reset_for_shield': bool(resets[3]),
+            })
+            logs[run_id] = Log.from_state(state)
+
+        for run_id, name, current, total in self._connection.execute('SELECT run_id, name, current, total FROM splits WHERE run_id IN (SELECT id FROM runs{}) ORDER BY run_id, position'.format(condition), parameters):
+            logs[run_id].splits[intern_value(name)] = Split(current=current, total=total)
+
+        battles = self._connection.execute('SELECT run_id, formation, type, strat, scripted, party_level, enemy_level, enemy_agility, party_formation, party_agility, frames, dropped_gp, result, success FROM battles WHERE run_id IN (SELECT id FROM runs{}) ORDER BY run_id, position'.format(condition), parameters)
+
+        for run_id, formation, battle_type, strat, scripted, party_level, enemy_level, enemy_agility, party_formation, party_agility, frames, dropped_gp, result, success in battles:
+            battle = {'formation': formation, 'type': battle_type, 'strat': strat, 'scripted': bool(scripted), 'party_level': party_level, 'enemy_level': enemy_level}
+
+            if enemy_agility is not None:
+                battle['enemy_agility'] = list(map(int, enemy_agility.split()))
+
+            if party_formation is not None:
+                battle['party_formation'] = party_formation
+
+            if party_agility is not None:
+                battle['party_agility'] = party_agility
+
+            if success:
+                battle['success'] = True
+
+            battle.update({'frames': frames, 'dropped_gp': dropped_gp, 'result': result})
+            logs[run_id].battles.append(Battle(**battle))
+
+        share_values(logs.values(), {})
+        return list(logs.values())
+
+    def query(self, sql: str, parameters: Iterable[Any] = ()) -> list[tuple[Any, ...]]:
+        return self._connection.execute(sql, tuple(parameters)).fetchall()
+
+
+class Categories(object):
+    def __init__(self):
+        self._codes: dict[Any, int] = {}
+        self._values: list[Any] = []
+
+    def __len__(self):
+        return len(self._values)
+
+    @property
+    def values(self):
+        return self._values
+
+    def get(self, value: Any) -> Optional[int]:
+        return self._codes.get(value)
+
+    def code(self, value: Any) -> int:
+        code = self._codes.get(value)
+
+        if code is None:
+            code = self._codes[value] = len(self._values)
+            self._values.append(value)
+
+        return code
+
+
+class BattleTable(object):
+    """Stores every battle of a set of logs in NumPy columns.
+
+    Numeric fields are kept as integer arrays (with -1 standing in for a
+    missing level), and string fields as integer codes into a Categories
+    instance. Battles appear in log order, then in the order they were fought.
+    """
+
+    RESULT_VICTORY = 0
+    RESULT_STALEMATE = 1
+    RESULT_PERISHED = 2
+    RESULT_OTHER = 3
+
+    CATEGORICAL_COLUMNS = ['strat', 'type', 'enemy_agility', 'party_formation', 'party_agility']
+    NUMERIC_COLUMNS = ['log', 'formation', 'frames', 'party_level', 'enemy_level', 'dropped_gp', 'result', 'success', 'has_success']
+
+    def __init__(self, logs: list[Log]):
+        self._categories = {name: Categories() for name in self.CATEGORICAL_COLUMNS}
+        self._columns = self._get_columns(logs, 0)
+
+    def _get_columns(self, logs: list[Log], start: int):
+        columns: dict[str, list[int]] = {name: [] for name in self.NUMERIC_COLUMNS + self.CATEGORICAL_COLUMNS}
+
+        for index, log in enumerate(logs, start):
+            for battle in log.battles:
+                columns['log'].append(index)
+                columns['formation'].append(battle['formation'])
+                columns['frames'].append(battle['frames'])
+                columns['party_level'].append(-1 if battle['party_level'] is None else battle['party_level'])
+                columns['enemy_level'].append(-1 if battle['enemy_level'] is None else battle['enemy_level'])
+                columns['dropped_gp'].append(battle['dropped_gp'])
+                columns['result'].append(self._get_result_code(battle['result']))
+                columns['success'].append(1 if battle.get('success') else 0)
+                columns['has_success'].append(1 if 'success' in battle else 0)
+                columns['strat'].append(self._categories['strat'].code(battle['strat']))
+                columns['type'].append(self._categories['type'].code(battle['type']))
+                columns['enemy_agility'].append(self._categories['enemy_agility'].code(' '.join(map(str, battle['enemy_agility'])) if 'enemy_agility' in battle else None))
+                columns['party_formation'].append(self._categories['party_formation'].code(battle.get('party_formation')))
+                columns['party_agility'].append(self._categories['party_agility'].code(battle.get('party_agility')))
+
+        return {name: numpy.array(values, dtype=numpy.int32) for name, values in columns.items()}
+
+    def __len__(self):
+        return len(self._columns['frames'])
+
+    def splice(self, start: int, stop: int, logs: list[Log]):
+        """Replaces the rows of the logs from start to stop with the rows of the given logs, as slice assignment would.
+
+        Only the battles of the given logs are read; the other rows are copied
+        as they are, with the log indices after them shifted.
+        """
+
+        first, last = numpy.searchsorted(self._columns['log'], [start, stop])
+        columns = self._get_columns(logs, start)
+
+        for name, column in self._columns.items():
+            after = column[last:] + (len(logs) - (stop - start)) if name == 'log' else column[last:]
+            self._columns[name] = numpy.concatenate([column[:first], columns[name], after]).astype(numpy.int32, copy=False)
+
+    @staticmethod
+    def _get_result_code(result: str):
+        if result.startswith('Victory'):
+            return BattleTable.RESULT_VICTORY
+        elif result.startswith('Stalemate'):
+            return BattleTable.RESULT_STALEMATE
+        elif result.startswith('Perished'):
+            return BattleTable.RESULT_PERISHED
+        else:
+            return BattleTable.RESULT_OTHER
+
+    @property
+    def finished(self):
+        return self._columns['result'] != BattleTable.RESULT_OTHER
+
+    @property
+    def victorious(self):
+        return (self._columns['result'] == BattleTable.RESULT_VICTORY) | (self._columns['result'] == BattleTable.RESULT_STALEMATE)
+
+    def column(self, name: str):
+        return self._columns[name]
+
+    def decode(self, name: str, code: int):
+        if name in self._categories:
+            return self._categories[name].values[code]
+        else:
+            return int(code)
+
+    def group_by(self, columns: list[str], mask: Optional[numpy.ndarray] = None):
+        """Groups the selected rows by the given columns.
+
+        Returns the selected row indices, the decoded key of each group and the
+        group index of each selected row. Groups are numbered in the order in
+        which their first row appears.
+        """
+
+        rows = numpy.arange(len(self)) if mask is None else numpy.flatnonzero(mask)
+
+        if len(rows) == 0:
+            return rows, [], numpy.zeros(0, dtype=numpy.intp)
+
+        keys = numpy.stack([self._columns[name][rows] for name in columns], axis=1)
+        unique, first, inverse = numpy.unique(keys, axis=0, return_index=True, return_inverse=True)
+
+        order = numpy.argsort(first, kind='stable')
+        rank = numpy.empty_like(order)
+        rank[order] = numpy.arange(len(order))
+
+        decoded = [tuple(self.decode(name, code) for name, code in zip(columns, key)) for key in unique[order]]
+
+        return rows, decoded, rank[inverse.ravel()]
+
+    def summarize(self, columns: list[str], mask: Optional[numpy.ndarray] = None, frames: bool = False):
+        """Computes battle statistics for each group of finished battles.
+
+        Only victories and stalemates contribute to the time statistics, which
+        are None for groups without either. With frames, each group also holds
+        the frame counts of those battles as a list, in battle order.
+        """
+
+        finished = self.finished if mask is None else (mask & self.finished)
+        rows, keys, groups = self.group_by(columns, finished)
+        count = len(keys)
+
+        battles = numpy.bincount(groups, minlength=count)
+        successes = numpy.bincount(groups, weights=self._columns['success'][rows], minlength=count).astype(int)
+        has_success = numpy.bincount(groups, weights=self._columns['has_success'][rows], minlength=count) > 0
+
+        victorious = self.victorious[rows]
+        victory_groups = groups[victorious]
+        victory_frames = self._columns['frames'][rows][victorious]
+        victories = numpy.bincount(victory_groups, minlength=count)
+
+        order = numpy.lexsort((victory_frames, victory_groups))
+        sorted_frames = victory_frames[order]
+        starts = numpy.cumsum(victories) - victories
+
+        if frames:
+            battle_frames = victory_frames[numpy.argsort(victory_groups, kind='stable')].tolist()
+
+        results = []
+
+        for index, key in enumerate(keys):
+            result: dict[str, Any] = {
+                'key': key,
+                'count': int(battles[index]),
+                'victories': int(victories[index]),
+                'success': int(successes[index]) if has_success[index] else None,
+                'minimum': None,
+                'maximum': None,
+                'median': None,
+            }
+
+            start = starts[index]
+            end = start + victories[index]
+
+            if victories[index] > 0:
+                result['minimum'] = int(sorted_frames[start])
+                result['maximum'] = int(sorted_frames[end - 1])
+                result['median'] = (int(sorted_frames[start + (victories[index] - 1) // 2]) + int(sorted_frames[start + victories[index] // 2])) / 2
+
+            if frames:
+                result['frames'] = battle_frames[start:end]
+
+            results.append(result)
+
+        return results
+
+
+class ActionTable(object):
+    """Stores battle actions in compact integer columns.
+
+    Each action is the battle it was taken in, its frame counted from the
+    start of that battle, whether it was critical, and its actor, action,
+    targets and results as codes into Categories, so that each distinct string
+    is kept once. A Log recording its actions appends them to its own table,
+    numbering battles within the log. from_logs combines the tables of a set of
+    logs, numbering battles as the rows of their BattleTable, and adds the
+    formation and strat of each battle for per-formation queries.
+    """
+
+    NUMERIC_COLUMNS = ['battle', 'frame', 'critical']
+    CATEGORICAL_COLUMNS = ['actor', 'action', 'target', 'result']
+
+    def __init__(self):
+        self._categories = {name: Categories() for name in self.CATEGORICAL_COLUMNS}
+        self._columns = {name: array.array('i') for name in self.NUMERIC_COLUMNS + self.CATEGORICAL_COLUMNS}
+
+    def __len__(self):
+        return len(self._columns['battle'])
+
+    @classmethod
+    def from_logs(cls, logs: list[Log]) -> 'ActionTable':
+        """Combines the actions of the logs, leaving out those of battles that were never finished."""
+
+        table = cls()
+        table._categories['strat'] = Categories()
+        parts: dict[str, list[numpy.ndarray]] = {name: [] for name in table._columns}
+        formations = numpy.array([x['formation'] for log in logs for x in log.battles], dtype=numpy.intc)
+        strats = numpy.array([table._categories['strat'].code(x['strat']) for log in logs for x in log.battles], dtype=numpy.intc)
+        offset = 0
+
+        for log in logs:
+            actions = log.actions
+
+            if actions is not None and len(actions) > 0:
+                battles = actions.column('battle')
+                rows = numpy.flatnonzero(battles < len(log.battles))
+                parts['battle'].append(battles[rows] + offset)
+
+                for name in ['frame', 'critical']:
+                    parts[name].append(actions.column(name)[rows])
+
+                for name in cls.CATEGORICAL_COLUMNS:
+                    codes = numpy.array([table._categories[name].code(x) for x in actions._categories[name].values], dtype=numpy.intc)
+                    parts[name].append(codes[actions.column(name)[rows]])
+
+            offset += len(log.battles)
+
+        for name, values in parts.items():
+            table._columns[name] = array.array('i', numpy.concatenate(values).astype(numpy.intc).tobytes() if values else b'')
+
+        battles = table.column('battle')
+        table._columns['formation'] = array.array('i', formations[battles].tobytes())
+        table._columns['strat'] = array.array('i', strats[battles].tobytes())
+
+        return table
+
+    def append(self, battle: int, frame: int, critical: bool, actor: str, action: str, target: Optional[str], result: Optional[str]):
+        columns = self._columns
+        columns['battle'].append(battle)
+        columns['frame'].append(frame)
+        columns['critical'].append(1 if critical else 0)
+        columns['actor'].append(self._categories['actor'].code(actor))
+        columns['action'].append(self._categories['action'].code(action))
+        columns['target'].append(self._categories['target'].code(target))
+        columns['result'].append(self._categories['result'].code(result))
+
+    def truncate(self, count: int):
+        for values in self._columns.values():
+            del values[count:]
+
+    def column(self, name: str) -> numpy.ndarray:
+        return numpy.frombuffer(self._columns[name], dtype=numpy.intc)
+
+    def decode(self, name: str, code: int):
+        if name in self._categories:
+            return self._categories[name].values[code]
+        else:
+            return int(code)
+
+    def get_rows(self) -> Iterator[tuple[int, int, bool, str, str, Optional[str], Optional[str]]]:
+        """Yields each action as (battle, frame, critical, actor, action, target, result)."""
+
+        values = {name: self._categories[name].values for name in self.CATEGORICAL_COLUMNS}
+        columns = self._columns
+
+        for battle, frame, critical, actor, action, target, result in zip(*[columns[name] for name in self.NUMERIC_COLUMNS + self.CATEGORICAL_COLUMNS]):
+            yield (battle, frame, bool(critical), values['actor'][actor], values['action'][action], values['target'][target], values['result'][result])
+
+    def select(self, formation: int, strat: Optional[str] = None) -> numpy.ndarray:
+        """Returns the rows of the actions in battles of a formation, and optionally of a strat, in the order they were taken."""
+
+        mask = self.column('formation') == formation
+
+        if strat is not None:
+            code = self._categories['strat'].get(strat)
+            mask &= self.column('strat') == (-1 if code is None else code)
+
+        return numpy.flatnonzero(mask)
+
+    def get_sequences(self, formation: int, strat: Optional[str] = None) -> list[tuple[int, list[tuple[int, str, str, Optional[str], Optional[str]]]]]:
+        """Returns the BattleTable row of each battle of a formation, with its actions as (frame, actor, action, target, result)."""
+
+        rows = self.select(formation, strat)
+        battles = self.column('battle')[rows].tolist()
+        decoded = [[self._categories[name].values[x] for x in self.column(name)[rows]] for name in self.CATEGORICAL_COLUMNS]
+        actions = list(zip(self.column('frame')[rows].tolist(), *decoded))
+        sequences: list[tuple[int, list[Any]]] = []
+
+        for battle, action in zip(battles, actions):
+            if not sequences or sequences[-1][0] != battle:
+                sequences.append((battle, []))
+
+            sequences[-1][1].append(action)
+
+        return sequences
+
+    def get_turn_frames(self, formation: int, strat: Optional[str] = None) -> dict[str, numpy.ndarray]:
+        """Returns, for each actor, the frames from the start of each battle of a formation to its first action there, and between its actions after that."""
+
+        rows = self.select(formation, strat)
+        battles = self.column('battle')[rows]
+        actors = self.column('actor')[rows]
+        frames = self.column('frame')[rows]
+
+        order = numpy.lexsort((rows, actors, battles))
+        battles, actors, frames = battles[order], actors[order], frames[order]
+
+        first = numpy.ones(len(rows), dtype=bool)
+        first[1:] = (battles[1:] != battles[:-1]) | (actors[1:] != actors[:-1])
+        gaps = frames - numpy.where(first, 0, numpy.concatenate(([0], frames[:-1])))
+
+        return {self.decode('actor', code): gaps[actors == code] for code in numpy.unique(actors)}
+
+
+class AgilityTable(object):
+    """Holds enemy and party agilities in fixed-width integer columns, to compute relative speeds.
+
+    Each row is a distinct pair of enemy and party agility strings, parsed
+    once. Enemies and party slots are padded with zeros to the widest row, an
+    empty slot being zero too. The anchor is Cecil, or else the first party
+    member in ANCHOR_SLOTS, and the relative speed of each combatant is then
+    five times the anchor's agility divided by its own, and at least 1.
+    """
+
+    def __init__(self, signatures: list[tuple[str, str]]):
+        enemies = [[int(x) for x in enemy_agility.split()] for enemy_agility, _ in signatures]
+        parties = {x: self._parse_party(x) for _, x in signatures}
+        self._names = [parties[x][0] for _, x in signatures]
+        party = [parties[x][1] for _, x in signatures]
+        anchors = [parties[x][2] for _, x in signatures]
+
+        self._enemy_counts = [len(x) for x in enemies]
+        self._columns = {
+            'enemy_agility': self._pad(enemies),
+            'party_agility': self._pad(party),
+            'anchor_slot': numpy.array(anchors, dtype=numpy.intc),
+        }
+        self._columns['anchor_agility'] = self._columns['party_agility'][numpy.arange(len(signatures)), self._columns['anchor_slot']]
+
+    def __len__(self):
+        return len(self._names)
+
+    @staticmethod
+    def _parse_party(party_agility: str) -> tuple[list[str], list[int], int]:
+        """Returns the name and agility of each party slot, and the slot of the anchor."""
+
+        names: list[str] = []
+        agilities: list[int] = []
+        anchor = None
+
+        for slot in party_agility.split('/'):
+            slot = slot.strip()
+
+            if slot.endswith('empty'):
+                names.append(slot)
+                agilities.append(0)
+            else:
+                name, _, agility = slot.partition(':')
+
+                if name.endswith('Cecil'):
+                    anchor = len(names)
+
+                names.append(name)
+                agilities.append(int(agility))
+
+        if anchor is None:
+            anchor = next((x for x in ANCHOR_SLOTS if x < len(names) and not names[x].endswith('empty')), None)
+
+        assert(anchor is not None)
+        return (names, agilities, anchor)
+
+    @staticmethod
+    def _pad(rows: list[list[int]]) -> numpy.ndarray:
+        padded = numpy.zeros((len(rows), max((len(x) for x in rows), default=0)), dtype=numpy.intc)
+
+        for index, row in enumerate(rows):
+            padded[index, :len(row)] = row
+
+        return padded
+
+    def column(self, name: str) -> numpy.ndarray:
+        return self._columns[name]
+
+    def get_speeds(self, name: str) -> numpy.ndarray:
+        """Returns the relative speeds of the enemies or of the party slots (by their agility column), with zeros for padding and empty slots."""
+
+        agility = self._columns[name]
+        anchor = self._columns['anchor_agility'][:, numpy.newaxis]
+        return numpy.where(agility > 0, numpy.maximum(1, anchor * 5 // numpy.maximum(agility, 1)), 0)
+
+    def get_relative_speeds(self) -> list[tuple[str, str, str]]:
+        """Returns the relative enemy and party speeds of each row, as the speeds joined by dashes (empty slots being None), and the party speeds with their names, written as the agility strings are."""
+
+        enemy_speeds = self.get_speeds('enemy_agility').tolist()
+        party_speeds = self.get_speeds('party_agility').tolist()
+        speeds: list[tuple[str, str, str]] = []
+
+        for count, enemies, names, party in zip(self._enemy_counts, enemy_speeds, self._names, party_speeds):
+            speeds.append((
+                '-'.join(str(x) for x in enemies[:count]),
+                '-'.join('None' if name.endswith('empty') else str(speed) for name, speed in zip(names, party)),
+                ' / '.join(name if name.endswith('empty') else '{}:{}'.format(name, speed) for name, speed in zip(names, party)),
+            ))
+
+        return speeds
+
+
+class QuantileSketch(object):
+    """Summarizes a stream of numbers for approximate quantile queries.
+
+    This is a KLL sketch: values are buffered in levels, and a full level is
+    sorted and every other value promoted to the next level with twice the
+    weight. With the default k of 200, the rank of any returned quantile is
+    within about 1% of the true rank (see "benchmark.py sketch"), regardless of
+    how many values were added, while at most a few hundred values are kept.
+    Until the first compaction the sketch holds every value and its answers are
+    exact. The count, minimum and maximum are always exact. Merging sketches
+    gives the same error bound as adding every value to a single sketch.
+    """
+
+    def __init__(self, k: int = 200):
+        self._k = k
+        self._levels: list[list[Union[int, float]]] = [[]]
+        self._count = 0
+        self._minimum: Optional[Union[int, float]] = None
+        self._maximum: Optional[Union[int, float]] = None
+        self._state = 1
+
+    def __len__(self):
+        return self._count
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> 'QuantileSketch':
+        sketch = cls.__new__(cls)
+        sketch.__dict__.update(state)
+        return sketch
+
+    @property
+    def state(self) -> dict[str, Any]:
+        return dict(self.__dict__)
+
+    @property
+    def exact(self):
+        return len(self._levels) == 1
+
+    @property
+    def minimum(self):
+        return self._minimum
+
+    @property
+    def maximum(self):
+        return self._maximum
+
+    def _capacity(self, level: int):
+        return max(2, int(math.ceil(self._k * (2 / 3) ** (len(self._levels) - level - 1))))
+
+    def _coin(self):
+        # A small deterministic generator keeps sketches cheap to store and
+        # makes reports reproducible.
+        self._state = (self._state * 1103515245 + 12345) & 0x7fffffff
+        return (self._state >> 16) & 1
+
+    def _compress(self):
+        while sum(len(x) for x in self._levels) >= sum(self._capacity(x) for x in range(len(self._levels))):
+            for level in range(len(self._levels)):
+                if len(self._levels[level]) >= self._capacity(level):
+                    if level + 1 == len(self._levels):
+                        self._levels.append([])
+
+                    items = sorted(self._levels[level])
+                    leftover = [items.pop()] if len(items) % 2 == 1 else []
+                    self._levels[level + 1].extend(items[self._coin()::2])
+                    self._levels[level] = leftover
+                    break
+
+    def add(self, value: Union[int, float]):
+        self._levels[0].append(value)
+        self._count += 1
+
+        if self._minimum is None or value < self._minimum:
+            self._minimum = value
+
+        if self._maximum is None or value > self._maximum:
+            self._maximum = value
+
+        if len(self._levels[0]) >= self._capacity(0):
+            self._compress()
+
+    append = add
+
+    def extend(self, values: Union['QuantileSketch', Iterable[Union[int, float]]]):
+        if not isinstance(values, QuantileSketch):
+            for value in values:
+                self.add(value)
+
+            return
+
+        if values._count == 0:
+            return
+
+        while len(self._levels) < len(values._levels):
+            self._levels.append([])
+
+        for level, items in enumerate(values._levels):
+            self._levels[level].extend(items)
+
+        self._count += values._count
+        self._minimum = values._minimum if self._minimum is None else min(self._minimum, values._minimum)  # type: ignore
+        self._maximum = values._maximum if self._maximum is None else max(self._maximum, values._maximum)  # type: ignore
+        self._compress()
+
+    def _weighted(self):
+        values = numpy.array([x for items in self._levels for x in items], dtype=float)
+        weights = numpy.concatenate([numpy.full(len(items), 1 << level, dtype=float) for level, items in enumerate(self._levels)])
+        order = numpy.argsort(values, kind='stable')
+
+        return values[order], numpy.cumsum(weights[order])
+
+    def quantile(self, q: float):
+        """Returns the first value whose cumulative weight exceeds q of the total.
+
+        For an exact sketch this is sorted(values)[int(len(values) * q)].
+        """
+
+        if self._count == 0:
+            return None
+
+        values, cumulative = self._weighted()
+        index = min(int(numpy.searchsorted(cumulative, q * cumulative[-1], side='right')), len(values) - 1)
+
+        return int(values[index]) if float(values[index]).is_integer() else float(values[index])
+
+    def median(self):
+        if self.exact:
+            return statistics.median(self._levels[0])
+        else:
+            return self.quantile(0.5)
+
+    def representative(self, count: int = 1000):
+        """Returns the values if exact, or otherwise evenly spaced quantiles standing in for them."""
+
+        if self.exact:
+            return sorted(self._levels[0])
+
+        values, cumulative = self._weighted()
+        ranks = (numpy.arange(count) + 0.5) / count * cumulative[-1]
+
+        return values[numpy.minimum(numpy.searchsorted(cumulative, ranks, side='right'), len(values) - 1)].tolist()
+
+
+class QuantileIndex(object):
+    """Holds the thresholds used to colour times relative to other runs.
+
+    Thresholds are kept per kind of time ('split', 'battle' or 'run') and key,
+    and can be updated one key at a time as new data arrives.
+    """
+
+    def __init__(self, state: Optional[dict[tuple[str, Any], dict[str, Any]]] = None):
+        self._thresholds = dict(state) if state else {}
+
+    @property
+    def state(self):
+        return dict(self._thresholds)
+
+    def get(self, kind: str, key: Any) -> Optional[dict[str, Any]]:
+        return self._thresholds.get((kind, key))
+
+    def update(self, kind: str, key: Any, values: Union[QuantileSketch, Iterable[Union[int, float]]]):
+        if isinstance(values, QuantileSketch):
+            if values.exact:
+                values = values.representative()
+            else:
+                self._thresholds[(kind, key)] = {
+                    'count': len(values),
+                    'minimum': values.minimum,
+                    'lower': values.quantile(0.3333),
+                    'median': values.median(),
+                    'upper': values.quantile(0.6667),
+                    'maximum': values.maximum,
+                }
+
+                return
+
+        values = sorted(values)
+        count = len(values)
+
+        if count == 0:
+            self._thresholds.pop((kind, key), None)
+            return
+
+        self._thresholds[(kind, key)] = {
+            'count': count,
+            'minimum': values[0],
+            'lower': values[int(count * 0.3333)],
+            'median': values[count // 2] if count % 2 == 1 else (values[count // 2 - 1] + values[count // 2]) / 2,
+            'upper': values[int(count * 0.6667)],
+            'maximum': values[-1],
+        }
+
+    def classify(self, kind: str, key: Any, value: Union[int, float]):
+        thresholds = self._thresholds[(kind, key)]
+
+        if value < thresholds['lower']:
+            return 'text-success'
+        elif value < thresholds['upper']:
+            return 'text-warning'
+        else:
+            return 'text-danger'
+
+
+class LogStatistics(object):
+    """Aggregates the battles, splits and seeds of a set of logs.
+
+    The battles are grouped once, by formation, strat, battle type, enemy
+    agility, party formation and party agility, using the columns of a
+    BattleTable. The coarser views used by the report are then merged from
+    these groups, which are far fewer than the battles themselves, except for
+    the battle summary, whose times the table computes directly.
+
+    The logs already hold their battles, so the table is only built for as
+    long as it takes to group and summarize them, unless it is asked for
+    through table, in which case it is kept (and spliced along with the logs).
+    """
+
+    GROUP_COLUMNS = ['formation', 'strat', 'type', 'enemy_agility', 'party_formation', 'party_agility']
+
+    def __init__(self, logs: list[Log]):
+        self._logs = logs
+        self._table: Optional[BattleTable] = None
+        self._groups: Optional[OrderedDict[tuple[Any, ...], dict[str, Any]]] = None
+        self._summary: Optional[list[dict[str, Any]]] = None
+        self._seeds: Optional[dict[str, dict[int, dict[str, Any]]]] = None
+        self._splits: dict[bool, dict[str, list[int]]] = {}
+        self._quantiles: Optional[QuantileIndex] = None
+        self._actions: Optional[ActionTable] = None
+        self._speeds: dict[tuple[str, str], tuple[str, str, str]] = {}
+
+    @property
+    def logs(self):
+        return self._logs
+
+    @property
+    def table(self):
+        """The battles of the logs as a BattleTable, which is kept once it has been asked for."""
+
+        if self._table is None:
+            self._table = BattleTable(self._logs)
+
+        return self._table
+
+    @property
+    def actions(self):
+        """The actions of the logs, whose battles are the rows of table. Only logs parsed with actions have any."""
+
+        if self._actions is None:
+            self._actions = ActionTable.from_logs(self._logs)
+
+        return self._actions
+
+    @property
+    def groups(self):
+        if self._groups is None:
+            self._summarize()
+
+        return self._groups
+
+    def _summarize(self):
+        table = self._table if self._table is not None else BattleTable(self._logs)
+        self._groups = OrderedDict()
+
+        for summary in table.summarize(self.GROUP_COLUMNS, frames=True):
+            key = summary['key']
+            self._groups[key] = {name: value for name, value in zip(self.GROUP_COLUMNS, key)}
+            self._groups[key].update({'count': summary['count'], 'victories': summary['victories'], 'success': summary['success'], 'data': summary['frames']})
+
+        self._summary = table.summarize(['formation', 'strat'])
+
+    @property
+    def formation_order(self):
+        order: dict[int, int] = {}
+
+        for formation, *_ in self.groups:
+            if formation not in order:
+                order[formation] = len(order)
+
+        return order
+
+    @property
+    def seeds(self):
+        if self._seeds is None:
+            self._seeds = {}
+
+            for log in self._logs:
+                self._add_seed(self._seeds, log)
+
+        return self._seeds
+
+    @property
+    def quantiles(self):
+        if self._quantiles is None:
+            self._quantiles = QuantileIndex()
+
+            for split, values in self.get_split_data(False).items():
+                self._quantiles.update('split', split, values)
+
+            for key, data in self.get_battle_data(False).items():
+                self._quantiles.update('battle', key, data['data'])
+
+            self._quantiles.update('run', None, [log.frames for log in self.logs if log.success])
+
+        return self._quantiles
+
+    @property
+    def sum_of_best(self):
+        splits: dict[str, int] = {}
+
+        for route in self.seeds.values():
+            for data in route.values():
+                for split, value in data['best_splits'].items():
+                    if split not in splits or value < splits[split]:
+                        splits[split] = value
+
+        return sum(splits.values())
+
+    def splice(self, start: int, stop: int, logs: list[Log]):
+        """Replaces the logs from start to stop with the given logs, as slice assignment would.
+
+        A battle table that was already built only reads the battles of the
+        new logs. The groups, seeds, splits and quantiles are computed again
+        from the table and the logs when they are next used.
+        """
+
+        self._logs[start:stop] = logs
+
+        if self._table is not None:
+            self._table.splice(start, stop, logs)
+
+        self._groups = None
+        self._summary = None
+        self._seeds = None
+        self._splits = {}
+        self._quantiles = None
+        self._actions = None
+
+    def aggregate(self):
+        """Computes the aggregates the report needs now, rather than when they are first used."""
+
+        self.groups
+        self.seeds
+        self.quantiles
+
+    def _new_data(self) -> Union[list[int], QuantileSketch]:
+        return []
+
+    def _add_seed(self, seeds: dict[str, dict[int, dict[str, Any]]], log: Log):
+        if log.route not in seeds:
+            seeds[log.route] = {}
+
+        if log.step_seed not in seeds[log.route]:
+            seeds[log.route][log.step_seed] = {'data': self._new_data(), 'best_splits': {}, 'battles': 0, 'back_attack_count': 0}
+
+        seed = seeds[log.route][log.step_seed]
+
+        if log.success:
+            seed['data'].append(log.frames)
+            seed['battles'] += log.random_battle_count
+            seed['back_attack_count'] += log.back_attack_count
+
+            for split in log.splits:
+                if split not in seed['best_splits'] or log.splits[split]['current'] < seed['best_splits'][split]:
+                    seed['best_splits'][split] = log.splits[split]['current']
+
+    def get_battle_summary(self):
+        """Summarizes the finished battles of each formation and strat."""
+
+        if self._summary is None:
+            self._summarize()
+
+        return [dict(x) for x in self._summary]  # type: ignore
+
+    def get_split_data(self, cumulative: bool = True):
+        if cumulative not in self._splits:
+            splits: dict[str, list[int]] = {}
+
+            for log in self._logs:
+                for split, data in log.splits.items():
+                    if split not in splits:
+                        splits[split] = []
+
+                    splits[split].append(data['total'] if cumulative else data['current'])
+
+            self._splits[cumulative] = splits
+
+        return self._splits[cumulative]
+
+    def get_battle_data(self, classified: bool = False, strat: bool = True, agility: bool = False, relative_speed: bool = False):
+        # A fresh structure is returned on every call, as some of the renderers
+        # modify the data they are given. Classified battles are grouped by
+        # battle type and either relative speeds, agilities or party formation.
+        # Relative speeds group on the speeds alone, whoever is in the party,
+        # and each group is shown with the names of its first agilities in
+        # order.
+        battles: OrderedDict[str, Any] = OrderedDict()
+        speeds = get_relative_speeds(((x['enemy_agility'], x['party_agility']) for x in self.groups.values()), self._speeds) if relative_speed else {}
+        labels: dict[tuple[str, tuple], tuple[Optional[str], Optional[str]]] = {}
+
+        for group in self.groups.values():
+            key = '{:03}'.format(group['formation'])
+
+            if strat and group['strat']:
+                key = '{}-{}'.format(key, group['strat'])
+
+            if classified:
+                if key not in battles:
+                    battles[key] = {}
+
+                if relative_speed:
+                    signature = (group['enemy_agility'], group['party_agility'])
+                    subkey = (group['type'],) + speeds[signature][:2]
+
+                    if (key, subkey) not in labels or [x or '' for x in signature] < [x or '' for x in labels[(key, subkey)]]:
+                        labels[(key, subkey)] = signature
+                else:
+                    subkey = (group['type'], group['enemy_agility'], group['party_agility'] if agility else group['party_formation'])
+
+                if subkey not in battles[key]:
+                    battles[key][subkey] = {'formation': group['formation'], 'strat': group['strat'] if strat else set([group['strat']]), 'count': 0, 'data': self._new_data() if strat or not group['strat'] else {}}
+
+                target = battles[key][subkey]
+            else:
+                if key not in battles:
+                    battles[key] = {'formation': group['formation'], 'strat': group['strat'] if strat else set([group['strat']]) if group['strat'] else set(), 'count': 0, 'data': self._new_data() if strat or not group['strat'] else {}}
+
+                target = battles[key]
+
+            target['count'] += group['count']
+
+            if group['success'] is not None:
+                target['success'] = target.get('success', 0) + group['success']
+
+            if strat or not group['strat']:
+                target['data'].extend(group['data'])
+            else:
+                target['strat'].add(group['strat'])
+                if group['strat'] not in target['data']:
+                    target['data'][group['strat']] = self._new_data()
+
+                target['data'][group['strat']].extend(group['data'])
+
+        for (key, subkey), signature in labels.items():
+            enemy_speed, _, party_speed = speeds[signature]
+            battles[key][subkey]['enemy_speed'] = enemy_speed.replace('-', ' ') if enemy_speed is not None else None
+            battles[key][subkey]['party_speed'] = party_speed
+
+        return battles
+
+
+class RunSummary(object):
+    """Keeps the fields of a log shown in the runs table, without its battles and splits."""
+
+    __slots__: tuple[str, ...] = ('version', 'route', 'step_seed', 'rng_seed', 'back_attack_count', 'random_battle_count', 'non_battle_frames', 'frames', 'last_frame', 'result', 'success')
+
+    def __init__(self, log: Log):
+        self.version = log.version
+        self.route = log.route
+        self.step_seed = log.step_seed
+        self.rng_seed = log.rng_seed
+        self.back_attack_count = log.back_attack_count
+        self.random_battle_count = log.random_battle_count
+        self.non_battle_frames = log.non_battle_frames
+        self.frames = log.frames
+        self.last_frame = log.last_frame
+        self.result = log.result
+        self.success = log.success
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> 'RunSummary':
+        run = cls.__new__(cls)
+
+        for name, value in state.items():
+            setattr(run, name, intern_value(value) if isinstance(value, str) else value)
+
+        return run
+
+    @property
+    def state(self) -> dict[str, Any]:
+        return {name: getattr(self, name) for cls in type(self).__mro__ for name in getattr(cls, '__slots__', ())}
+
+
+class RunRecord(RunSummary):
+    """Keeps a RunSummary along with the splits and battle times shown on the run's page."""
+
+    __slots__ = ('splits', 'battles')
+
+    def __init__(self, log: Log):
+        super().__init__(log)
+        self.splits = log.splits
+        self.battles = [Battle(formation=x['formation'], strat=x['strat'], frames=x['frames']) for x in log.battles]
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> 'RunRecord':
+        run = super().from_state(state)
+        assert(isinstance(run, RunRecord))
+        run.splits = {intern_value(name): Split(**x) for name, x in run.splits.items()}
+        run.battles = [Battle(**x) for x in run.battles]
+        return run
+
+    @property
+    def state(self) -> dict[str, Any]:
+        """The fields of the run, with its splits and battles as dicts so that they can be written as JSON."""
+
+        state = super().state
+        state['splits'] = {name: dict(x.items()) for name, x in self.splits.items()}
+        state['battles'] = [dict(x.items()) for x in self.battles]
+        return state
+
+
+class StreamingStatistics(LogStatistics):
+    """Aggregates logs one at a time, so that they need not be kept in memory.
+
+    Each log is folded into the same groups, splits and seeds as LogStatistics
+    would compute, except that the times are kept in QuantileSketch instances
+    rather than lists. Only a RunSummary is kept for each log, for the runs
+    table. Counts, rates, minimums, maximums, sums of best and run terciles are
+    exact; medians and the split and battle terciles are exact for fewer than
+    200 times and otherwise within about 1% of the true rank.
+
+    With pages, a RunRecord is kept instead, so that the run pages can be
+    written without the logs. Such instances can be saved to partial-aggregate
+    files and merged, in any grouping, into one for the whole set of logs.
+    """
+
+    def __init__(self, pages: bool = False):
+        super().__init__([])
+        self._groups = OrderedDict()
+        self._seeds = {}
+        self._splits = {True: {}, False: {}}
+        self._runs: list[RunSummary] = []
+        self._pages = pages
+
+    @classmethod
+    def load(cls, filename: str) -> 'StreamingStatistics':
+        with gzip.open(filename, 'rt', encoding='utf-8') as f:
+            state = json.load(f)
+
+        if not isinstance(state, dict) or state.get('version') != AGGREGATE_VERSION:
+            raise ValueError('not a partial aggregate of version {}'.format(AGGREGATE_VERSION))
+
+        log_statistics = cls(pages=True)
+
+        for key, count, victories, success, data in state['groups']:
+            log_statistics._groups[tuple(key)] = {name: value for name, value in zip(cls.GROUP_COLUMNS, key)}
+            log_statistics._groups[tuple(key)].update({'count': count, 'victories': victories, 'success': success, 'data': QuantileSketch.from_state(data)})
+
+        for cumulative, split, data in state['splits']:
+            log_statistics._splits[cumulative][split] = QuantileSketch.from_state(data)
+
+        for route, step_seed, data, best_splits, battles, back_attack_count in state['seeds']:
+            log_statistics._seeds.setdefault(route, {})[step_seed] = {'data': QuantileSketch.from_state(data), 'best_splits': best_splits, 'battles': battles, 'back_attack_count': back_attack_count}  # type: ignore
+
+        log_statistics._runs = [RunRecord.from_state(x) for x in state['runs']]
+
+        return log_statistics
+
+    def save(self, filename: str):
+        assert(self._pages and self._quantiles is None)
+
+        state = {
+            'version': AGGREGATE_VERSION,
+            'groups': [[list(key), x['count'], x['victories'], x['success'], x['data'].state] for key, x in self._groups.items()],  # type: ignore
+            'splits': [[cumulative, split, data.state] for cumulative, splits in self._splits.items() for split, data in splits.items()],
+            'seeds': [[route, step_seed, x['data'].state, x['best_splits'], x['battles'], x['back_attack_count']] for route, seeds in self._seeds.items() for step_seed, x in seeds.items()],  # type: ignore
+            'runs': [run.state for run in self._runs],
+        }
+
+        with gzip.open(filename + '.tmp', 'wt', encoding='utf-8') as f:
+            json.dump(state, f, separators=(',', ':'))
+
+        os.replace(filename + '.tmp', filename)
+
+    @property
+    def logs(self):
+        return self._runs
+
+    @property
+    def table(self):
+        raise AttributeError('StreamingStatistics has no battle table, as each battle is only folded into the groups when its log is added')
+
+    @property
+    def actions(self):
+        raise AttributeError('StreamingStatistics has no action table, as logs are aggregated without their actions')
+
+    def _new_data(self):
+        return QuantileSketch()
+
+    def add(self, log: Log):
+        assert(self._quantiles is None)
+
+        for battle in log.battles:
+            result = BattleTable._get_result_code(battle['result'])
+
+            if result == BattleTable.RESULT_OTHER:
+                continue
+
+            key = (battle['formation'], battle['strat'], battle['type'], ' '.join(map(str, battle['enemy_agility'])) if 'enemy_agility' in battle else None, battle.get('party_formation'), battle.get('party_agility'))
+
+            if key not in self._groups:
+                self._groups[key] = {name: value for name, value in zip(self.GROUP_COLUMNS, key)}
+                self._groups[key].update({'count': 0, 'victories': 0, 'success': None, 'data': QuantileSketch()})
+
+            group = self._groups[key]
+            group['count'] += 1
+
+            if 'success' in battle:
+                group['success'] = (group['success'] or 0) + (1 if battle['success'] else 0)
+
+            if result in (BattleTable.RESULT_VICTORY, BattleTable.RESULT_STALEMATE):
+                group['victories'] += 1
+                group['data'].add(battle['frames'])
+
+        for split, data in log.splits.items():
+            for cumulative, value in [(True, data['total']), (False, data['current'])]:
+                if split not in self._splits[cumulative]:
+                    self._splits[cumulative][split] = QuantileSketch()
+
+                self._splits[cumulative][split].add(value)
+
+        self._add_seed(self._seeds, log)  # type: ignore
+        self._runs.append(RunRecord(log) if self._pages else RunSummary(log))
+
+    def merge(self, other: 'StreamingStatistics'):
+        """Adds the aggregates of another instance, as if its logs were added after those already added."""
+
+        assert(self._quantiles is None)
+
+        for key, group in other._groups.items():  # type: ignore
+            if key not in self._groups:  # type: ignore
+                self._groups[key] = dict(group, count=0, victories=0, success=None, data=QuantileSketch())  # type: ignore
+
+            target = self._groups[key]  # type: ignore
+            target['count'] += group['count']
+            target['victories'] += group['victories']
+            target['data'].extend(group['data'])
+
+            if group['success'] is not None:
+                target['success'] = (target['success'] or 0) + group['success']
+
+        for cumulative, splits in other._splits.items():
+            for split, data in splits.items():
+                if split not in self._splits[cumulative]:
+                    self._splits[cumulative][split] = QuantileSketch()  # type: ignore
+
+                self._splits[cumulative][split].extend(data)  # type: ignore
+
+        for route, seeds in other._seeds.items():  # type: ignore
+            for step_seed, seed in seeds.items():
+                target = self._seeds.setdefault(route, {}).setdefault(step_seed, {'data': QuantileSketch(), 'best_splits': {}, 'battles': 0, 'back_attack_count': 0})  # type: ignore
+                target['data'].extend(seed['data'])
+                target['battles'] += seed['battles']
+                target['back_attack_count'] += seed['back_attack_count']
+
+                for split, value in seed['best_splits'].items():
+                    if split not in target['best_splits'] or value < target['best_splits'][split]:
+                        target['best_splits'][split] = value
+
+        self._runs.extend(other._runs)
+
+    def get_battle_summary(self):
+        """Summarizes the finished battles of each formation and strat, merged from the groups."""
+
+        summaries: OrderedDict[tuple[int, str], dict[str, Any]] = OrderedDict()
+
+        for group in self._groups.values():  # type: ignore
+            key = (group['formation'], group['strat'])
+
+            if key not in summaries:
+                summaries[key] = {'key': key, 'count': 0, 'victories': 0, 'success': None, 'data': QuantileSketch()}
+
+            summary = summaries[key]
+            summary['count'] += group['count']
+            summary['victories'] += group['victories']
+            summary['data'].extend(group['data'])
+
+            if group['success'] is not None:
+                summary['success'] = (summary['success'] or 0) + group['success']
+
+        results = []
+
+        for summary in summaries.values():
+            data = summary.pop('data')
+            summary['minimum'] = data.minimum
+            summary['maximum'] = data.maximum
+            summary['median'] = data.median() if len(data) > 0 else None
+            results.append(summary)
+
+        return results
+
+
+class LogFollower(object):
+    """Follows the logs in a directory as the bot writes them.
+
+    Each poll reads only the bytes appended since the previous poll and feeds
+    the complete lines to the corresponding Log. An incomplete trailing line is
+    held back until the rest of it has been written.
+    """
+
+    def __init__(self, directory: str):
+        self._directory = directory
+        self._files: dict[str, tuple[int, bytes, Optional[Log]]] = {}
+
+    @property
+    def logs(self):
+        return [log for _, (_, _, log) in sorted(self._files.items()) if log is not None and log.valid]
+
+    def get(self, filename: str) -> Optional[Log]:
+        """Returns the log of a followed file, or None if it could not be parsed or is not yet valid."""
+
+        log = self._files[filename][2] if filename in self._files else None
+        return log if log is not None and log.valid else None
+
+    def poll(self) -> list[str]:
+        changed = []
+
+        for name in sorted(os.listdir(self._directory)):
+            filename = os.path.join(self._directory, name)
+
+            if not name.endswith('.log') or not os.path.isfile(filename):
+                continue
+
+            size = os.path.getsize(filename)
+            offset, pending, log = self._files.get(filename, (0, b'', None))
+
+            if filename in self._files and size == offset:
+                continue
+
+            if log is None or size < offset:
+                offset, pending, log = 0, b'', Log(filename, parse=False)
+
+            with open(filename, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+
+            lines = (pending + data).split(b'\n')
+            pending = lines.pop()
+
+            try:
+                for line in lines:
+                    log.feed(line.decode('utf-8', 'replace'))
+            except (AssertionError, KeyError, ValueError) as e:
+                print('ERROR: {} could not be parsed: malformed log ({})'.format(filename, type(e).__name__))
+                log = None
+
+            self._files[filename] = (offset + len(data), pending, log)
+            changed.append(filename)
+
+        return changed
+
+
+class ReportManifest(object):
+    def __init__(self, directory: str, incremental: bool = True):
+        self._directory = directory
+        self._filename = os.path.join(directory, 'manifest.json')
+        self._entries: dict[str, dict[str, str]] = {'runs': {}, 'battles': {}, 'images': {}}
+        self._current: dict[str, set[str]] = {section: set() for section in self._entries}
+
+        if incremental and os.path.exists(self._filename):
+            try:
+                with open(self._filename) as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                manifest = {}
+
+            if manifest.get('version') == REPORT_VERSION:
+                for section in self._entries:
+                    self._entries[section] = manifest.get(section, {})
+
+    def is_current(self, section: str, filenames: list[str], digest: str) -> bool:
+        """Returns whether the files were generated from data with the digest, and counts them as part of the report being written."""
+
+        self._current[section].update(filenames)
+        return all(self._entries[section].get(x) == digest and os.path.exists(os.path.join(self._directory, x)) for x in filenames)
+
+    def update(self, section: str, filenames: list[str], digest: str):
+        self._current[section].update(filenames)
+
+        for filename in filenames:
+            self._entries[section][filename] = digest
+
+    def remove_stale(self, sections: Iterable[str]):
+        """Deletes the files of the sections that an earlier report recorded but the report being written does not have."""
+
+        for section in sections:
+            for filename in [x for x in self._entries[section] if x not in self._current[section]]:
+                try:
+                    os.remove(os.path.join(self._directory, filename))
+                except FileNotFoundError:
+                    pass
+
+                del self._entries[section][filename]
+
+    def save(self):
+        with open(self._filename + '.tmp', 'w') as f:
+            json.dump(dict(version=REPORT_VERSION, **self._entries), f, indent=1, sort_keys=True)
+
+        os.replace(self._filename + '.tmp', self._filename)
+
+        for files in self._current.values():
+            files.clear()
+
+
+class Profiler(object):
+    """Records the wall time, CPU time and peak memory of each stage of a report.
+
+    A disabled profiler records nothing, so that it can be passed around
+    unconditionally. Parsing can also record statistics for each file, which
+    profile_log measures in whichever process parses it.
+    """
+
+    def __init__(self, enabled: bool = False, profile_stage: Optional[str] = None, profile_filename: Optional[str] = None):
+        self._enabled = enabled
+        self._profile_stage = profile_stage
+        self._profile_filename = profile_filename
+        self._stages: list[dict[str, Any]] = []
+        self._files: list[dict[str, Any]] = []
+
+    @property
+    def enabled(self):
+        return self._enabled
+
+    @property
+    def stages(self):
+        return self._stages
+
+    @property
+    def files(self):
+        return self._files
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        if not self._enabled:
+            yield
+            return
+
+        profile = cProfile.Profile() if name == self._profile_stage else None
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        child_cpu = sum(os.times()[2:4])
+
+        if profile:
+            profile.enable()
+
+        try:
+            yield
+        finally:
+            if profile:
+                profile.disable()
+                profile.dump_stats(self._profile_filename)
+
+            memory, child_memory = get_peak_memory()
+
+            self._stages.append({
+                'stage': name,
+                'wall': time.perf_counter() - wall,
+                'cpu': time.process_time() - cpu,
+                'child_cpu': sum(os.times()[2:4]) - child_cpu,
+                'peak_memory': memory,
+                'child_peak_memory': child_memory,
+            })
+
+    def add_file(self, record: dict[str, Any]):
+        self._files.append(record)
+
+    def get_totals(self) -> dict[str, Any]:
+        wall = sum(x['wall'] for x in self._files)
+        lines = sum(x['lines'] or 0 for x in self._files)
+
+        return {
+            'files': len(self._files),
+            'bytes': sum(x['bytes'] for x in self._files),
+            'lines': lines,
+            'wall': wall,
+            'lines_per_second': lines / wall if wall > 0 else None,
+            'unrecognized': sum(x['unrecognized'] for x in self._files),
+        }
+
+    def save(self, filename: str):
+        with open(filename, 'w') as f:
+            json.dump({'version': 1, 'arguments': sys.argv[1:], 'stages': self._stages, 'files': self._files, 'totals': self.get_totals()}, f, indent=1)
+            f.write('\n')
+
+    def print_summary(self):
+        print('{:<10} {:>9} {:>9} {:>9} {:>9}'.format('Stage', 'Wall', 'CPU', 'Workers', 'Peak MiB'))
+
+        for stage in self._stages:
+            memory = max(x for x in [stage['peak_memory'], stage['child_peak_memory'], 0] if x is not None)
+            print('{:<10} {:>8.3f}s {:>8.3f}s {:>8.3f}s {:>9.1f}'.format(stage['stage'], stage['wall'], stage['cpu'], stage['child_cpu'], memory))
+
+        if self._files:
+            totals = self.get_totals()
+            print('Parsed {} file(s), {} lines at {:.0f} lines/s per process, with {} unrecognized line(s)'.format(totals['files'], totals['lines'], totals['lines_per_second'] or 0, totals['unrecognized']))
+
+            for record in sorted(self._files, key=lambda x: x['wall'], reverse=True)[:5]:
+                print('  {:.3f}s {}'.format(record['wall'], record['file']))
+
+
+#
+# Image Functions
+#
+
+def get_battle_plot(data: dict[str, Any]):
+    if len(data['strat']) > 0:
+        values = {}
+
+        for strat, strat_data in data['data'].items():
+            values[strat] = [x / 60.0988 for x in get_values(strat_data)]
+    else:
+        values = {'Default Strat': [x / 60.0988 for x in get_values(data['data'])]}
+
+    return ('{} Battle Time'.format(describe_formation(data['formation'])), 'Battle Time (seconds)', values, len(data['strat']) > 0)
+
+
+def get_runs_plot(logs: list['Log'], seed: Optional[int] = False):
+    values: dict[str, list[float]] = {}
+
+    for log in logs:
+        if seed:
+            key = '{}-{}'.format(log.route, log.step_seed)
+        else:
+            key = log.route
+
+        if log.success:
+            if key not in values:
+                values[key] = []
+
+            values[key].append(log.frames * 655171 / 39375000)
+
+    return ('Run Completion Times', 'Run Time (seconds)', values, True)
+
+
+def get_density(samples: numpy.ndarray, points: numpy.ndarray) -> Optional[numpy.ndarray]:
+    """Estimates the probability density of the samples at the given points.
+
+    This is a Gaussian kernel density estimate using Scott's rule for the
+    bandwidth, as scipy.stats.gaussian_kde does. Small samples are evaluated
+    exactly. Larger ones are linearly binned onto a fine grid and convolved
+    with the kernel using an FFT, so the cost no longer grows with the product
+    of the sample and point counts. A single sample, or samples without any
+    variance, get a narrow kernel relative to the plotted range rather than no
+    estimate at all.
+    """
+
+    samples = numpy.asarray(samples, dtype=float)
+    points = numpy.asarray(points, dtype=float)
+    count = len(samples)
+
+    if count == 0:
+        return None
+
+    deviation = samples.std(ddof=1) if count > 1 else 0.0
+
+    if deviation > 0:
+        bandwidth = deviation * count ** -0.2
+    else:
+        bandwidth = max(points.max() - points.min(), 1.0) / 50
+
+    if count < KDE_EXACT_LIMIT:
+        offsets = (points[:, numpy.newaxis] - samples[numpy.newaxis, :]) / bandwidth
+        return numpy.exp(-0.5 * offsets ** 2).sum(axis=1) / (count * bandwidth * numpy.sqrt(2 * numpy.pi))
+
+    low = min(points.min(), samples.min()) - 4 * bandwidth
+    high = max(points.max(), samples.max()) + 4 * bandwidth
+    size = int(min(max(numpy.ceil((high - low) * 20 / bandwidth), 512), 1 << 16))
+    step = (high - low) / (size - 1)
+
+    position = (samples - low) / step
+    index = numpy.minimum(position.astype(int), size - 2)
+    weight = position - index
+    counts = numpy.bincount(index, 1 - weight, size) + numpy.bincount(index + 1, weight, size)
+
+    radius = int(numpy.ceil(4 * bandwidth / step))
+    kernel = numpy.exp(-0.5 * (numpy.arange(-radius, radius + 1) * step / bandwidth) ** 2) / (bandwidth * numpy.sqrt(2 * numpy.pi))
+
+    length = 1 << int(numpy.ceil(numpy.log2(size + 2 * radius + 1)))
+    density = numpy.fft.irfft(numpy.fft.rfft(counts, length) * numpy.fft.rfft(kernel, length), length)[radius:radius + size] / count
+
+    return numpy.interp(points, low + numpy.arange(size) * step, numpy.maximum(density, 0))
+
+
+def img_output_density(f: str, title: str, xlabel: str, values: dict[str, list[float]], legend: bool):
+    # Importing matplotlib takes longer than everything else the analyzer
+    # needs, so it is only loaded once there is something to plot.
+    import matplotlib
+    matplotlib.use('Agg')
+
+    import matplotlib.pyplot as plt
+    from matplotlib.font_manager import FontProperties
+
+    figure = plt.figure(figsize=(12.0, 4.8))
+    figure.suptitle(title)
+
+    mintmp = [min(x) for x in values.values() if len(x) > 0]
+    maxtmp = [max(x) for x in values.values() if len(x) > 0]
+
+    axis_min = min(mintmp) - 10 if len(mintmp) > 0 else 0
+    axis_max = max(maxtmp) + 10 if len(maxtmp) > 0 else 300
+
+    subplot = figure.add_subplot(111)
+    axis = numpy.linspace(axis_min, axis_max)  # type: ignore
+
+    for i, (category, data) in enumerate(values.items()):
+        x = numpy.array(data, dtype=float)  # type: ignore
+        density = get_density(x, axis)
+
+        subplot.plot(x, numpy.zeros(x.shape), '+', ms=20, color=COLORS[i % len(COLORS)])  # type: ignore
+
+        if density is not None:
+            subplot.plot(axis, density, '-', color=COLORS[i % len(COLORS)], label=category)
+
+    fontprop = FontProperties()
+    fontprop.set_size('small')
+
+    if legend:
+        box = subplot.get_position()
+        subplot.set_position([box.x0, box.y0, box.width * 0.8, box.height])
+        plt.legend(loc="center left", bbox_to_anchor=(1, 0.5), prop=fontprop)
+
+    plt.xlabel(xlabel)  # type: ignore
+    plt.ylabel("Probability")  # type: ignore
+    plt.savefig(f)
+    plt.close(figure)
+
+
+def img_output_battle(f: str, key: str, data: dict[str, Any]):
+    img_output_density(f, *get_battle_plot(data))
+
+
+def img_output_runs(f: str, logs: list['Log'], seed: Optional[int] = False):
+    img_output_density(f, *get_runs_plot(logs, seed))
+
+
+def img_output_plot(plot: tuple[str, tuple[str, str, dict[str, list[float]], bool]]):
+    img_output_density(plot[0], *plot[1])
+
+
+def img_output_plots(plots: list[tuple[list[str], tuple[str, str, dict[str, list[float]], bool]]], jobs: int = 1):
+    """Renders each distinct plot once and links or copies it to every filename that shares it."""
+
+    distinct: dict[str, tuple[list[str], tuple[str, str, dict[str, list[float]], bool]]] = {}
+
+    for filenames, plot in plots:
+        digest = hashlib.sha1(repr(plot).encode('utf-8')).hexdigest()
+
+        if digest in distinct:
+            distinct[digest][0].extend(filenames)
+        else:
+            distinct[digest] = (list(filenames), plot)
+
+    renders = [(filenames[0], plot) for filenames, plot in distinct.values()]
+
+    if jobs > 1 and len(renders) > 1:
+        with multiprocessing.Pool(min(jobs, len(renders))) as pool:
+            pool.map(img_output_plot, renders, chunksize=1)
+    else:
+        for render in renders:
+            img_output_plot(render)
+
+    for filenames, _ in distinct.values():
+        for filename in filenames[1:]:
+            if os.path.exists(filename):
+                os.remove(filename)
+
+            try:
+                os.link(filenames[0], filename)
+            except OSError:
+                shutil.copyfile(filenames[0], filename)
+
+
+#
+# HTML Functions
+#
+# Pages are built in memory and written with a single call. The header and
+# footer shared by every page are rendered once, and the rows of each table are
+# formatted from a template prepared when the module is loaded.
+#
+
+def get_table_template(attributes: str, headers: list[str]) -> str:
+    """Returns the markup of a table with the given headers, with {} in place of its rows."""
+
+    return ''.join([
+        '\t\t\t<table {}>\n'.format(attributes),
+        '\t\t\t\t<thead>\n',
+        '\t\t\t\t\t<tr>\n',
+        ''.join('\t\t\t\t\t\t<th>{}</th>\n'.format(header) for header in headers),
+        '\t\t\t\t\t</tr>\n',
+        '\t\t\t\t</thead>\n',
+        '\t\t\t\t<tbody>\n',
+        '{}',
+        '\t\t\t\t</tbody>\n',
+        '\t\t\t</table>\n',
+    ])
+
+
+def get_row_template(cells: list[str]) -> str:
+    """Returns the markup of a table row with the given cells, which are themselves templates."""
+
+    return '\t\t\t\t\t<tr>\n' + ''.join('\t\t\t\t\t\t{}\n'.format(cell) for cell in cells) + '\t\t\t\t\t</tr>\n'
+
+
+HTML_HEADER = ''.join([
+    '<!DOCTYPE html>\n',
+    '<html lang="en">\n',
+    '\t<head>\n',
+    '\t\t<meta charset="utf-8">\n',
+    '\t\t<title>Edge Log Analysis</title>\n',
+    '\t\t<link href="https://maxcdn.bootstrapcdn.com/bootstrap/3.3.7/css/bootstrap.min.css" rel="stylesheet" integrity="sha384-BVYiiSIFeK1dGmJRAkycuHAHRg32OmUcww7on3RYdg4Va+PmSTsz/K68vbdEjh4u" crossorigin="anonymous">\n',
+    '\t\t<link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/jquery.tablesorter/2.28.9/css/theme.bootstrap_3.min.css" integrity="sha256-kHFAS2GpR7DKNTb9SMX1aaoBxjLsZyeAX2Dh7h4UB1g=" crossorigin="anonymous" />\n',
+    '\t\t<script src="https://cdnjs.cloudflare.com/ajax/libs/jquery/3.2.1/jquery.min.js" integrity="sha256-hwg4gsxgFZhOsEEamdOYGBf13FyQuiTwlAQgxVSNgt4=" crossorigin="anonymous"></script>\n',
+    '\t\t<script src="https://cdnjs.cloudflare.com/ajax/libs/jquery.tablesorter/2.28.9/js/jquery.tablesorter.min.js" integrity="sha256-kgWKzrQM9EptuijrOz9DZw4YTl/iEtgLzcfCB2WfV2I=" crossorigin="anonymous"></script>\n',
+    '\t\t<script src="https://cdnjs.cloudflare.com/ajax/libs/jquery.tablesorter/2.28.9/js/jquery.tablesorter.widgets.min.js" integrity="sha256-68t49lPEpa0S/ohrRPVYgcHaMn4HyOKfVomAVMAXNoM=" crossorigin="anonymous"></script>\n',
+    '\t\t<meta name="viewport" content="width=device-width, initial-scale=1">\n',
+    '\t\t<style type="text/css">\n',
+    '\t\t\t.bold { font-weight: bold; }\n',
+    '\t\t</style>\n',
+    '\t</head>\n',
+    '\t<body>\n',
+    '\t\t<div class="container">\n',
+    '\t\t\t<h1>Edge Log Analysis</h1>\n',
+    '\t\t\t<h2>Introduction</h2>\n',
+    '\t\t\t<p>This page is a statistical analysis of the log files generated by Edge, the Final Fantasy IV speed running bot.</p>\n',
+])
+
+HTML_FOOTER = ''.join([
+    '\t\t</div>\n',
+    '\t\t<script>\n',
+    '''$.extend($.tablesorter.themes.bootstrap, {table: 'table table-bordered table-striped'});''',
+    '\t\t\t$(document).ready(function()\n',
+    '\t\t\t\t{\n',
+    '''var options = {
+        theme: "bootstrap",
+        headerTemplate: "{content} {icon}",
+        widgets: ["uitheme", "zebra"]
+    };\n''',
+    '\t\t\t\t\t$("#seeds").tablesorter(options);\n',
+    '\t\t\t\t\t$("#runs").tablesorter(options);\n',
+    '\t\t\t\t}\n',
+    '\t\t\t);\n',
+    '\t\t</script>\n',
+    '\t</body>\n',
+    '</html>\n',
+])
+
+SPLITS_TABLE = get_table_template('class="table table-striped"', ['Split', 'Count', 'Minimum', 'Maximum', 'Median'])
+SPLITS_ROW = get_row_template(['<td>{}</td>'] * 5)
+
+BATTLES_TABLE = get_table_template('class="table table-striped"', ['Description', 'Strat', 'Count', 'Victory Rate', 'Success Rate', 'Minimum', 'Maximum', 'Median'])
+BATTLES_ROW = get_row_template(['<td><a href="battles/{}.html">{}</a></td>'] + ['<td>{}</td>'] * 7)
+
+SEEDS_TABLE = get_table_template('class="tablesorter-bootstrap" id="seeds"', ['Route', 'Seed', 'Count', 'Back Attacks', 'Sum of Best', 'Minimum', 'Maximum', 'Median'])
+SEEDS_ROW = get_row_template(['<td>{}</td>'] * 3 + ['<td>{} / {} ({:.3f}%)</td>'] + ['<td>{}</td>'] * 4)
+
+RUNS_TABLE = get_table_template('class="tablesorter-bootstrap" id="runs"', ['Edge Version', 'Route', 'Step Seed', 'RNG Seed', 'Surprised/Back Attacks', 'Non-Battle Time', 'Result'])
+RUNS_ROW = get_row_template(['<td>{}</td>'] * 3 + ['<td><a href="runs/{}-{:03}-{:010}.html">{}</a></td>', '<td data-text="{}">{} / {} ({:.3f}%)</td>', '<td>{}</td>', '<td data-text="{}" class="{}">{}</td>'])
+
+RUN_SUMMARY = '\t\t\t<h2>Summary</h2>\n\t\t\t\t<dl class="dl-horizontal">\n\t\t\t\t\t<dt>Route</dt><dd>{}</dd>\n\t\t\t\t</dl>\n'
+
+RUN_SPLITS_TABLE = get_table_template('class="table table-striped"', ['Split', 'Cumulative Time', 'Segment Time', 'Best Segment Time', 'Worst Segment Time', 'Median Segment Time'])
+RUN_SPLITS_ROW = get_row_template(['<td>{}</td>'] * 2 + ['<td class="{}">{}</td>', '{}'])
+
+RUN_BATTLES_TABLE = get_table_template('class="table table-striped"', ['Formation', 'Strat', 'Time', 'Best Time', 'Worst Time', 'Median Time'])
+RUN_BATTLES_ROW = get_row_template(['<td>{}</td>'] * 2 + ['<td class="{}">{}</td>', '{}'])
+
+# The best, worst and median cells of the rows above, which are the same on
+# every run page, and so are formatted once for each set of thresholds.
+RUN_THRESHOLD_CELLS = '<td>{}</td>\n\t\t\t\t\t\t<td>{}</td>\n\t\t\t\t\t\t<td>{}</td>'
+RUN_THRESHOLD_CACHE: dict[tuple[Any, Any, Any], str] = {}
+
+
+def format_thresholds(thresholds: dict[str, Any]) -> str:
+    key = (thresholds['minimum'], thresholds['maximum'], thresholds['median'])
+    cells = RUN_THRESHOLD_CACHE.get(key)
+
+    if cells is None:
+        if len(RUN_THRESHOLD_CACHE) >= 1 << 16:
+            RUN_THRESHOLD_CACHE.clear()
+
+        cells = RUN_THRESHOLD_CELLS.format(format_time(thresholds['minimum']), format_time(thresholds['maximum']), format_time(thresholds['median']))
+        RUN_THRESHOLD_CACHE[key] = cells
+
+    return cells
+
+
+def write_page(filename: str, page: str):
+    with open(filename, 'w') as f:
+        f.write(page)
+
+
+def html_output_basic_statistics(f: TextIO, log_statistics: LogStatistics):
+    logs = log_statistics.logs
+    lines = ['\t\t\t<h2>Basic Statistics</h2>\n', '\t\t\t<dl class="dl-horizontal">\n', '\t\t\t\t<dt>Number of Logs</dt><dd>{}</dd>\n'.format(len(logs))]
+
+    if len([x for x in logs if x.success]) > 0:
+        lines.append('\t\t\t\t<dt>Best Time</dt><dd>{}</dd>\n'.format(format_time(min([x.frames for x in logs if x.success]))))
+        lines.append('\t\t\t\t<dt>Sum of Best</dt><dd>{}</dd>\n'.format(format_time(log_statistics.sum_of_best)))
+
+    lines.append('\t\t\t</dl>\n')
+    f.write(''.join(lines))
+
+
+def html_output_splits(f: TextIO, log_statistics: LogStatistics):
+    splits = log_statistics.get_split_data(True)
+    rows = []
+
+    for split, data in sorted(splits.items(), key=lambda x: get_minimum(x[1])):
+        rows.append(SPLITS_ROW.format(split, len(data), format_time(get_minimum(data)), format_time(get_maximum(data)), format_time(get_median(data))))
+
+    f.write('\t\t\t<h2>Splits</h2>\n')
+    f.write(SPLITS_TABLE.format(''.join(rows)))
+
+
+def html_output_battles(f: TextIO, log_statistics: LogStatistics):
+    ordering = log_statistics.formation_order
+    summaries = log_statistics.get_battle_summary()
+    rows = []
+
+    for data in sorted(summaries, key=lambda x: (ordering[x['key'][0]], x['key'][1])):
+        formation, strat = data['key']
+        key = '{:03}-{}'.format(formation, strat) if strat else '{:03}'.format(formation)
+        victories = data['victories'] > 0
+
+        rows.append(BATTLES_ROW.format(
+            key,
+            describe_formation(formation),
+            strat if strat else '-',
+            data['count'],
+            '{:.3f}%'.format(data['victories'] * 100 / data['count']),
+            '{:.3f}%'.format(data['success'] * 100 / data['count']) if data['success'] is not None else '-',
+            format_time(data['minimum']) if victories else 'N/A',
+            format_time(data['maximum']) if victories else 'N/A',
+            format_time(data['median']) if victories else 'N/A',
+        ))
+
+    f.write('\t\t\t<h2>Battles</h2>\n')
+    f.write(BATTLES_TABLE.format(''.join(rows)))
+
+
+def html_output_table(f: TextIO, headers: list[str], rows: list[list[Any]]):
+    cells = '\t\t\t\t\t\t<td>{}</td>' * len(headers)
+    body = ''.join('\t\t\t\t\t<tr>\n' + cells.format(*row) + '\t\t\t\t\t</tr>\n' for row in rows)
+
+    f.write(get_table_template('class="table table-striped"', headers).format(body))
+
+
+def html_output_battle(f: TextIO, key: str, battle_data: dict[tuple[str, str, str], Any], agility_battle_data: dict[tuple[str, str, str], Any], speed_battle_data: dict[tuple[str, str, str], Any]):
+    first_data = list(battle_data.values())[0]
+
+    if 'strat' in first_data and first_data['strat']:
+        f.write('\t\t\t<h2>Battle Data for {} using &quot;{}&quot; Strat</h2>\n'.format(describe_formation(first_data['formation']), first_data['strat']))
+    else:
+        f.write('\t\t\t<h2>Battle Data for {}</h2>\n'.format(describe_formation(first_data['formation'])))
+
+    f.write('\t\t\t<h3>Time Graph</h3>\n')
+    f.write('\t\t\t<p><img src="img/{}.png"></p>'.format(key))
+
+    #
+    # Battle Type Statistics
+    #
+
+    f.write('\t\t\t<h3>Battle Type Statistics</h3>\n')
+    battle_type_data: dict[str, dict[str, Any]] = {}
+
+    for (battle_type, _, _), data in sorted(battle_data.items()):
+        if battle_type not in battle_type_data:
+            battle_type_data[battle_type] = copy.deepcopy(data)
+        else:
+            battle_type_data[battle_type]['count'] += data['count']
+            battle_type_data[battle_type]['data'].extend(data['data'])
+
+            if 'success' in data:
+                if 'success' not in battle_type_data[battle_type]:
+                    battle_type_data[battle_type]['success'] = 0
+                battle_type_data[battle_type]['success'] += data['success']
+
+    headers = ['Battle Type', 'Battles', 'Successes', 'Deaths', 'Best Time', 'Worst Time', 'Median Time']
+    rows: list[list[Any]] = []
+
+    for battle_type, data in battle_type_data.items():
+        if len(data['data']) > 0:
+            minimum = format_time(get_minimum(data['data']))
+            maximum = format_time(get_maximum(data['data']))
+            median = format_time(get_median(data['data']))
+        else:
+            minimum = 'N/A'
+            maximum = 'N/A'
+            median = 'N/A'
+
+        rows.append([
+            battle_type,
+            data['count'],
+            data['success'] if 'success' in data else 'N/A',
+            data['count'] - len(data['data']),
+            minimum,
+            maximum,
+            median,
+        ])
+
+    html_output_table(f, headers, rows)
+
+    #
+    # Relative Speed Statistics
+    #
+
+    f.write('\t\t\t<h3>Relative Speed Statistics</h3>\n')
+    headers = ['Battle Type', 'Enemy Speed', 'Party Speed', 'Battles', 'Successes', 'Deaths', 'Best Time', 'Worst Time', 'Median Time']
+    rows = []
+
+    for (battle_type, _, _), data in sorted(speed_battle_data.items(), key=lambda x: '-'.join(y or '' for y in x[0])):
+        enemy_speed = data['enemy_speed']
+        party_speed = data['party_speed']
+
+        if len(data['data']) > 0:
+            minimum = format_time(get_minimum(data['data']))
+            maximum = format_time(get_maximum(data['data']))
+            median = format_time(get_median(data['data']))
+        else:
+            minimum = 'N/A'
+            maximum = 'N/A'
+            median = 'N/A'
 
         rows.append([
-            data['battle_type'],
-            data['enemy_rs'],
-            data['party_rs'],
+            battle_type,
+            enemy_speed if enemy_speed is not None else 'N/A',
+            party_speed if party_speed is not None else 'N/A',
             data['count'],
             data['success'] if 'success' in data else 'N/A',
             data['count'] - len(data['data']),
@@ -922,7 +3107,7 @@ def html_output_battle(f: TextIO, key: str, battle_data: dict[tuple[str, str, st
             median,
         ])
 
-    html_output_table(headers, rows)
+    html_output_table(f, headers, rows)
 
     #
     # Full Statistics (Agility)
@@ -934,9 +3119,9 @@ def html_output_battle(f: TextIO, key: str, battle_data: dict[tuple[str, str, st
 
     for (battle_type, enemy_agility_str, party_agility_str), data in agility_battle_data.items():
         if len(data['data']) > 0:
-            minimum = format_time(min(data['data']))
-            maximum = format_time(max(data['data']))
-            median = format_time(statistics.median(data['data']))
+            minimum = format_time(get_minimum(data['data']))
+            maximum = format_time(get_maximum(data['data']))
+            median = format_time(get_median(data['data']))
         else:
             minimum = 'N/A'
             maximum = 'N/A'
@@ -954,7 +3139,7 @@ def html_output_battle(f: TextIO, key: str, battle_data: dict[tuple[str, str, st
             median,
         ])
 
-    html_output_table(headers, rows)
+    html_output_table(f, headers, rows)
 
     #
     # Full Statistics (Level)
@@ -966,9 +3151,9 @@ def html_output_battle(f: TextIO, key: str, battle_data: dict[tuple[str, str, st
 
     for (battle_type, enemy_agility_str, party_agility_str), data in battle_data.items():
         if len(data['data']) > 0:
-            minimum = format_time(min(data['data']))
-            maximum = format_time(max(data['data']))
-            median = format_time(statistics.median(data['data']))
+            minimum = format_time(get_minimum(data['data']))
+            maximum = format_time(get_maximum(data['data']))
+            median = format_time(get_median(data['data']))
         else:
             minimum = 'N/A'
             maximum = 'N/A'
@@ -986,99 +3171,48 @@ def html_output_battle(f: TextIO, key: str, battle_data: dict[tuple[str, str, st
             median,
         ])
 
-    html_output_table(headers, rows)
+    html_output_table(f, headers, rows)
 
 
-def html_output_seeds(f: TextIO, logs: list[Log]):
-    f.write('\t\t\t<h2>Step Seeds</h2>\n')
-    f.write('\t\t\t<table class="tablesorter-bootstrap" id="seeds">\n')
-    f.write('\t\t\t\t<thead>\n')
-    f.write('\t\t\t\t\t<tr>\n')
-    f.write('\t\t\t\t\t\t<th>Route</th>\n')
-    f.write('\t\t\t\t\t\t<th>Seed</th>\n')
-    f.write('\t\t\t\t\t\t<th>Count</th>\n')
-    f.write('\t\t\t\t\t\t<th>Back Attacks</th>\n')
-    f.write('\t\t\t\t\t\t<th>Sum of Best</th>\n')
-    f.write('\t\t\t\t\t\t<th>Minimum</th>\n')
-    f.write('\t\t\t\t\t\t<th>Maximum</th>\n')
-    f.write('\t\t\t\t\t\t<th>Median</th>\n')
-    f.write('\t\t\t\t\t</tr>\n')
-    f.write('\t\t\t\t</thead>\n')
-    f.write('\t\t\t\t<tbody>\n')
-
-    seeds = get_seed_data(logs)
+def html_output_seeds(f: TextIO, log_statistics: LogStatistics):
+    seeds = log_statistics.seeds
+    rows = []
 
     for route in seeds:
-        for seed, data in sorted(seeds[route].items(), key=lambda x: statistics.median(x[1]['data']) if len(x[1]['data']) > 0 else 0):
+        for seed, data in sorted(seeds[route].items(), key=lambda x: get_median(x[1]['data']) if len(x[1]['data']) > 0 else 0):
             if len(data['data']) > 0:
-                f.write('\t\t\t\t\t<tr>\n')
-                f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(route))
-                f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(seed))
-                f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(len(data['data'])))
-                f.write('\t\t\t\t\t\t<td>{} / {} ({:.3f}%)</td>\n'.format(data['back_attack_count'], data['battles'], data['back_attack_count'] * 100 / data['battles'] if data['battles'] > 0 else 100))
-                f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(format_time(sum(data['best_splits'].values()))))
-                f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(format_time(min(data['data']))))
-                f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(format_time(max(data['data']))))
-                f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(format_time(statistics.median(data['data']))))
-                f.write('\t\t\t\t\t</tr>\n')
-
-    f.write('\t\t\t\t</tbody>\n')
-    f.write('\t\t\t</table>\n')
-
-
-def html_output_run(f: TextIO, splits: dict[str, Any], battles: dict[str, Any], log: Log):
-    f.write('\t\t\t<h2>Summary</h2>\n')
-    f.write('\t\t\t\t<dl class="dl-horizontal">\n')
-    f.write('\t\t\t\t\t<dt>Route</dt><dd>{}</dd>\n'.format(log.route))
-    f.write('\t\t\t\t</dl>\n')
+                rows.append(SEEDS_ROW.format(
+                    route,
+                    seed,
+                    len(data['data']),
+                    data['back_attack_count'],
+                    data['battles'],
+                    data['back_attack_count'] * 100 / data['battles'] if data['battles'] > 0 else 100,
+                    format_time(sum(data['best_splits'].values())),
+                    format_time(get_minimum(data['data'])),
+                    format_time(get_maximum(data['data'])),
+                    format_time(get_median(data['data'])),
+                ))
 
-    f.write('\t\t\t<h2>Splits</h2>\n')
-    f.write('\t\t\t<table class="table table-striped">\n')
-    f.write('\t\t\t\t<thead>\n')
-    f.write('\t\t\t\t\t<tr>\n')
-    f.write('\t\t\t\t\t\t<th>Split</th>\n')
-    f.write('\t\t\t\t\t\t<th>Cumulative Time</th>\n')
-    f.write('\t\t\t\t\t\t<th>Segment Time</th>\n')
-    f.write('\t\t\t\t\t\t<th>Best Segment Time</th>\n')
-    f.write('\t\t\t\t\t\t<th>Worst Segment Time</th>\n')
-    f.write('\t\t\t\t\t\t<th>Median Segment Time</th>\n')
-    f.write('\t\t\t\t\t</tr>\n')
-    f.write('\t\t\t\t</thead>\n')
-    f.write('\t\t\t\t<tbody>\n')
+    f.write('\t\t\t<h2>Step Seeds</h2>\n')
+    f.write(SEEDS_TABLE.format(''.join(rows)))
+
+
+def html_output_run(f: TextIO, quantiles: QuantileIndex, log: Log):
+    rows = []
 
     for split, data in sorted(log.splits.items(), key=lambda x: x[1]['total']):
-        if data['current'] < sorted(splits[split])[int(len(splits[split]) * 0.3333)]:
-            result_class = 'text-success'
-        elif data['current'] < sorted(splits[split])[int(len(splits[split]) * 0.6667)]:
-            result_class = 'text-warning'
-        else:
-            result_class = 'text-danger'
+        thresholds = quantiles.get('split', split)
+        assert(thresholds is not None)
+        result_class = quantiles.classify('split', split, data['current'])
 
-        f.write('\t\t\t\t\t<tr>\n')
-        f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(split))
-        f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(format_time(data['total'])))
-        f.write('\t\t\t\t\t\t<td class="{}">{}</td>\n'.format(result_class, format_time(data['current'])))
-        f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(format_time(min(splits[split]))))
-        f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(format_time(max(splits[split]))))
-        f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(format_time(statistics.median(splits[split]))))
-        f.write('\t\t\t\t\t</tr>\n')
+        rows.append(RUN_SPLITS_ROW.format(split, format_time(data['total']), result_class, format_time(data['current']), format_thresholds(thresholds)))
 
-    f.write('\t\t\t\t</tbody>\n')
-    f.write('\t\t\t</table>\n')
+    f.write(RUN_SUMMARY.format(log.route))
+    f.write('\t\t\t<h2>Splits</h2>\n')
+    f.write(RUN_SPLITS_TABLE.format(''.join(rows)))
 
-    f.write('\t\t\t<h2>Battles</h2>\n')
-    f.write('\t\t\t<table class="table table-striped">\n')
-    f.write('\t\t\t\t<thead>\n')
-    f.write('\t\t\t\t\t<tr>\n')
-    f.write('\t\t\t\t\t\t<th>Formation</th>\n')
-    f.write('\t\t\t\t\t\t<th>Strat</th>\n')
-    f.write('\t\t\t\t\t\t<th>Time</th>\n')
-    f.write('\t\t\t\t\t\t<th>Best Time</th>\n')
-    f.write('\t\t\t\t\t\t<th>Worst Time</th>\n')
-    f.write('\t\t\t\t\t\t<th>Median Time</th>\n')
-    f.write('\t\t\t\t\t</tr>\n')
-    f.write('\t\t\t\t</thead>\n')
-    f.write('\t\t\t\t<tbody>\n')
+    rows = []
 
     for data in log.battles:
         key = '{:03}'.format(data['formation'])
@@ -1086,68 +3220,48 @@ def html_output_run(f: TextIO, splits: dict[str, Any], battles: dict[str, Any],
         if data['strat']:
             key = '{}-{}'.format(key, data['strat'])
 
-        if key in battles and len(battles[key]['data']) > 0:
-            if data['frames'] < sorted(battles[key]['data'])[int(len(battles[key]['data']) * 0.3333)]:
-                result_class = 'text-success'
-            elif data['frames'] < sorted(battles[key]['data'])[int(len(battles[key]['data']) * 0.6667)]:
-                result_class = 'text-warning'
-            else:
-                result_class = 'text-danger'
+        thresholds = quantiles.get('battle', key)
 
-            f.write('\t\t\t\t\t<tr>\n')
-            f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(describe_formation(data['formation'])))
-            f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(data['strat'] if data['strat'] else '-'))
-            f.write('\t\t\t\t\t\t<td class="{}">{}</td>\n'.format(result_class, format_time(data['frames'])))
-            f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(format_time(min(battles[key]['data']))))
-            f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(format_time(max(battles[key]['data']))))
-            f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(format_time(statistics.median(battles[key]['data']))))
-            f.write('\t\t\t\t\t</tr>\n')
+        if thresholds is not None:
+            result_class = quantiles.classify('battle', key, data['frames'])
 
-    f.write('\t\t\t\t</tbody>\n')
-    f.write('\t\t\t</table>\n')
+            rows.append(RUN_BATTLES_ROW.format(describe_formation(data['formation']), data['strat'] if data['strat'] else '-', result_class, format_time(data['frames']), format_thresholds(thresholds)))
 
+    f.write('\t\t\t<h2>Battles</h2>\n')
+    f.write(RUN_BATTLES_TABLE.format(''.join(rows)))
 
-def html_output_runs(f: TextIO, logs: list[Log]):
-    f.write('\t\t\t<h2>Runs</h2>\n')
-    f.write('\t\t\t<table class="tablesorter-bootstrap" id="runs">\n')
-    f.write('\t\t\t\t<thead>\n')
-    f.write('\t\t\t\t\t<tr>\n')
-    f.write('\t\t\t\t\t\t<th>Edge Version</th>\n')
-    f.write('\t\t\t\t\t\t<th>Route</th>\n')
-    f.write('\t\t\t\t\t\t<th>Step Seed</th>\n')
-    f.write('\t\t\t\t\t\t<th>RNG Seed</th>\n')
-    f.write('\t\t\t\t\t\t<th>Surprised/Back Attacks</th>\n')
-    f.write('\t\t\t\t\t\t<th>Non-Battle Time</th>\n')
-    f.write('\t\t\t\t\t\t<th>Result</th>\n')
-    f.write('\t\t\t\t\t</tr>\n')
-    f.write('\t\t\t\t</thead>\n')
-    f.write('\t\t\t\t<tbody>\n')
-
-    frames = [log.frames for log in logs if log.success]
+
+def html_output_runs(f: TextIO, log_statistics: LogStatistics):
+    logs = log_statistics.logs
+    quantiles = log_statistics.quantiles
+    rows = []
 
     for log in sorted(logs, key=lambda x: x.frames if x.frames else (10 ** 8) - x.last_frame):
         if log.success:
-            if log.frames < sorted(frames)[int(len(frames) * 0.3333)]:
-                result_class = 'text-success'
-            elif log.frames < sorted(frames)[int(len(frames) * 0.6667)]:
-                result_class = 'text-warning'
-            else:
-                result_class = 'text-danger'
+            result_class = quantiles.classify('run', None, log.frames)
         else:
             result_class = 'text-danger bold'
 
-        f.write('\t\t\t\t\t<tr>\n')
-        f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(log.version))
-        f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(log.route))
-        f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(log.step_seed))
-        f.write('\t\t\t\t\t\t<td><a href="runs/{}-{:03}-{:010}.html">{}</a></td>\n'.format(log.route, log.step_seed, log.rng_seed, log.rng_seed))
-        f.write('\t\t\t\t\t\t<td data-text="{}">{} / {} ({:.3f}%)</td>\n'.format(log.back_attack_count / log.random_battle_count if log.random_battle_count > 0 else 100, log.back_attack_count, log.random_battle_count, log.back_attack_count * 100 / log.random_battle_count if log.random_battle_count > 0 else 100))
-        f.write('\t\t\t\t\t\t<td>{}</td>\n'.format(format_time(log.non_battle_frames) if log.non_battle_frames else 'N/A'))
-        f.write('\t\t\t\t\t\t<td data-text="{}" class="{}">{}</td>\n'.format(log.frames if log.frames else (10 ** 8) - log.last_frame, result_class, log.result))
-        f.write('\t\t\t\t\t</tr>\n')
+        rows.append(RUNS_ROW.format(
+            log.version,
+            log.route,
+            log.step_seed,
+            log.route,
+            log.step_seed,
+            log.rng_seed,
+            log.rng_seed,
+            log.back_attack_count / log.random_battle_count if log.random_battle_count > 0 else 100,
+            log.back_attack_count,
+            log.random_battle_count,
+            log.back_attack_count * 100 / log.random_battle_count if log.random_battle_count > 0 else 100,
+            format_time(log.non_battle_frames) if log.non_battle_frames else 'N/A',
+            log.frames if log.frames else (10 ** 8) - log.last_frame,
+            result_class,
+            log.result,
+        ))
 
-    f.write('\t\t\t\t</tbody>\n')
-    f.write('\t\t\t</table>\n')
+    f.write('\t\t\t<h2>Runs</h2>\n')
+    f.write(RUNS_TABLE.format(''.join(rows)))
 
     f.write('\t\t\t<h2>Finished Runs Plot</h2>\n')
     f.write('\t\t\t<img src="img/runs.png">')
@@ -1156,67 +3270,753 @@ def html_output_runs(f: TextIO, logs: list[Log]):
     f.write('\t\t\t<img src="img/seeds.png">')
 
 
+def render_index(log_statistics: LogStatistics) -> str:
+    page = io.StringIO()
+    page.write(HTML_HEADER)
+    html_output_basic_statistics(page, log_statistics)
+    html_output_splits(page, log_statistics)
+    html_output_battles(page, log_statistics)
+    html_output_seeds(page, log_statistics)
+    html_output_runs(page, log_statistics)
+    page.write(HTML_FOOTER)
+
+    return page.getvalue()
+
+
+def render_battle(key: str, battle_data: dict[tuple[str, str, str], Any], agility_battle_data: dict[tuple[str, str, str], Any], speed_battle_data: dict[tuple[str, str, str], Any]) -> str:
+    page = io.StringIO()
+    page.write(HTML_HEADER)
+    html_output_battle(page, key, battle_data, agility_battle_data, speed_battle_data)
+    page.write(HTML_FOOTER)
+
+    return page.getvalue()
+
+
+def render_run(quantiles: QuantileIndex, log: Log) -> str:
+    page = io.StringIO()
+    page.write(HTML_HEADER)
+    html_output_run(page, quantiles, log)
+    page.write(HTML_FOOTER)
+
+    return page.getvalue()
+
+
 #
-# Main Execution
+# Loading Functions
 #
 
-logs: list[Log] = []
+def open_log(filename: str) -> IO[bytes]:
+    """Opens a possibly compressed file, detecting the compression from its first bytes."""
+
+    f = open(filename, 'rb')
+    magic = f.read(6)
+    f.seek(0)
+
+    if magic.startswith(b'\x1f\x8b'):
+        return gzip.GzipFile(fileobj=f, mode='rb')  # type: ignore
+    elif magic.startswith(b'\xfd7zXZ\x00'):
+        return lzma.LZMAFile(f, 'rb')  # type: ignore
+    elif magic.startswith(b'BZh'):
+        return bz2.BZ2File(f, 'rb')  # type: ignore
+    else:
+        return f
+
+
+def read_buffers(f: IO[bytes]) -> Iterator[bytes]:
+    """Yields the contents of a file in buffers of whole lines, for Log.feed_buffer."""
+
+    pending = b''
 
-if not os.path.exists(sys.argv[1]):
-    print('Output directory must exist.')
-    sys.exit(1)
+    while True:
+        data = f.read(READ_BUFFER_SIZE)
 
-for filename in sys.argv[2:]:
-    log = Log(filename)
+        if not data:
+            break
 
-    if log.valid:
-        logs.append(log)
+        data = pending + data
+        end = data.rfind(b'\n') + 1
+        pending = data[end:]
+
+        if end > 0:
+            yield data[:end]
+
+    if pending:
+        yield pending
+
+
+def map_file(f: IO[bytes]) -> Iterator[mmap.mmap]:
+    """Yields an uncompressed file as a single memory-mapped buffer."""
+
+    if os.fstat(f.fileno()).st_size > 0:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
+
+
+def read_tail(filename: str, size: int = 1 << 16) -> bytes:
+    """Returns the whole lines in about the last size bytes of a possibly compressed file."""
+
+    with open_log(filename) as f:
+        if isinstance(f, io.BufferedReader):
+            offset = max(0, os.fstat(f.fileno()).st_size - size)
+            f.seek(offset)
+            data = f.read()
+        else:
+            data = b''
+            offset = 0
+
+            for buffer in read_buffers(f):
+                offset += max(0, len(data) + len(buffer) - size)
+                data = (data + buffer)[-size:]
+
+    return data[data.find(b'\n') + 1:] if offset > 0 else data
+
+
+def get_event_filename(filename: str) -> Optional[str]:
+    """Returns the name of the event file written alongside a log, e.g. "x.events" for "x.log" or "x.events.gz" for "x.log.gz"."""
+
+    root, extension = os.path.splitext(filename)
+
+    if extension == '.log':
+        return root + '.events'
+    elif root.endswith('.log'):
+        return root[:-4] + '.events' + extension
     else:
-        print('WARNING: {} is not a valid log.'.format(filename))
+        return None
 
-with open(os.path.join(sys.argv[1], 'index.html'), 'w') as f:
-    html_output_header(f)
-    html_output_basic_statistics(f, logs)
-    html_output_splits(f, logs)
-    html_output_battles(f, logs)
-    html_output_seeds(f, logs)
-    html_output_runs(f, logs)
-    html_output_footer(f)
 
-splits = get_split_data(logs, False)
-battles = get_battle_data(logs, False)
+def read_events(filename: str) -> Optional[list[list[Any]]]:
+    """Returns the records of the event file written alongside a log.
 
-os.mkdir(os.path.join(sys.argv[1], 'img'))
-os.mkdir(os.path.join(sys.argv[1], 'runs'))
+    An event file is a JSON array per line: a header of "edge-events" and the
+    schema version, and then the frame, type and fields of each event. None is
+    returned if there is no event file, if it is incomplete or if its schema
+    version is not EVENT_SCHEMA_VERSION.
+    """
 
-img_output_runs(os.path.join(sys.argv[1], 'img', 'runs.png'), logs)
-img_output_runs(os.path.join(sys.argv[1], 'img', 'seeds.png'), logs, True)
+    event_filename = get_event_filename(filename)
 
-for log in logs:
-    with open(os.path.join(sys.argv[1], 'runs', '{}-{:03}-{:010}.html'.format(log.route, log.step_seed, log.rng_seed)), 'w') as f:
-        html_output_header(f)
-        html_output_run(f, splits, battles, log)
-        html_output_footer(f)
+    if event_filename is None or not os.path.isfile(event_filename):
+        return None
 
-battles = get_battle_data(logs, True)
+    with open_log(event_filename) as f:
+        data = f.read()
 
-os.mkdir(os.path.join(sys.argv[1], 'battles'))
+    try:
+        records = json.loads(b'[' + b','.join(data.splitlines()) + b']')
+    except ValueError:
+        return None
 
-agility_data = get_battle_data(logs, True, agility=True)
+    if len(records) == 0 or records[0] != ['edge-events', EVENT_SCHEMA_VERSION]:
+        return None
 
-for key, data in battles.items():
-    with open(os.path.join(sys.argv[1], 'battles', '{}.html'.format(key)), 'w') as f:
-        html_output_header(f)
-        html_output_battle(f, key, data, agility_data[key])
-        html_output_footer(f)
+    return records[1:]
 
-battles = get_battle_data(logs, False, False)
 
-os.mkdir(os.path.join(sys.argv[1], 'battles', 'img'))
+def read_logs(filename: str) -> Iterator[tuple[str, Iterable[Union[bytes, mmap.mmap]]]]:
+    """Yields the name and contents of each log in a file.
 
-for key, data in battles.items():
-    if len(data['strat']) > 0:
-        for strat in data['strat']:
-            img_output_battle(os.path.join(sys.argv[1], 'battles', 'img', '{}-{}.png'.format(key, strat)), key, data)
+    A file is either a single log or a tar or zip archive of logs, and may be
+    compressed with gzip, xz or bzip2. Archive members are streamed one after
+    another without being extracted, and are named by joining the archive's
+    filename and the member's name with ARCHIVE_SEPARATOR. Uncompressed logs are
+    memory-mapped, and everything else is read in large buffers.
+    """
+
+    with open(filename, 'rb') as f:
+        is_zip = f.read(4) == b'PK\x03\x04'
+
+    if is_zip:
+        with zipfile.ZipFile(filename) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and info.filename.endswith('.log'):
+                    with archive.open(info) as member:
+                        yield ARCHIVE_SEPARATOR.join([filename, info.filename]), read_buffers(member)
+
+        return
+
+    with open_log(filename) as raw, io.BufferedReader(raw) as stream:  # type: ignore
+        header = stream.peek(512)[:512]
+
+        if len(header) >= 262 and header[257:262] == b'ustar':
+            with tarfile.open(fileobj=stream, mode='r|') as archive:
+                for member in archive:
+                    if member.isfile() and member.name.endswith('.log'):
+                        member_file = archive.extractfile(member)
+                        assert(member_file is not None)
+                        yield ARCHIVE_SEPARATOR.join([filename, member.name]), read_buffers(member_file)
+        elif isinstance(raw, io.BufferedReader):
+            yield filename, map_file(raw)
+        else:
+            yield filename, read_buffers(stream)
+
+
+def load_log(filename: str, log_filter: Optional[LogFilter] = None, actions: bool = False) -> list[tuple[str, Optional[Log], Optional[str], str]]:
+    results: list[tuple[str, Optional[Log], Optional[str], str]] = []
+    output = io.StringIO()
+    name = filename
+
+    try:
+        for name, buffers in read_logs(filename):
+            if log_filter is not None:
+                buffers = log_filter.filter_buffers(name, buffers)  # type: ignore
+
+                if buffers is None:
+                    continue
+
+            with contextlib.redirect_stdout(output):
+                try:
+                    log = Log(name, parse=False, actions=actions)
+
+                    if name != filename or not log.parse_events(filename):
+                        for data in buffers:
+                            log.feed_buffer(data)
+
+                    results.append((name, log, None, output.getvalue()))
+                except (AssertionError, KeyError, ValueError) as e:
+                    results.append((name, None, 'malformed log ({})'.format(type(e).__name__), output.getvalue()))
+
+            output = io.StringIO()
+    except (OSError, EOFError, UnicodeDecodeError, lzma.LZMAError, tarfile.TarError, zipfile.BadZipFile) as e:
+        results.append((name, None, str(e) or type(e).__name__, output.getvalue()))
+
+    return results
+
+
+def profile_log(filename: str, log_filter: Optional[LogFilter] = None, actions: bool = False) -> tuple[list[tuple[str, Optional[Log], Optional[str], str]], dict[str, Any]]:
+    """Loads the logs in a file as load_log does, along with how long that took."""
+
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    results = load_log(filename, log_filter, actions)
+    wall = time.perf_counter() - wall
+    cpu = time.process_time() - cpu
+
+    # The logs count their lines as they are parsed. Those that could not be
+    # parsed, or were filtered out, are left out.
+    logs = [log for _, log, _, _ in results if log is not None]
+    lines = sum(log.line_count for log in logs)
+    unrecognized = sum(log.unrecognized_count for log in logs)
+
+    return (results, {
+        'file': filename,
+        'bytes': os.path.getsize(filename),
+        'lines': lines,
+        'wall': wall,
+        'cpu': cpu,
+        'lines_per_second': lines / wall if wall > 0 else None,
+        'unrecognized': unrecognized,
+    })
+
+
+def collect_logs(results: Iterable[tuple[str, Optional[Log], Optional[str], str]], verbose: bool = True) -> Iterator[Log]:
+    for filename, log, error, output in results:
+        if verbose:
+            sys.stdout.write(output)
+
+        if error is not None:
+            if verbose:
+                print('ERROR: {} could not be parsed: {}'.format(filename, error))
+        elif log is not None and log.valid:
+            yield log
+        elif verbose:
+            print('WARNING: {} is not a valid log.'.format(filename))
+
+
+def parse_logs(filenames: list[str], jobs: int = 1, profiler: Optional[Profiler] = None, log_filter: Optional[LogFilter] = None, actions: bool = False) -> Iterator[list[tuple[str, Optional[Log], Optional[str], str]]]:
+    """Yields the results of loading each file, in order, as they become available.
+
+    With a filter, the results for a file hold only the logs it keeps. With
+    actions, each log records the actions of its battles.
+    """
+
+    def unpack(results: Iterator[Any]):
+        for result in results:
+            if profiler is not None and profiler.enabled:
+                result, record = result
+                profiler.add_file(record)
+
+            yield result
+
+    worker: Callable[[str], Any] = profile_log if profiler is not None and profiler.enabled else load_log
+
+    if log_filter is not None or actions:
+        worker = functools.partial(worker, log_filter=log_filter, actions=actions)
+
+    if jobs > 1 and len(filenames) > 1:
+        with multiprocessing.Pool(jobs) as pool:
+            yield from unpack(pool.imap(worker, filenames, chunksize=max(1, min(64, len(filenames) // (jobs * 4)))))
     else:
-        img_output_battle(os.path.join(sys.argv[1], 'battles', 'img', '{}.png'.format(key)), key, data)
+        yield from unpack(map(worker, filenames))
+
+
+def iterate_logs(filenames: list[str], jobs: int = 1, verbose: bool = True, profiler: Optional[Profiler] = None, log_filter: Optional[LogFilter] = None) -> Iterator[Log]:
+    """Yields the valid logs in the files without keeping them, for streaming."""
+
+    if log_filter is not None:
+        filenames = log_filter.select(filenames)
+
+    return collect_logs((result for source in parse_logs(filenames, jobs, profiler, log_filter) for result in source), verbose)
+
+
+def load_logs(filenames: list[str], jobs: int = 1, cache: Optional[LogCache] = None, profiler: Optional[Profiler] = None, log_filter: Optional[LogFilter] = None, actions: bool = False) -> list[Log]:
+    # The cache holds every log in a file, so it cannot be given a file's
+    # results after a filter has left some of them out.
+    assert(cache is None or log_filter is None)
+
+    if log_filter is not None:
+        filenames = log_filter.select(filenames)
+
+    results = [cache.get(filename, actions) if cache else None for filename in filenames]
+    parsed = iter(parse_logs([filename for filename, result in zip(filenames, results) if result is None], jobs, profiler, log_filter, actions))
+    values: dict[tuple[int, ...], tuple[int, ...]] = {}
+
+    for index, result in enumerate(results):
+        if result is None:
+            result = results[index] = next(parsed)
+
+            if cache and all(log is not None for _, log, _, _ in result):
+                cache.put(filenames[index], result)
+
+        share_values((log for _, log, _, _ in result if log is not None), values)
+
+    if cache:
+        cache.save()
+
+    return list(collect_logs(result for source in results for result in source))  # type: ignore
+
+
+def summarize_logs(filenames: list[str], jobs: int = 1, profiler: Optional[Profiler] = None, log_filter: Optional[LogFilter] = None) -> StreamingStatistics:
+    """Aggregates the logs one at a time into a partial aggregate, which can be saved and merged with others."""
+
+    log_statistics = StreamingStatistics(pages=True)
+
+    for log in iterate_logs(filenames, jobs, profiler=profiler, log_filter=log_filter):
+        log_statistics.add(log)
+
+    return log_statistics
+
+
+def merge_aggregates(filenames: list[str]) -> StreamingStatistics:
+    log_statistics = StreamingStatistics(pages=True)
+
+    for filename in filenames:
+        try:
+            log_statistics.merge(StreamingStatistics.load(filename))
+        except (OSError, EOFError, ValueError, KeyError) as e:
+            raise ValueError('{} could not be read: {}'.format(filename, e)) from e
+
+    return log_statistics
+
+
+#
+# Report Functions
+#
+
+def write_summary(directory: str, log_statistics: LogStatistics, manifest: ReportManifest, images: bool = True, formations: Optional[set[int]] = None):
+    """Writes the index and battle pages, and returns the plots that need to be rendered.
+
+    Without images, no plots are returned and the images already in the
+    report are left as they are. With formations, only the battle pages and
+    images of those formations are checked.
+    """
+
+    for subdirectory in ['img', 'runs', 'battles', os.path.join('battles', 'img')]:
+        os.makedirs(os.path.join(directory, subdirectory), exist_ok=True)
+
+    logs = log_statistics.logs
+
+    write_page(os.path.join(directory, 'index.html'), render_index(log_statistics))
+
+    digest = get_digest(sorted((log.route, log.step_seed, log.frames) for log in logs if log.success))
+    filenames = ['img/runs.png', 'img/seeds.png']
+
+    plots: list[tuple[list[str], tuple[str, str, dict[str, list[float]], bool]]] = []
+
+    if images and not manifest.is_current('images', filenames, digest):
+        plots.append(([os.path.join(directory, filenames[0])], get_runs_plot(logs)))
+        plots.append(([os.path.join(directory, filenames[1])], get_runs_plot(logs, True)))
+        manifest.update('images', filenames, digest)
+
+    battles = log_statistics.get_battle_data(True)
+    agility_data = log_statistics.get_battle_data(True, agility=True)
+    speed_data: Optional[dict[str, Any]] = None
+
+    for key, data in battles.items():
+        if formations is not None and int(key.split('-', 1)[0]) not in formations:
+            continue
+
+        filename = 'battles/{}.html'.format(key)
+        digest = get_digest([data, agility_data[key]])
+
+        if not manifest.is_current('battles', [filename], digest):
+            if speed_data is None:
+                speed_data = log_statistics.get_battle_data(True, relative_speed=True)
+
+            write_page(os.path.join(directory, filename), render_battle(key, data, agility_data[key], speed_data[key]))
+
+            manifest.update('battles', [filename], digest)
+
+    battles = log_statistics.get_battle_data(False, False) if images else {}
+
+    for key, data in battles.items():
+        if formations is not None and data['formation'] not in formations:
+            continue
+
+        if len(data['strat']) > 0:
+            filenames = ['battles/img/{}-{}.png'.format(key, strat) for strat in data['strat']]
+        else:
+            filenames = ['battles/img/{}.png'.format(key)]
+
+        digest = get_digest(data)
+
+        if not manifest.is_current('images', filenames, digest):
+            plots.append(([os.path.join(directory, filename) for filename in filenames], get_battle_plot(data)))
+            manifest.update('images', filenames, digest)
+
+    return plots
+
+
+def write_runs(directory: str, logs: Iterable[Log], quantiles: QuantileIndex, manifest: ReportManifest):
+    # Run pages compare the run against every other run, but a finished run's
+    # page is only written once when updating incrementally. Its comparison
+    # columns therefore reflect the logs available when it was first written.
+    for log in logs:
+        filename = 'runs/{}-{:03}-{:010}.html'.format(log.route, log.step_seed, log.rng_seed)
+        digest = get_digest([log.version, log.splits, log.battles])
+
+        if not manifest.is_current('runs', [filename], digest):
+            write_page(os.path.join(directory, filename), render_run(quantiles, log))
+
+            manifest.update('runs', [filename], digest)
+
+
+def write_report(directory: str, log_statistics: LogStatistics, manifest: ReportManifest, jobs: int = 1, images: bool = True, profiler: Optional[Profiler] = None):
+    profiler = profiler or Profiler()
+
+    with profiler.stage('aggregate'):
+        log_statistics.aggregate()
+
+    with profiler.stage('summary'):
+        plots = write_summary(directory, log_statistics, manifest, images)
+
+    with profiler.stage('runs'):
+        write_runs(directory, log_statistics.logs, log_statistics.quantiles, manifest)
+
+    with profiler.stage('images'):
+        img_output_plots(plots, jobs)
+
+    # Without images, those of the previous report are left as they are.
+    manifest.remove_stale(['runs', 'battles', 'images'] if images else ['runs', 'battles'])
+    manifest.save()
+
+
+def write_changes(directory: str, log_statistics: LogStatistics, logs: list[Log], formations: set[int], manifest: ReportManifest, jobs: int = 1, images: bool = True, profiler: Optional[Profiler] = None):
+    """Updates a report written by write_report after some of its logs changed.
+
+    Only the index, the run pages of the changed logs, and the battle pages
+    and images of the formations they have (or had) are checked. The rest of
+    the report is left as it is, so nothing is removed.
+    """
+
+    profiler = profiler or Profiler()
+
+    with profiler.stage('aggregate'):
+        log_statistics.aggregate()
+
+    with profiler.stage('summary'):
+        plots = write_summary(directory, log_statistics, manifest, images, formations)
+
+    with profiler.stage('runs'):
+        write_runs(directory, logs, log_statistics.quantiles, manifest)
+
+    with profiler.stage('images'):
+        img_output_plots(plots, jobs)
+
+    manifest.save()
+
+
+def write_streaming_report(directory: str, filenames: list[str], manifest: ReportManifest, jobs: int = 1, images: bool = True, profiler: Optional[Profiler] = None, log_filter: Optional[LogFilter] = None):
+    """Writes a report while holding only one log in memory at a time.
+
+    Each log is parsed once, into StreamingStatistics with pages, which keeps a
+    RunRecord of the splits and battle times the run's page shows.
+    """
+
+    profiler = profiler or Profiler()
+    log_statistics = StreamingStatistics(pages=True)
+
+    with profiler.stage('parse'):
+        for log in iterate_logs(filenames, jobs, profiler=profiler, log_filter=log_filter):
+            log_statistics.add(log)
+
+    with profiler.stage('aggregate'):
+        log_statistics.aggregate()
+
+    with profiler.stage('summary'):
+        plots = write_summary(directory, log_statistics, manifest, images)
+
+    with profiler.stage('runs'):
+        write_runs(directory, log_statistics.logs, log_statistics.quantiles, manifest)
+
+    with profiler.stage('images'):
+        img_output_plots(plots, jobs)
+
+    # Without images, those of the previous report are left as they are.
+    manifest.remove_stale(['runs', 'battles', 'images'] if images else ['runs', 'battles'])
+    manifest.save()
+
+
+#
+# Library
+#
+# A LogCollection keeps a parsed set of logs in memory, so that a long-lived
+# process can answer any number of questions about them, or write any number
+# of reports, while parsing them only once.
+#
+
+class LogCollection(object):
+    def __init__(self, logs: Optional[Iterable[Log]] = None):
+        self._logs: list[Log] = list(logs) if logs is not None else []
+        self._statistics: Optional[LogStatistics] = None
+
+    @classmethod
+    def load(cls, filenames: list[str], jobs: int = 1, cache: Optional[str] = None, profiler: Optional[Profiler] = None, database: Optional[str] = None, log_filter: Optional[LogFilter] = None, actions: bool = False) -> 'LogCollection':
+        """Parses the valid logs in the files, using and updating the cache in the given directory if there is one.
+
+        With a database, the files that are new or have changed are stored in
+        it instead, and the collection holds every run in the database. A
+        filter cannot be combined with either. With actions, the actions of
+        every battle are kept too (see the actions property), which makes
+        parsing slower.
+        """
+
+        if database is None:
+            return cls(load_logs(filenames, jobs, LogCache(cache) if cache else None, profiler, log_filter, actions))
+
+        assert(log_filter is None and not actions)
+
+        with contextlib.closing(LogDatabase(database)) as store:
+            store.update(filenames, jobs, profiler)
+            return cls(store.get_logs())
+
+    def __len__(self):
+        return len(self._logs)
+
+    def __iter__(self):
+        return iter(self._logs)
+
+    @property
+    def logs(self):
+        return self._logs
+
+    @property
+    def statistics(self) -> LogStatistics:
+        """The aggregates of the logs, which are computed when first used and kept until logs are added."""
+
+        if self._statistics is None:
+            self._statistics = LogStatistics(self._logs)
+
+        return self._statistics
+
+    def add(self, logs: Iterable[Log]):
+        self._logs.extend(logs)
+        self._statistics = None
+
+    def filter(self, predicate: Callable[[Log], bool]) -> 'LogCollection':
+        return LogCollection(log for log in self._logs if predicate(log))
+
+    def get_splits(self, cumulative: bool = True) -> dict[str, list[int]]:
+        return self.statistics.get_split_data(cumulative)
+
+    def get_battles(self, classified: bool = False, strat: bool = True, agility: bool = False, relative_speed: bool = False):
+        return self.statistics.get_battle_data(classified, strat, agility, relative_speed)
+
+    def get_battle_summary(self):
+        return self.statistics.get_battle_summary()
+
+    def get_seeds(self):
+        return self.statistics.seeds
+
+    @property
+    def actions(self) -> ActionTable:
+        return self.statistics.actions
+
+    def render_index(self) -> str:
+        return render_index(self.statistics)
+
+    def render_battle(self, key: str) -> str:
+        statistics = self.statistics
+        return render_battle(key, statistics.get_battle_data(True)[key], statistics.get_battle_data(True, agility=True)[key], statistics.get_battle_data(True, relative_speed=True)[key])
+
+    def render_run(self, log: Log) -> str:
+        return render_run(self.statistics.quantiles, log)
+
+    def write_report(self, directory: str, incremental: bool = False, jobs: int = 1, images: bool = True, profiler: Optional[Profiler] = None):
+        os.makedirs(directory, exist_ok=True)
+        write_report(directory, self.statistics, ReportManifest(directory, incremental), jobs, images, profiler)
+
+
+#
+# Main Execution
+#
+
+def follow_report(directory: str, logs: list[Log], follower: LogFollower, interval: float, jobs: int = 1, images: bool = True, profiler: Optional[Profiler] = None):
+    """Updates the report whenever the followed logs change, until interrupted.
+
+    The logs given and the followed logs are kept in one LogStatistics, by
+    resolved path, so that a followed log that was also given is only counted
+    once. Each change replaces just that log, and after the first report only
+    the pages the changed logs affect are updated (see write_changes).
+    """
+
+    manifest = ReportManifest(directory, True)
+    log_statistics = LogStatistics([])
+    paths: list[str] = []
+    written = False
+
+    for log in logs:
+        if os.path.realpath(log.filename) not in paths:
+            log_statistics.splice(len(paths), len(paths), [log])
+            paths.append(os.path.realpath(log.filename))
+
+    # The battle table is kept, so that each change only reads the battles of
+    # the changed log into it.
+    log_statistics.table
+
+    try:
+        while True:
+            changed = follower.poll()
+            updated: list[Log] = []
+            formations: set[int] = set()
+
+            for filename in changed:
+                path = os.path.realpath(filename)
+                start = paths.index(path) if path in paths else len(paths)
+                stop = start + 1 if path in paths else start
+                log = follower.get(filename)
+                new = [log] if log is not None else []
+
+                for old in log_statistics.logs[start:stop] + new:
+                    formations.update(battle['formation'] for battle in old.battles)
+
+                log_statistics.splice(start, stop, new)
+                paths[start:stop] = [path] * len(new)
+                updated += new
+
+            if changed or not written or not os.path.exists(os.path.join(directory, 'index.html')):
+                if written and os.path.exists(os.path.join(directory, 'index.html')):
+                    write_changes(directory, log_statistics, updated, formations, manifest, jobs, images, profiler)
+                else:
+                    write_report(directory, log_statistics, manifest, jobs, images, profiler)
+                    written = True
+
+                print('{}: Updated report for {} changed log(s)'.format(time.strftime('%Y-%m-%d %H:%M:%S'), len(changed)))
+
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+
+def parse_seed_range(value: str) -> tuple[int, int]:
+    first, _, last = value.partition('-')
+
+    try:
+        return (int(first), int(last or first))
+    except ValueError:
+        raise argparse.ArgumentTypeError('invalid seed range: {}'.format(value))
+
+
+def parse_date(value: str) -> datetime.datetime:
+    try:
+        date = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError('invalid date: {}'.format(value))
+
+    return date.astimezone(datetime.timezone.utc).replace(tzinfo=None) if date.tzinfo else date
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate an HTML report from Edge log files.')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='number of processes used to parse logs and render images (default: number of CPUs)')
+    parser.add_argument('--cache', metavar='DIRECTORY', help='directory in which to cache parsed logs between runs')
+    parser.add_argument('--database', metavar='FILE', help='store the parsed logs in the SQLite database FILE, parsing only new and changed logs, and report on every run it holds')
+    parser.add_argument('--incremental', action='store_true', help='only rewrite pages and images whose data changed since the last report in the output directory')
+    parser.add_argument('--follow', metavar='DIRECTORY', help='keep watching DIRECTORY for new and growing logs, updating the report as they change')
+    parser.add_argument('--streaming', action='store_true', help='aggregate the logs one at a time to bound memory use, with approximate medians (see README)')
+    parser.add_argument('--summarize', action='store_true', help='write a partial aggregate of the logs to the file OUTPUT instead of a report, to be merged with --merge')
+    parser.add_argument('--merge', action='store_true', help='read partial aggregates written by --summarize instead of logs, and merge them into a report (or, with --summarize, into another partial aggregate)')
+    parser.add_argument('--interval', type=float, default=60, help='seconds between updates when following (default: 60)')
+    parser.add_argument('--no-images', '--tables-only', dest='images', action='store_false', help='only write the pages, skipping the plots and the time it takes to load matplotlib')
+    parser.add_argument('--profile', metavar='FILE', help='record the time and memory used by each stage and the parse time of each file to FILE as JSON, and print a summary')
+    parser.add_argument('--profile-stage', choices=PROFILE_STAGES, help='also run cProfile over one stage, saving the statistics next to the --profile file with a .prof extension')
+    parser.add_argument('--route', dest='routes', metavar='ROUTE', action='append', help='only analyze logs of ROUTE (may be given more than once)')
+    parser.add_argument('--seeds', type=parse_seed_range, metavar='FIRST[-LAST]', help='only analyze logs with an encounter seed in this range')
+    parser.add_argument('--since', type=parse_date, metavar='DATE', help='only analyze logs started at or after DATE (ISO 8601, UTC unless given)')
+    parser.add_argument('--until', type=parse_date, metavar='DATE', help='only analyze logs started before DATE (ISO 8601, UTC unless given)')
+    parser.add_argument('--version', dest='versions', metavar='VERSION', action='append', help='only analyze logs written by this version of Edge (may be given more than once)')
+    parser.add_argument('output', help='output directory (must exist), or the partial aggregate to write with --summarize')
+    parser.add_argument('logs', nargs='*', help='log files to analyze, or partial aggregates with --merge')
+    args = parser.parse_args()
+
+    if not args.summarize and not os.path.exists(args.output):
+        print('Output directory must exist.')
+        sys.exit(1)
+
+    if args.streaming and (args.cache or args.follow or args.database):
+        print('Streaming cannot be combined with caching, following or a database.')
+        sys.exit(1)
+
+    if (args.summarize or args.merge) and (args.cache or args.follow or args.database):
+        print('Summarizing and merging cannot be combined with caching, following or a database.')
+        sys.exit(1)
+
+    log_filter = None
+
+    if args.routes or args.seeds or args.since or args.until or args.versions:
+        if args.cache or args.follow or args.database or args.merge:
+            print('Filters cannot be combined with caching, following, a database or merging.')
+            sys.exit(1)
+
+        log_filter = LogFilter(args.routes, args.seeds, args.since, args.until, args.versions)
+
+    if args.cache and args.database:
+        print('A database already keeps parsed logs, and cannot be combined with caching.')
+        sys.exit(1)
+
+    if args.profile_stage and not args.profile:
+        print('A profiled stage requires --profile.')
+        sys.exit(1)
+
+    jobs = max(1, args.jobs)
+    profiler = Profiler(args.profile is not None, args.profile_stage, os.path.splitext(args.profile)[0] + '.prof' if args.profile else None)
+
+    if args.summarize or args.merge:
+        with profiler.stage('parse'):
+            try:
+                log_statistics = merge_aggregates(args.logs) if args.merge else summarize_logs(args.logs, jobs, profiler, log_filter)
+            except ValueError as e:
+                print('ERROR: {}'.format(e))
+                sys.exit(1)
+
+        if args.summarize:
+            log_statistics.save(args.output)
+        else:
+            write_report(args.output, log_statistics, ReportManifest(args.output, args.incremental), jobs, args.images, profiler)
+    elif args.streaming:
+        write_streaming_report(args.output, args.logs, ReportManifest(args.output, args.incremental), jobs, args.images, profiler, log_filter)
+    else:
+        with profiler.stage('parse'):
+            collection = LogCollection.load(args.logs, jobs, args.cache, profiler, args.database, log_filter)
+
+        if args.follow:
+            follow_report(args.output, collection.logs, LogFollower(args.follow), args.interval, jobs, args.images, profiler)
+        else:
+            collection.write_report(args.output, args.incremental, jobs, args.images, profiler)
+
+    if profiler.enabled:
+        profiler.save(args.profile)
+        profiler.print_summary()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,1016 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2015 Jason Lynch <jason@calindora.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from typing import Any, Callable, Optional, Union
+
+import analyzer
+
+
+#
+# Reference Implementations
+#
+
+def legacy_parse_line(line: str) -> tuple[Optional[str], Optional[dict[str, Union[str, Any]]]]:
+    base_regex = '(?P<timestamp>.*) :: (?P<frame>.*) :: (?P<time>.*) :: (?P<game_time>.*) :: '
+
+    regexes = {
+        'battle_action': r'Action: (?P<actor>.*) (?P<action>(uses|casts|attacks) [^ ]*)( and (?P<result>(hits|misses|heals).*))?',
+        'battle_start': r'Battle Start: (?P<description>.*) \((?P<formation>.*)/(?P<type>.*)/(?P<party_level>.*)/(?P<enemy_level>.*)\)',
+        'battle_strat': r'Battle Strat: (?P<strat>.*)',
+        'battle_enemy_agility': r'Enemy Agility: (?P<agility>.*)',
+        'battle_party_formation': r'Party Formation: (?P<formation>.*)',
+        'battle_party_agility': r'Party Agility: (?P<agility>.*)',
+        'battle_stop': r'Battle Complete: (?P<description>.*) \((?P<formation>.*)/(?P<frames>.*) frames/(?P<dropped_gp>.*) GP dropped/(?P<result>.*)\)',
+        'inventory': r'Inventory: .*',
+        'route': r'Route: (?P<route>.*)',
+        'rng_seed': r'RNG Seed: (?P<seed>.*)',
+        'reset_for_time': r'Resetting for time...',
+        'reset_for_chocobo': r'Resetting due to bad yellow chocobo...',
+        'reset_for_fireclaw': r'Resetting due to failed FireClaw dupe...',
+        'reset_for_shield': r'Resetting due to failed shield dupe...',
+        'step_seed': r'Encounter Seed: (?P<seed>.*)',
+        'sequence': r'Sequence: (?P<sequence>.*)',
+        'split': r'Split: (?P<split>.*)',
+        'version': r'Version: (?P<version>.*)',
+        '_ignore': r'(Edge Final Fantasy IV|--------------------|Note:|Action: \(debug\)|Deciding|Kain action|New Map|Beginning Full Run|WARNING|Setting Initial Seed|Yellow Chocobo Coordinates|Current Glitch Floor|Rebooting|Load game screen|New Seed|Setting encounter seed|Detected|Zeromus has|Cecil|Do not have|Battle Menu|Party Experience)',
+    }
+
+    for line_type, regex in regexes.items():
+        matches = re.match(base_regex + regex, line)
+
+        if matches:
+            return (line_type, matches.groupdict())
+
+    print('UNRECOGNIZED LINE: {}'.format(line))
+    return (None, None)
+
+
+def legacy_action_fields(line: str, fields: dict[str, Any]) -> dict[str, Any]:
+    """Maps the fields legacy_parse_line found in an action line to those the current parser finds.
+
+    The legacy regex ended an action at its first space, so "attacks" took
+    the "and" after it and longer action names lost their other words, and
+    left "critically" in the actor. Here the action runs from the verb to the
+    first " and " that is followed by an outcome, which starts the result.
+    """
+
+    fields = dict(fields)
+    actor = fields['actor']
+    critical = actor.endswith(' critically')
+
+    if critical:
+        actor = actor[:-len(' critically')]
+
+    message = line[line.index('Action: ') + len('Action: '):]
+    action = message[len(fields['actor']) + 1:]
+    result = None
+    start = 0
+
+    while action.find(' and ', start) >= 0:
+        index = action.find(' and ', start)
+
+        if action.startswith(('hits ', 'misses ', 'heals ', 'it reflects '), index + len(' and ')):
+            action, result = action[:index], action[index + len(' and '):]
+            break
+
+        start = index + 1
+
+    fields.update({'actor': actor, 'critical': 'critically ' if critical else None, 'action': action, 'result': result})
+    return fields
+
+
+def legacy_read_log(filename: str):
+    log = analyzer.Log(filename, parse=False)
+
+    with analyzer.open_log(filename) as f:
+        for line in f:
+            log.feed(line.decode('utf-8'))
+
+    return log
+
+
+class LegacyLog(object):
+    pass
+
+
+def legacy_copy_log(log: analyzer.Log) -> LegacyLog:
+    """Copies a log into the form logs were kept in before records: each battle and split a dict, each with strings of its own."""
+
+    def copy_value(value: Any) -> Any:
+        if isinstance(value, str):
+            return (value + ' ')[:-1]
+        elif isinstance(value, tuple):
+            return [copy_value(x) for x in value]
+        elif type(value) is int:
+            return value + 0
+        else:
+            return value
+
+    legacy = LegacyLog()
+    legacy.__dict__.update({name: copy_value(value) for name, value in log.state.items()})
+    legacy._battles = [{name: copy_value(value) for name, value in battle.items()} for battle in log.battles]  # type: ignore
+    legacy._splits = {copy_value(name): {'current': copy_value(x['current']), 'total': copy_value(x['total'])} for name, x in log.splits.items()}  # type: ignore
+    return legacy
+
+
+def write_events(filename: str, event_filename: str):
+    """Writes the event file the bot would have written alongside a text log."""
+
+    parser = analyzer.Log.__new__(analyzer.Log)
+    records: list[list[Any]] = [['edge-events', analyzer.EVENT_SCHEMA_VERSION]]
+
+    with open(filename, 'rb') as f, open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for line in f:
+            line_type, fields = parser._match_line(line.decode('utf-8').strip())
+
+            if fields is None:
+                continue
+
+            frame = int(fields['frame'])
+
+            if line_type in ['version', 'route', 'split']:
+                records.append([frame, line_type, fields[line_type]])
+            elif line_type in ['rng_seed', 'step_seed']:
+                records.append([frame, line_type, int(fields['seed'])])
+            elif line_type == 'battle_start':
+                levels = [None if fields[x] == '-' else int(fields[x]) for x in ['party_level', 'enemy_level']]
+                records.append([frame, line_type, int(fields['formation']), fields['type']] + levels)
+            elif line_type == 'battle_strat':
+                records.append([frame, line_type, fields['strat']])
+            elif line_type == 'battle_enemy_agility':
+                records.append([frame, line_type, [int(x) for x in fields['agility'].split()]])
+            elif line_type == 'battle_party_formation':
+                slots = []
+
+                for slot in fields['formation'].split(' / '):
+                    name, _, level = slot.lstrip('*').rpartition(':')
+                    slots.append([name, int(level), slot.startswith('*')] if name else [None, None, slot.startswith('*')])
+
+                records.append([frame, line_type, slots])
+            elif line_type == 'battle_party_agility':
+                slots = []
+
+                for slot in fields['agility'].split(' / '):
+                    name, _, agility = slot.rpartition(':')
+                    slots.append([name, int(agility)] if name else [None, None])
+
+                records.append([frame, line_type, slots])
+            elif line_type == 'battle_action':
+                verb, _, name = fields['action'].partition(' ')
+                result, _, wall_result = (fields['result'] or '').partition(' and it reflects and ')
+
+                if result.startswith('it reflects and '):
+                    result, wall_result = '', result[len('it reflects and '):]
+
+                # Damage codes as the bot writes them: 16384 for a miss and a
+                # negative amount for healing.
+                targets = [[[target, {'misses': 16384, 'heals': -1}.get(outcome, 0), 0] for outcome, target in analyzer.ACTION_TARGET_REGEX.findall(x)] for x in [result, wall_result]]
+                records.append([frame, line_type, fields['actor'], verb, name or None, bool(fields['critical'])] + targets)
+            elif line_type == 'battle_stop':
+                records.append([frame, line_type, int(fields['formation']), int(fields['frames']), int(fields['dropped_gp']), fields['result']])
+            elif line_type.startswith('reset_for_'):
+                records.append([frame, 'reset', line_type[len('reset_for_'):]])
+
+    with open(event_filename, 'w') as f:
+        for record in records:
+            f.write(json.dumps(record, separators=(',', ':')))
+            f.write('\n')
+
+
+#
+# Synthetic Logs
+#
+# Generated logs follow the splits and split times of each route in
+# util/route.lua, with the boss battle between each "Begin" and "End" split,
+# random encounters in between, and the lines util/log.lua writes around them.
+#
+
+BOSS_FORMATIONS = {
+    'D.Mist': 222,
+    'Girl': 236,
+    'Officer/Soldiers': 237,
+    'Octomamm': 223,
+    'Antlion': 224,
+    'WaterHag': 239,
+    'MomBomb': 225,
+    'Dragoon': 241,
+    'Milon': 226,
+    'Milon Z.': 227,
+    'Guards': 250,
+    'Karate': 242,
+    'Baigan': 228,
+    'Kainazzo': 229,
+    'Dark Elf': 231,
+    'FlameDog': 451,
+    'Magus Sisters': 232,
+    'Valvalis': 234,
+    'Calbrena': 423,
+    'Golbez': 438,
+    'Dr.Lugae/Balnab': 425,
+    'Dr.Lugae': 437,
+    'Dark Imps': 256,
+    'K.Eblan/Q.Eblan': 254,
+    'Rubicant': 255,
+    'Grind Fight': 200,
+    'Elements': 220,
+    'CPU': 221,
+    'Zemus': 435,
+    'Zeromus': 439,
+}
+
+RANDOM_FORMATIONS = [
+    (42, 'Unknown'),
+    (109, 'Unknown'),
+    (111, 'Unknown'),
+    (117, 'Unknown'),
+    (247, 'General/Fighters'),
+    (248, 'Weeper/WaterHag/Imp'),
+    (249, 'Gargoyle'),
+    (344, 'Unknown'),
+    (345, 'Unknown'),
+    (409, 'Red D. x1'),
+]
+
+MOON_FORMATIONS = [
+    (368, 'MoonCell x2, Pudding x2'),
+    (370, 'Juclyote x2, MoonCell x2, Grenade x1'),
+    (372, 'Procyote x1, Pudding x2'),
+    (375, 'Red Worm x2'),
+    (444, 'Pudding x2, Grenade x2'),
+]
+
+# Battle strats as chosen by ai/sequence.lua, by formation and then by route
+# for the formations whose strat depends on it.
+BATTLE_STRATS: dict[int, Union[list[str], dict[str, list[str]]]] = {
+    222: ['six-initial', 'seven-initial'],
+    223: ['{}-tellah-{}'.format(kind, i) for i in range(1, 9) for kind in ['change', 'staff']],
+    226: ['carrot', 'twin', 'twin_changeless'],
+    227: ['trashcan'],
+    200: {'no64-excalbur': ['excalbur-battle-speed-2'], 'no64-rosa': ['rosa-battle-speed-2']},
+    220: {'no64-excalbur': ['excalbur', 'excalbur-slow'], 'no64-rosa': ['rosa']},
+    221: {'no64-excalbur': ['excalbur-quake'], 'no64-rosa': ['rosa']},
+    439: {'no64-excalbur': ['no64-excalbur'], 'no64-rosa': ['no64-rosa'], 'nocw': ['nocw']},
+}
+
+# The party by the first split at which it is in place.
+PARTIES = [
+    ('Start', ['Cecil', 'Kain']),
+    ('D.Mist End', ['Cecil', 'Rydia']),
+    ('Tellah', ['Cecil', 'Rydia', 'Tellah']),
+    ('Edward', ['Cecil', 'Rydia', 'Tellah', 'Edward']),
+    ('Fabul Entrance', ['Cecil', 'Tellah', 'Edward', 'Yang']),
+    ('Twins', ['Cecil', 'Tellah', 'Palom', 'Porom']),
+    ('Paladin', ['Cecil', 'Tellah', 'Palom', 'Porom']),
+    ('Guards Begin', ['Cecil', 'Yang', 'Cid', 'Tellah']),
+    ('Magus Sisters Begin', ['Cecil', 'Kain', 'Rosa', 'Tellah', 'Yang']),
+    ('Edge', ['Cecil', 'Kain', 'Rosa', 'Rydia', 'Edge']),
+    ('FuSoYa', ['Cecil', 'Kain', 'Rosa', 'Rydia', 'FuSoYa']),
+    ('Lost the Dark Crystal!', ['Cecil', 'Kain', 'Rosa', 'Rydia', 'Edge']),
+]
+
+ACTIONS = [
+    ('attacks', None),
+    ('casts', 'Fire2'),
+    ('casts', 'Cure2'),
+    ('uses', 'Fight'),
+    ('uses', 'Jump'),
+    ('uses', 'Potion'),
+    ('uses', 'Carrot'),
+    ('uses', 'TrashCan'),
+]
+
+NOISE = [
+    'Inventory: Swapping slots {} and {}',
+    'Battle Menu: {}',
+    'New Map: 0x{:01X}{:03X} / Encounter Seed: {} @ {} / Formation Seed: {} @ {}',
+]
+
+
+def read_route_splits(filename: str) -> dict[str, list[tuple[str, int]]]:
+    """Returns the splits of each route in util/route.lua, in the order they happen."""
+
+    with open(filename) as f:
+        text = f.read()
+
+    block = text[text.index('_M.splits = {'):]
+    block = block[:block.index('\n}')]
+    routes = {}
+
+    for route, body in re.findall(r'\t\["([^"]+)"\] = \{[^\n]*\n(.*?)\n\t\}', block, re.S):
+        splits = [(name, int(frames)) for name, frames in re.findall(r'\["([^"]+)"\]\s*=\s*(\d+)', body)]
+        routes[route] = sorted(splits, key=lambda x: x[1])
+
+    return routes
+
+
+class SyntheticLog(object):
+    """Builds a log line by line as util/log.lua would write it."""
+
+    def __init__(self, start: int):
+        self._lines: list[str] = []
+        self._frame = start
+        self._base_frame: Optional[int] = None
+
+    @property
+    def frame(self):
+        return self._frame
+
+    def advance(self, frames: int):
+        self._frame += max(0, frames)
+
+    def log(self, message: str):
+        seconds = self._frame / 60.0988
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S+0000', time.gmtime(1704067200 + seconds))
+
+        if self._base_frame is None:
+            elapsed = '{:>11}'.format('-')
+        else:
+            elapsed_seconds = (self._frame - self._base_frame) * 655171.0 / 39375000
+            elapsed = '{:02.0f}:{:02.0f}:{:05.2f}'.format(elapsed_seconds // 3600, (elapsed_seconds // 60) % 60, elapsed_seconds % 60)
+
+        game_time = '{:02.0f}:{:02.0f}:{:02.0f}.{:02.0f}'.format(seconds // 3600, (seconds // 60) % 60, seconds % 60 // 1, self._frame % 60)
+        self._lines.append('{} :: {:>6} :: {} :: {} :: {}\n'.format(timestamp, self._frame, elapsed, game_time, message))
+
+    def split(self, name: str):
+        if name == 'Start':
+            self._base_frame = self._frame
+
+        self.log('Split: {}'.format(name))
+
+    def write(self, filename: str):
+        with open(filename, 'w') as f:
+            f.writelines(self._lines)
+
+
+def generate_battle(log: SyntheticLog, route: str, formation: int, title: str, party: list[str], frames: int, result: str, rng: random.Random):
+    battle_type = rng.choices(['Normal', 'Strike First', 'Surprised', 'Back Attack'], [85, 5, 5, 5])[0]
+    level = 10 + log.frame // 20000
+    log.log('Battle Start: {} ({}/{}/{}/{})'.format(title, formation, battle_type, level, rng.randint(1, 70)))
+
+    strats = BATTLE_STRATS.get(formation)
+
+    if isinstance(strats, dict):
+        strats = strats.get(route)
+
+    strat = rng.choice(strats) if strats else None
+
+    if strat:
+        log.log('Battle Strat: {}'.format(strat))
+
+    slots: list[Optional[str]] = [party[index] if index < len(party) else None for index in range(5)]
+    agility = {name: 10 + rng.randint(0, 40) for name in party}
+    front = [index in [0, 2, 4] for index in range(5)]
+
+    log.log('Party Formation: {}'.format(' / '.join('{}{}'.format('*' if front[i] else '', '{}:{}'.format(name, level) if name else 'empty') for i, name in enumerate(slots))))
+    log.log('Party Experience: {}'.format(' / '.join('{}:{}'.format(name, level * 1000) if name else 'empty' for name in slots)))
+    log.log('Party Agility: {}'.format(' / '.join('{}:{}'.format(name, agility[name]) if name else 'empty' for name in slots)))
+    log.log('Enemy Agility: {}'.format(' '.join(str(rng.randint(5, 60)) for _ in range(rng.randint(1, 4)))))
+
+    end = log.frame + frames
+    turns = max(1, frames // rng.randint(120, 400))
+
+    for _ in range(turns):
+        log.advance(rng.randint(1, max(1, (end - log.frame) // turns)))
+
+        if rng.random() < 0.2:
+            log.log(NOISE[1].format(rng.choice(party)))
+
+        enemy = rng.random() < 0.4
+        actor = 'Enemy #{}'.format(rng.randint(0, 2)) if enemy else rng.choice(party)
+        verb, name = rng.choice(ACTIONS)
+
+        if (formation, strat) in [(226, 'carrot'), (227, 'trashcan')] and not enemy and rng.random() < 0.3:
+            verb, name = 'uses', analyzer.SUCCESS_ACTIONS[(formation, strat)]
+
+        action = '{} {}'.format(verb, name) if name else verb
+        target = rng.choice(party) if enemy else 'Enemy #0'
+        damage = rng.randint(1, 2000)
+
+        if rng.random() < 0.1:
+            outcome = ' and misses {} ({} HP)'.format(target, rng.randint(1, 9999))
+        else:
+            outcome = ' and hits {} for {} damage ({} HP)'.format(target, damage, rng.randint(0, 9999))
+
+        log.log('Action: (debug) Command: {:02X}  Subcommand: {:02X}  Target Party: {:02X}  Target Monster: {:02X}'.format(rng.randint(0, 0x1F), rng.randint(0, 0xFF), rng.randint(0, 0x1F), rng.randint(0, 0xFF)))
+        log.log('Action: {} {}{}{}'.format(actor, 'critically ' if rng.random() < 0.05 else '', action, outcome))
+
+    log.advance(end - log.frame)
+    log.log('Battle Complete: {} ({}/{} frames/{} GP dropped/{})'.format(title, formation, frames, rng.randint(0, 2000) if result.startswith('Victory') else 0, result))
+
+
+def generate_log(filename: str, route: str, splits: list[tuple[str, int]], step_seed: int, rng_seed: int, rng: random.Random):
+    """Writes a synthetic log of a single run, which may end early by dying or resetting."""
+
+    pace = rng.uniform(1.0, 1.08)
+    log = SyntheticLog(rng.randint(100, 200))
+
+    log.log('Edge Final Fantasy IV Speed Run Bot')
+    log.log('-----------------------------------')
+    log.log('Version: v0.0.9-{}-g{:07x}'.format(rng.randint(60, 90), rng.getrandbits(28)))
+    log.log('Beginning Full Run')
+    log.log('Route: {}'.format(route))
+    log.log('Encounter Seed: {}'.format(step_seed))
+    log.log('RNG Seed: {}'.format(rng_seed))
+
+    ending = rng.choices(['finish', 'death', 'reset'], [70, 20, 10])[0]
+    last = len(splits) if ending == 'finish' else rng.randint(2, len(splits) - 1)
+    party = PARTIES[0][1]
+    parties = dict(PARTIES)
+    base = log.frame
+
+    for index, (name, target) in enumerate(splits[:last]):
+        frame = base + int(target * pace * rng.uniform(0.995, 1.005))
+        boss = name[:-len(' Begin')] if name.endswith(' Begin') else None
+
+        if index > 0 and not name.endswith(' End'):
+            encounters = MOON_FORMATIONS if 'Big Whale' in [x for x, _ in splits[:index]] else RANDOM_FORMATIONS
+
+            for _ in range(rng.randint(0, 4)):
+                log.advance(rng.randint(0, max(0, (frame - log.frame) // 3)))
+                log.log(NOISE[2].format(rng.randint(0, 3), rng.randint(0, 0x1FF), rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255)))
+
+                if frame - log.frame > 2000:
+                    formation, title = rng.choice(encounters)
+                    generate_battle(log, route, formation, title, party, rng.randint(300, min(1800, frame - log.frame - 200)), 'Victory' if rng.random() < 0.95 else 'Ran Away', rng)
+                else:
+                    log.log(NOISE[0].format(rng.randint(0, 47), rng.randint(0, 47)))
+
+            log.advance(frame - log.frame)
+
+        log.split(name)
+        party = parties.get(name, party)
+
+        if boss in BOSS_FORMATIONS:
+            end = dict(splits).get('{} End'.format(boss))
+            next_frame = base + int((end if end else splits[min(index + 1, len(splits) - 1)][1]) * pace)
+            died = ending == 'death' and index >= last - 2
+            generate_battle(log, route, BOSS_FORMATIONS[boss], boss, party, max(300, next_frame - log.frame - 60), 'Perished' if died else 'Victory', rng)
+
+            if died:
+                log.write(filename)
+                return
+
+    if ending == 'reset':
+        log.advance(rng.randint(60, 600))
+        log.log('Resetting for time...')
+
+    log.write(filename)
+
+
+def generate_corpus(directory: str, count: int, seed: int = 0, events: bool = False) -> list[str]:
+    """Writes count synthetic logs to a directory, spread over every route, and returns their filenames."""
+
+    routes = read_route_splits(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'util', 'route.lua'))
+    rng = random.Random(seed)
+    filenames = []
+
+    os.makedirs(directory, exist_ok=True)
+
+    for index in range(count):
+        route = sorted(routes)[index % len(routes)]
+        step_seed = rng.randint(0, 255)
+        rng_seed = rng.randint(0, 2 ** 31 - 1)
+        timestamp = time.strftime('%Y%m%d-%H%M%S', time.gmtime(1704067200 + index * 7200))
+        filename = os.path.join(directory, 'edge-{}-{:03}-{:010}-{}.log'.format(route, step_seed, rng_seed, timestamp))
+
+        generate_log(filename, route, routes[route], step_seed, rng_seed, rng)
+
+        if events:
+            write_events(filename, analyzer.get_event_filename(filename))  # type: ignore
+
+        filenames.append(filename)
+
+    return filenames
+
+
+#
+# Helper Functions
+#
+
+def read_lines(filenames: list[str]):
+    lines: list[str] = []
+
+    for filename in filenames:
+        with open(filename) as f:
+            lines.extend(line.strip() for line in f)
+
+    return lines
+
+
+def time_parser(parse: Callable[[str], Any], lines: list[str], repeat: int):
+    best = None
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            start = time.perf_counter()
+
+            for line in lines:
+                parse(line)
+
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+    assert(best is not None)
+    return best
+
+
+def time_reader(read: Callable[[str], analyzer.Log], filenames: list[str], repeat: int):
+    best = None
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            start = time.perf_counter()
+
+            for filename in filenames:
+                read(filename)
+
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+    assert(best is not None)
+    return best
+
+
+#
+# Benchmarks
+#
+
+def benchmark_parse(args: argparse.Namespace):
+    lines = read_lines(args.logs)
+    parser = analyzer.Log.__new__(analyzer.Log)
+
+    def matches(line: str):
+        expected, actual = legacy_parse_line(line), parser._parse_line(line)
+
+        if expected[0] == 'battle_action':
+            expected = (expected[0], legacy_action_fields(line, expected[1]))  # type: ignore
+
+        return expected == actual
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        mismatches = [line for line in lines if not matches(line)]
+
+    for line in mismatches[:10]:
+        print('MISMATCH: {}'.format(line))
+
+    legacy = time_parser(legacy_parse_line, lines, args.repeat)
+    current = time_parser(parser._parse_line, lines, args.repeat)
+
+    print('Lines:      {}'.format(len(lines)))
+    print('Mismatches: {}'.format(len(mismatches)))
+    print('Before:     {:.0f} lines/s ({:.3f}s)'.format(len(lines) / legacy, legacy))
+    print('After:      {:.0f} lines/s ({:.3f}s)'.format(len(lines) / current, current))
+    print('Speedup:    {:.1f}x'.format(legacy / current))
+
+    return 1 if mismatches else 0
+
+
+def benchmark_read(args: argparse.Namespace):
+    def read_log(filename: str):
+        log = analyzer.Log(filename, parse=False)
+
+        for _, buffers in analyzer.read_logs(filename):
+            for data in buffers:
+                log.feed_buffer(data)
+
+        return log
+
+    def get_outcome(read: Callable[[str], analyzer.Log], filename: str):
+        try:
+            return read(filename).state
+        except (AssertionError, KeyError, ValueError) as e:
+            return type(e).__name__
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        outcomes = [(filename, get_outcome(legacy_read_log, filename), get_outcome(read_log, filename)) for filename in args.logs]
+
+    mismatches = [filename for filename, expected, actual in outcomes if expected != actual]
+
+    # Logs that fail to parse are only checked, as they stop being read early.
+    filenames = [filename for filename, expected, _ in outcomes if isinstance(expected, dict)]
+
+    for filename in mismatches[:10]:
+        print('MISMATCH: {}'.format(filename))
+
+    size = sum(os.path.getsize(filename) for filename in filenames) / (1 << 20)
+    legacy = time_reader(legacy_read_log, filenames, args.repeat)
+    current = time_reader(read_log, filenames, args.repeat)
+
+    print('Logs:       {} ({:.1f} MiB)'.format(len(filenames), size))
+    print('Mismatches: {}'.format(len(mismatches)))
+    print('Before:     {:.1f} MiB/s ({:.3f}s)'.format(size / legacy, legacy))
+    print('After:      {:.1f} MiB/s ({:.3f}s)'.format(size / current, current))
+    print('Speedup:    {:.1f}x'.format(legacy / current))
+
+    return 1 if mismatches else 0
+
+
+def benchmark_events(args: argparse.Namespace):
+    def read_text(filename: str):
+        log = analyzer.Log(filename, parse=False, actions=args.actions)
+
+        for _, buffers in analyzer.read_logs(filename):
+            for data in buffers:
+                log.feed_buffer(data)
+
+        return log
+
+    def read_events(filename: str):
+        log = analyzer.Log(filename, parse=False, actions=args.actions)
+        assert(log.parse_events(filename))
+        return log
+
+    def get_state(log: analyzer.Log):
+        state = log.state
+
+        if log.actions is not None:
+            state['_actions'] = list(log.actions.get_rows())
+
+        return state
+
+    with tempfile.TemporaryDirectory() as directory:
+        filenames = []
+
+        for filename in args.logs:
+            copy = os.path.join(directory, os.path.basename(filename))
+            shutil.copyfile(filename, copy)
+            write_events(copy, analyzer.get_event_filename(copy))  # type: ignore
+            filenames.append(copy)
+
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            mismatches = [filename for filename in filenames if get_state(read_text(filename)) != get_state(read_events(filename))]
+
+        for filename in mismatches[:10]:
+            print('MISMATCH: {}'.format(os.path.basename(filename)))
+
+        size = sum(os.path.getsize(filename) for filename in filenames) / (1 << 20)
+        event_size = sum(os.path.getsize(analyzer.get_event_filename(filename)) for filename in filenames) / (1 << 20)  # type: ignore
+        text = time_reader(read_text, filenames, args.repeat)
+        events = time_reader(read_events, filenames, args.repeat)
+
+    print('Logs:       {} ({:.1f} MiB, with {:.1f} MiB of events)'.format(len(filenames), size, event_size))
+    print('Mismatches: {}'.format(len(mismatches)))
+    print('Text:       {:.0f} logs/s ({:.3f}s)'.format(len(filenames) / text, text))
+    print('Events:     {:.0f} logs/s ({:.3f}s)'.format(len(filenames) / events, events))
+    print('Speedup:    {:.1f}x'.format(text / events))
+
+    return 1 if mismatches else 0
+
+
+def benchmark_startup(args: argparse.Namespace):
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'analyzer.py')
+    commands = [
+        ('Interpreter', [sys.executable, '-c', 'pass']),
+        ('Import', [sys.executable, '-c', 'import sys; sys.path.insert(0, sys.argv[1]); import analyzer', os.path.dirname(script)]),
+        ('Help', [sys.executable, script, '--help']),
+    ]
+    times = {}
+
+    for name, command in commands:
+        best = None
+
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        times[name] = best
+        print('{:<12} {:.3f}s'.format(name + ':', best))
+
+    check = subprocess.run([sys.executable, '-c', 'import sys; sys.path.insert(0, sys.argv[1]); import analyzer; print("matplotlib" in sys.modules)', os.path.dirname(script)], check=True, capture_output=True, text=True)
+    eager = check.stdout.strip() == 'True'
+
+    print('Matplotlib:  {}'.format('loaded at import' if eager else 'not loaded at import'))
+    print('Target:      {:.3f}s ({})'.format(args.target, 'met' if times['Help'] <= args.target else 'MISSED'))
+
+    return 1 if eager or times['Help'] > args.target else 0
+
+
+def benchmark_stages(args: argparse.Namespace):
+    def run_stages(filenames: list[str], directory: str) -> dict[str, float]:
+        times: dict[str, float] = {}
+
+        for _ in range(args.repeat):
+            output = tempfile.mkdtemp(dir=directory)
+
+            start = time.perf_counter()
+            logs = analyzer.load_logs(filenames, args.jobs)
+            parsed = time.perf_counter()
+
+            log_statistics = analyzer.LogStatistics(logs)
+            log_statistics.quantiles
+            log_statistics.seeds
+            log_statistics.sum_of_best
+            log_statistics.get_battle_summary()
+            log_statistics.get_split_data(True)
+            log_statistics.get_battle_data(True)
+            log_statistics.get_battle_data(True, agility=True)
+            log_statistics.get_battle_data(False, False)
+            aggregated = time.perf_counter()
+
+            manifest = analyzer.ReportManifest(output, False)
+            analyzer.write_summary(output, log_statistics, manifest, False)
+            analyzer.write_runs(output, logs, log_statistics.quantiles, manifest)
+            rendered = time.perf_counter()
+
+            stages = {'parse': parsed - start, 'aggregate': aggregated - parsed, 'html': rendered - aggregated}
+
+            if args.images:
+                plots = analyzer.write_summary(output, log_statistics, analyzer.ReportManifest(output, False))
+                start = time.perf_counter()
+                analyzer.img_output_plots(plots, args.jobs)
+                stages['images'] = time.perf_counter() - start
+
+            for stage, elapsed in stages.items():
+                times[stage] = min(times.get(stage, elapsed), elapsed)
+
+            shutil.rmtree(output)
+
+        return times
+
+    with tempfile.TemporaryDirectory() as directory:
+        filenames = args.logs if args.logs else generate_corpus(os.path.join(directory, 'logs'), args.count, args.seed)
+        corpus = {'logs': len(filenames), 'bytes': sum(os.path.getsize(x) for x in filenames), 'seed': None if args.logs else args.seed}
+
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            times = run_stages(filenames, directory)
+
+    baseline = None
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        if baseline.get('corpus') != corpus:
+            print('WARNING: The baseline was measured on another corpus ({})'.format(baseline.get('corpus')))
+
+    regressions = []
+
+    print('Logs: {} ({:.1f} MiB)'.format(corpus['logs'], corpus['bytes'] / (1 << 20)))
+    print('{:<10} {:>9} {:>9} {:>7}'.format('Stage', 'Time', 'Baseline', 'Ratio'))
+
+    for stage, elapsed in times.items():
+        previous = baseline['stages'].get(stage) if baseline else None
+
+        if previous:
+            ratio = elapsed / previous
+            print('{:<10} {:>8.3f}s {:>8.3f}s {:>6.2f}x'.format(stage, elapsed, previous, ratio))
+
+            if ratio > 1 + args.tolerance:
+                regressions.append(stage)
+        else:
+            print('{:<10} {:>8.3f}s {:>9} {:>7}'.format(stage, elapsed, '-', '-'))
+
+    if regressions:
+        print('Regressions: {}'.format(', '.join(regressions)))
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'version': 1, 'python': sys.version.split()[0], 'corpus': corpus, 'stages': times}, f, indent=1, sort_keys=True)
+            f.write('\n')
+
+    return 1 if regressions else 0
+
+
+def generate(args: argparse.Namespace):
+    filenames = generate_corpus(args.directory, args.count, args.seed, args.events)
+    print('Wrote {} logs ({:.1f} MiB) to {}'.format(len(filenames), sum(os.path.getsize(x) for x in filenames) / (1 << 20), args.directory))
+
+    return 0
+
+
+def benchmark_kde(args: argparse.Namespace):
+    from scipy import stats
+
+    import numpy
+
+    generator = numpy.random.default_rng(args.seed)
+    failures = 0
+
+    print('{:>8}  {:>10}  {:>10}  {:>10}'.format('Samples', 'Error', 'SciPy', 'Edge'))
+
+    for count in args.samples:
+        # Battle times tend to be skewed with a long tail, so use a mixture.
+        samples = numpy.concatenate([generator.normal(60, 5, count - count // 4), generator.gamma(2, 20, count // 4) + 70])
+        points = numpy.linspace(samples.min() - 10, samples.max() + 10, args.points)
+
+        start = time.perf_counter()
+        expected = stats.gaussian_kde(samples)(points)
+        scipy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = analyzer.get_density(samples, points)
+        edge_time = time.perf_counter() - start
+
+        assert(actual is not None)
+
+        # The error is relative to the peak density, which is what is visible in a plot.
+        error = numpy.abs(actual - expected).max() / expected.max()
+
+        print('{:>8}  {:>10.2e}  {:>9.4f}s  {:>9.4f}s'.format(count, error, scipy_time, edge_time))
+
+        if not error <= args.tolerance:
+            print('FAILED: error {:.2e} for {} samples is above the tolerance of {:.2e}'.format(error, count, args.tolerance))
+            failures += 1
+
+    for samples in [numpy.array([42.0]), numpy.array([42.0, 42.0, 42.0])]:
+        density = analyzer.get_density(samples, numpy.linspace(32, 52))
+
+        if density is None or not numpy.isfinite(density).all() or density.max() <= 0:
+            print('FAILED: no density for {} identical sample(s)'.format(len(samples)))
+            failures += 1
+
+    print('{} ({} failure(s), tolerance {:.2e})'.format('FAILED' if failures else 'OK', failures, args.tolerance))
+    return 1 if failures else 0
+
+
+def benchmark_memory(args: argparse.Namespace):
+    def measure(build: Callable[[], Any]) -> tuple[Any, int]:
+        gc.collect()
+        start = tracemalloc.get_traced_memory()[0]
+        result = build()
+        gc.collect()
+        return (result, tracemalloc.get_traced_memory()[0] - start)
+
+    with tempfile.TemporaryDirectory() as directory:
+        filenames = args.logs if args.logs else generate_corpus(directory, args.count, args.seed)
+        tracemalloc.start()
+
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            logs, current = measure(lambda: analyzer.load_logs(filenames, args.jobs))
+
+        # The legacy copies are built from the parsed logs, but share none of
+        # their strings, as when each battle was parsed into a dict of its own.
+        _, legacy = measure(lambda: [legacy_copy_log(log) for log in logs])
+        tracemalloc.stop()
+
+    battles = sum(len(log.battles) for log in logs)
+    splits = sum(len(log.splits) for log in logs)
+
+    print('Logs:       {} ({} battles, {} splits)'.format(len(logs), battles, splits))
+    print('Before:     {:.1f} MiB ({:.0f} bytes/battle)'.format(legacy / (1 << 20), legacy / max(1, battles)))
+    print('After:      {:.1f} MiB ({:.0f} bytes/battle)'.format(current / (1 << 20), current / max(1, battles)))
+    print('Reduction:  {:.1f}x'.format(legacy / max(1, current)))
+
+    return 0
+
+
+def benchmark_sketch(args: argparse.Namespace):
+    import numpy
+
+    generator = numpy.random.default_rng(args.seed)
+    quantiles = numpy.linspace(0.01, 0.99, 99)
+    failures = 0
+
+    print('{:>8}  {:>10}  {:>10}  {:>8}  {:>9}'.format('Values', 'Rank Error', 'Merged', 'Retained', 'Time'))
+
+    for count in args.values:
+        # Frame counts are integers with many ties, as well as a long tail.
+        values = numpy.concatenate([generator.normal(3600, 300, count - count // 4), generator.gamma(2, 600, count // 4) + 4000]).astype(int)
+        ordered = numpy.sort(values)
+
+        def get_rank_error(sketch: analyzer.QuantileSketch):
+            errors = []
+
+            for q in quantiles:
+                value = sketch.quantile(q)
+                low = numpy.searchsorted(ordered, value, side='left') / count
+                high = numpy.searchsorted(ordered, value, side='right') / count
+                errors.append(0 if low <= q <= high else min(abs(low - q), abs(high - q)))
+
+            return max(errors)
+
+        start = time.perf_counter()
+        sketch = analyzer.QuantileSketch()
+
+        for value in values.tolist():
+            sketch.add(value)
+
+        elapsed = time.perf_counter() - start
+
+        # Merging sketches of parts, as when folding groups together, must
+        # keep the same accuracy.
+        merged = analyzer.QuantileSketch()
+
+        for part in numpy.array_split(values, args.parts):
+            part_sketch = analyzer.QuantileSketch()
+            part_sketch.extend(part.tolist())
+            merged.extend(part_sketch)
+
+        error = get_rank_error(sketch)
+        merged_error = get_rank_error(merged)
+
+        if max(error, merged_error) > args.tolerance or sketch.minimum != ordered[0] or sketch.maximum != ordered[-1] or len(merged) != count:
+            failures += 1
+
+        print('{:>8}  {:>9.3%}  {:>9.3%}  {:>8}  {:>8.3f}s'.format(count, error, merged_error, sum(len(x) for x in sketch._levels), elapsed))
+
+    return 1 if failures else 0
+
+
+#
+# Main Execution
+#
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks for the Edge log analyzer.')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    parse_parser = subparsers.add_parser('parse', help='compare the line parser against the original regex cascade')
+    parse_parser.add_argument('--repeat', type=int, default=3, help='number of timed passes (best is reported)')
+    parse_parser.add_argument('logs', nargs='+', help='log files to parse')
+    parse_parser.set_defaults(func=benchmark_parse)
+
+    read_parser = subparsers.add_parser('read', help='compare reading whole buffers against feeding logs line by line')
+    read_parser.add_argument('--repeat', type=int, default=3, help='number of timed passes (best is reported)')
+    read_parser.add_argument('logs', nargs='+', help='log files to read')
+    read_parser.set_defaults(func=benchmark_read)
+
+    events_parser = subparsers.add_parser('events', help='compare reading event files against the text logs they were converted from')
+    events_parser.add_argument('--repeat', type=int, default=3, help='number of timed passes (best is reported)')
+    events_parser.add_argument('--actions', action='store_true', help='also record and compare the actions of each battle')
+    events_parser.add_argument('logs', nargs='+', help='text log files to convert and read')
+    events_parser.set_defaults(func=benchmark_events)
+
+    generate_parser = subparsers.add_parser('generate', help='write a corpus of synthetic logs')
+    generate_parser.add_argument('--count', type=int, default=100, help='number of logs (default: 100)')
+    generate_parser.add_argument('--seed', type=int, default=0, help='random seed for the generated logs')
+    generate_parser.add_argument('--events', action='store_true', help='also write an event file alongside each log')
+    generate_parser.add_argument('directory', help='directory to write the logs to (created if needed)')
+    generate_parser.set_defaults(func=generate)
+
+    stages_parser = subparsers.add_parser('stages', help='time each stage of the report pipeline, optionally against a saved baseline')
+    stages_parser.add_argument('--count', type=int, default=200, help='number of synthetic logs to generate when no logs are given (default: 200)')
+    stages_parser.add_argument('--seed', type=int, default=0, help='random seed for the generated logs')
+    stages_parser.add_argument('-j', '--jobs', type=int, default=1, help='number of processes used to parse logs and render images (default: 1)')
+    stages_parser.add_argument('--repeat', type=int, default=3, help='number of timed passes (best is reported)')
+    stages_parser.add_argument('--no-images', dest='images', action='store_false', help='skip the image rendering stage')
+    stages_parser.add_argument('--baseline', metavar='FILE', help='baseline saved by --save to compare against')
+    stages_parser.add_argument('--tolerance', type=float, default=0.25, help='fraction by which a stage may be slower than the baseline (default: 0.25)')
+    stages_parser.add_argument('--save', metavar='FILE', help='save the results as a baseline')
+    stages_parser.add_argument('logs', nargs='*', help='log files to use instead of a synthetic corpus')
+    stages_parser.set_defaults(func=benchmark_stages)
+
+    startup_parser = subparsers.add_parser('startup', help='measure how long the analyzer takes to start')
+    startup_parser.add_argument('--repeat', type=int, default=5, help='number of timed starts (best is reported)')
+    startup_parser.add_argument('--target', type=float, default=0.25, help='maximum time for analyzer.py --help, in seconds (default: 0.25)')
+    startup_parser.set_defaults(func=benchmark_startup)
+
+    kde_parser = subparsers.add_parser('kde', help='compare the density estimator against scipy.stats.gaussian_kde')
+    kde_parser.add_argument('--points', type=int, default=50, help='number of points to evaluate (default: 50, as plotted)')
+    kde_parser.add_argument('--seed', type=int, default=0, help='random seed for the generated samples')
+    kde_parser.add_argument('--tolerance', type=float, default=1e-3, help='maximum error relative to the peak density')
+    kde_parser.add_argument('samples', type=int, nargs='*', default=[2, 10, 100, 999, 1000, 10000, 100000], help='sample counts to test')
+    kde_parser.set_defaults(func=benchmark_kde)
+
+    memory_parser = subparsers.add_parser('memory', help='compare the memory taken by parsed logs against dicts for each battle and split')
+    memory_parser.add_argument('--count', type=int, default=200, help='number of synthetic logs to generate when no logs are given (default: 200)')
+    memory_parser.add_argument('--seed', type=int, default=0, help='random seed for the generated logs')
+    memory_parser.add_argument('-j', '--jobs', type=int, default=1, help='number of processes used to parse logs (default: 1)')
+    memory_parser.add_argument('logs', nargs='*', help='log files to use instead of a synthetic corpus')
+    memory_parser.set_defaults(func=benchmark_memory)
+
+    sketch_parser = subparsers.add_parser('sketch', help='measure the rank error of the quantile sketch used when streaming')
+    sketch_parser.add_argument('--parts', type=int, default=16, help='number of sketches merged for the merged error')
+    sketch_parser.add_argument('--seed', type=int, default=0, help='random seed for the generated values')
+    sketch_parser.add_argument('--tolerance', type=float, default=0.01, help='maximum rank error, as a fraction of the count')
+    sketch_parser.add_argument('values', type=int, nargs='*', default=[100, 1000, 10000, 100000, 1000000], help='value counts to test')
+    sketch_parser.set_defaults(func=benchmark_sketch)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
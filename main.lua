@@ -112,12 +112,16 @@ local function _reset()
 	log.log("Edge Final Fantasy IV Speed Run Bot")
 	log.log("-----------------------------------")
 	log.log(string.format("Version: %s", _get_version()))
+	log.event("version", _get_version())
 
 	if FULL_RUN then
 		log.log("Beginning Full Run")
 		log.log(string.format("Route: %s", ROUTE))
+		log.event("route", ROUTE)
 		log.log(string.format("Encounter Seed: %d", ENCOUNTER_SEED))
+		log.event("step_seed", ENCOUNTER_SEED)
 		log.log(string.format("RNG Seed: %d", SEED))
+		log.event("rng_seed", SEED)
 	else
 		log.log("Beginning Test Mode")
 	end
@@ -73,6 +73,7 @@ end
 
 function _M.split(message)
 	log.log("Split: " .. message)
+	log.event("split", message)
 
 	return _M.send("startorsplit")
 end
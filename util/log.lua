@@ -27,9 +27,14 @@ local _M = {}
 --------------------------------------------------------------------------------
 
 local _file = nil
+local _events = nil
 local _base_frame = nil
 local _final_frame = nil
 
+-- The version of the layout of the event file, written in its first record.
+-- Increment whenever the fields of an event change.
+local EVENT_SCHEMA_VERSION = 1
+
 --------------------------------------------------------------------------------
 -- Private Functions
 --------------------------------------------------------------------------------
@@ -47,6 +52,32 @@ local function _log(message)
 	return true
 end
 
+local function _encode(value)
+	local value_type = type(value)
+
+	if value_type == "nil" then
+		return "null"
+	elseif value_type == "boolean" then
+		return tostring(value)
+	elseif value_type == "number" then
+		if math.type(value) == "integer" then
+			return string.format("%d", value)
+		else
+			return string.format("%.17g", value)
+		end
+	elseif value_type == "string" then
+		return string.format('"%s"', (value:gsub('[%c"\\]', function(c) return string.format("\\u%04x", c:byte()) end)))
+	else
+		local items = {}
+
+		for i = 1, value.n or #value do
+			items[i] = _encode(value[i])
+		end
+
+		return string.format("[%s]", table.concat(items, ","))
+	end
+end
+
 --------------------------------------------------------------------------------
 -- Public Functions
 --------------------------------------------------------------------------------
@@ -98,6 +129,18 @@ function _M.log(message)
 	return _log(message)
 end
 
+-- Writes an event to the event file, as a JSON array of the frame, the event
+-- type and the given fields. Tables with nil entries must be created with
+-- table.pack so that their length is known.
+function _M.event(event_type, ...)
+	if _events then
+		_events:write(_encode(table.pack(emu.framecount(), event_type, ...)), "\n")
+		_events:flush()
+	end
+
+	return true
+end
+
 function _M.start()
 	_base_frame = emu.framecount()
 end
@@ -110,13 +153,28 @@ function _M.reset()
 		_file = nil
 	end
 
+	if _events then
+		_events:close()
+		_events = nil
+	end
+
 	_base_frame = nil
 	_final_frame = nil
 
 	local err
 
 	if FULL_RUN then
-		_file, err = io.open(string.format("logs/edge-%s-%03d-%010d-%s.log", ROUTE, ENCOUNTER_SEED, SEED, os.date("!%Y%m%d-%H%M%S")), "w")
+		local filename = string.format("logs/edge-%s-%03d-%010d-%s", ROUTE, ENCOUNTER_SEED, SEED, os.date("!%Y%m%d-%H%M%S"))
+
+		_file, err = io.open(filename .. ".log", "w")
+
+		if CONFIG.EVENT_LOG then
+			_events, err = io.open(filename .. ".events", "w")
+
+			if _events then
+				_events:write(string.format('["edge-events",%d]\n', EVENT_SCHEMA_VERSION))
+			end
+		end
 	end
 end
 